@@ -3,6 +3,7 @@ import faulthandler
 faulthandler.enable()
 
 import logging
+import multiprocessing
 import os.path
 import sys
 
@@ -102,4 +103,6 @@ def _entry_point(project, verbosity):
 
 # for PyInstaller
 if __name__ == "__main__":
+    # projects are loaded with a process pool
+    multiprocessing.freeze_support()
     sys.exit(_entry_point())
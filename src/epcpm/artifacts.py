@@ -0,0 +1,67 @@
+import hashlib
+import os
+import pathlib
+import zipfile
+
+import epcpm.exportmanifest
+
+
+def zip_digest(path, ignored=("docProps/core.xml",)):
+    """Digest the members of a zip based document such as an xlsx.  The
+    archive itself records when each member was written and the core
+    properties record when the document was created so both are left out.
+    """
+    try:
+        archive = zipfile.ZipFile(path)
+    except FileNotFoundError:
+        return None
+    except zipfile.BadZipFile:
+        return epcpm.exportmanifest.file_digest(path)
+
+    hasher = hashlib.sha256()
+
+    with archive:
+        for name in archive.namelist():
+            if name in ignored:
+                continue
+
+            hasher.update(name.encode("utf-8"))
+            hasher.update(b"\0")
+            hasher.update(hashlib.sha256(archive.read(name)).digest())
+
+    return hasher.hexdigest()
+
+
+def write_if_changed(path, write, digest=epcpm.exportmanifest.file_digest):
+    """Have write() fill a temporary file next to the path and only replace
+    the path when the content differs so that unchanged artifacts keep their
+    modification time.  Returns whether the path was changed.
+    """
+    path = pathlib.Path(path)
+    temporary_path = path.with_name(path.name + ".tmp")
+
+    try:
+        write(temporary_path)
+
+        if digest(temporary_path) == digest(path):
+            os.remove(temporary_path)
+            return False
+
+        os.replace(temporary_path, path)
+    except Exception:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+
+        raise
+
+    return True
+
+
+def write_text_if_changed(path, text, encoding=None, newline="\n"):
+    def write(temporary_path):
+        with open(temporary_path, "w", encoding=encoding, newline=newline) as f:
+            f.write(text)
+
+    return write_if_changed(path=path, write=write)
@@ -0,0 +1,214 @@
+import functools
+import threading
+
+import attr
+import epyqlib.attrsmodel
+import epyqlib.utils.qt
+
+
+@functools.lru_cache(maxsize=None)
+def has_parameter_uuid(cls):
+    try:
+        fields = attr.fields_dict(cls)
+    except attr.exceptions.NotAnAttrsClassError:
+        return False
+
+    return "parameter_uuid" in fields
+
+
+def update_children(parent, children):
+    """Make the children of the parent exactly those given, in order, only
+    removing and inserting the nodes that are missing or out of place.
+    """
+    kept = {id(child) for child in children}
+
+    for child in list(parent.children):
+        if id(child) not in kept:
+            parent.remove_child(child=child)
+
+    for row, child in enumerate(children):
+        if parent.child_at_row(row) is child:
+            continue
+
+        if child.tree_parent is not None:
+            child.tree_parent.remove_child(child=child)
+
+        parent.insert_child(row, child)
+
+
+def nodes_by_path(root):
+    """Index the nodes below the root by their path."""
+    nodes = {}
+
+    def visit(node, _):
+        path = getattr(node, "path", None)
+        if path is not None:
+            nodes.setdefault(path, []).append(node)
+
+    root.traverse(call_this=visit, internal_nodes=True)
+
+    return nodes
+
+
+def updating_nodes(root):
+    """Collect the outermost nodes below the root that regenerate themselves,
+    such as tables.  Updating one of them also updates the nodes below it.
+    """
+    nodes = []
+
+    def collect(node):
+        if getattr(node, "update", None) is not None:
+            nodes.append(node)
+            return
+
+        for child in node.children:
+            collect(child)
+
+    collect(root)
+
+    return nodes
+
+
+def update_subtree(node):
+    def visit(node, _):
+        update = getattr(node, "update", None)
+
+        if update is not None:
+            update()
+
+    node.traverse(call_this=visit, internal_nodes=True)
+
+
+def related(node, other):
+    return (
+        node is other
+        or any(ancestor is other for ancestor in node.ancestors())
+        or any(ancestor is node for ancestor in other.ancestors())
+    )
+
+
+class Model(epyqlib.attrsmodel.Model):
+    def __init__(self, *args, uuid_to_node=None, **kwargs):
+        self.parameter_uuid_to_nodes = {}
+        self._node_to_parameter_uuid = {}
+        self._parameter_uuid_connections = {}
+        self._initial_uuid_to_node = uuid_to_node
+        self._update_lock = threading.Lock()
+        self.stale_nodes = []
+
+        super().__init__(*args, **kwargs)
+
+    @property
+    def stale(self):
+        return len(self.stale_nodes) > 0
+
+    def mark_stale(self):
+        """Mark the tables and other self updating nodes to be regenerated
+        when next used.
+        """
+        self.stale_nodes = updating_nodes(self.root)
+
+    def update_nodes(self):
+        super().update_nodes()
+        self.stale_nodes = []
+
+    def ensure_updated(self, node=None):
+        """Update the stale nodes, only those containing or inside the node
+        if one is given, first bringing the models they draw from up to date.
+        """
+        with self._update_lock:
+            stale = [
+                stale_node
+                for stale_node in self.stale_nodes
+                if node is None or related(stale_node, node)
+            ]
+
+            if len(stale) == 0:
+                return
+
+            for model in self.droppable_from:
+                if model is not self:
+                    model.ensure_updated()
+
+            for stale_node in stale:
+                # removed from the tree since being marked
+                if stale_node.find_root() is self.root:
+                    update_subtree(stale_node)
+
+            updated = {id(stale_node) for stale_node in stale}
+            self.stale_nodes = [
+                stale_node
+                for stale_node in self.stale_nodes
+                if id(stale_node) not in updated
+            ]
+
+    def pyqtify_connect(self, parent, child):
+        uuid_to_node = self._initial_uuid_to_node
+
+        if uuid_to_node is None:
+            super().pyqtify_connect(parent=parent, child=child)
+            return
+
+        # a loader already collected every node in the tree, adopt its map
+        # rather than rebuilding an identical one
+        self._initial_uuid_to_node = None
+        self.uuid_to_node = uuid_to_node
+
+        def visit(node, _):
+            if node is child:
+                this_parent = parent
+            else:
+                this_parent = node.tree_parent
+
+            self._pyqtify_connect(parent=this_parent, child=node)
+
+        child.traverse(call_this=visit, internal_nodes=True)
+
+    def nodes_by_parameter_uuid(self, parameter_uuid):
+        return list(self.parameter_uuid_to_nodes.get(parameter_uuid, ()))
+
+    def _index_parameter_uuid(self, node, parameter_uuid):
+        self._unindex_parameter_uuid(node)
+
+        if parameter_uuid is None:
+            return
+
+        self._node_to_parameter_uuid[node] = parameter_uuid
+        nodes = self.parameter_uuid_to_nodes.setdefault(parameter_uuid, {})
+        nodes[node] = None
+
+    def _unindex_parameter_uuid(self, node):
+        parameter_uuid = self._node_to_parameter_uuid.pop(node, None)
+
+        if parameter_uuid is None:
+            return
+
+        nodes = self.parameter_uuid_to_nodes[parameter_uuid]
+        del nodes[node]
+        if len(nodes) == 0:
+            del self.parameter_uuid_to_nodes[parameter_uuid]
+
+    def _pyqtify_connect(self, parent, child):
+        super()._pyqtify_connect(parent=parent, child=child)
+
+        if not has_parameter_uuid(type(child)):
+            return
+
+        def changed(parameter_uuid, node=child):
+            self._index_parameter_uuid(node=node, parameter_uuid=parameter_uuid)
+
+        signal = epyqlib.utils.qt.pyqtify_signals(child).parameter_uuid
+        signal.connect(changed)
+        self._parameter_uuid_connections[child] = (signal, changed)
+
+        changed(child.parameter_uuid)
+
+    def _pyqtify_disconnect(self, parent, child):
+        connection = self._parameter_uuid_connections.pop(child, None)
+
+        if connection is not None:
+            signal, slot = connection
+            signal.disconnect(slot)
+            self._unindex_parameter_uuid(node=child)
+
+        super()._pyqtify_disconnect(parent=parent, child=child)
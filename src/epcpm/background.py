@@ -0,0 +1,62 @@
+import threading
+import traceback
+
+from PyQt5 import QtCore
+
+
+# See file COPYING in this source tree
+__copyright__ = "Copyright 2019, EPC Power Corp."
+__license__ = "GPLv2+"
+
+
+class Canceled(Exception):
+    pass
+
+
+class TaskSignals(QtCore.QObject):
+    progressed = QtCore.pyqtSignal(int, int, str)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    canceled = QtCore.pyqtSignal()
+
+
+class Task(QtCore.QRunnable):
+    """Run a function on a QThreadPool reporting back through queued signals.
+
+    The function is called with ``progress(done, total, label)`` and
+    ``canceled()`` keyword arguments.  It should only read a snapshot of the
+    project since the nodes belong to the GUI thread.
+    """
+
+    def __init__(self, function, cancel_exceptions=(Canceled,)):
+        super().__init__()
+
+        # the Python side keeps the runnable and its signals alive
+        self.setAutoDelete(False)
+
+        self.function = function
+        self.cancel_exceptions = cancel_exceptions
+        self.signals = TaskSignals()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def canceled(self):
+        return self._cancel.is_set()
+
+    def progress(self, done, total, label):
+        self.signals.progressed.emit(done, total, label)
+
+    def run(self):
+        try:
+            result = self.function(progress=self.progress, canceled=self.canceled)
+        except self.cancel_exceptions:
+            self.signals.canceled.emit()
+        except Exception:
+            self.signals.failed.emit(traceback.format_exc())
+        else:
+            if self.canceled():
+                self.signals.canceled.emit()
+            else:
+                self.signals.finished.emit(result)
@@ -1,7 +1,10 @@
 import os
+import threading
 
 import jinja2
 
+import epcpm.artifacts
+
 
 # TODO: CAMPid 073407143081341008467657184603164130
 def format_nested_lists(it, indent=""):
@@ -22,17 +25,58 @@ def format_nested_lists(it, indent=""):
         return result
 
 
+_environments = {}
+_environments_lock = threading.Lock()
+
+
+def environment(directory, newline="\n"):
+    """Share one environment per template directory so templates are only
+    compiled once per process, or once per build with the bytecode cache.
+    """
+    key = (os.fspath(directory), newline)
+
+    with _environments_lock:
+        cached = _environments.get(key)
+
+        if cached is None:
+            cached = jinja2.Environment(
+                undefined=jinja2.StrictUndefined,
+                loader=jinja2.FileSystemLoader(key[0]),
+                bytecode_cache=jinja2.FileSystemBytecodeCache(),
+                newline_sequence=newline,
+                autoescape=False,
+                trim_blocks=True,
+            )
+            _environments[key] = cached
+
+    return cached
+
+
 def render(source, destination, context={}, encoding="utf-8", newline="\n"):
-    environment = jinja2.Environment(
-        undefined=jinja2.StrictUndefined,
-        loader=jinja2.FileSystemLoader(os.fspath(source.parent)),
-        newline_sequence=newline,
-        autoescape=False,
-        trim_blocks=True,
+    """Render the template to the destination, returning whether the
+    destination changed.
+    """
+    template = environment(directory=source.parent, newline=newline).get_template(
+        name=source.name,
     )
-    template = environment.get_template(name=source.name)
 
-    rendered = template.render(context)
-    rendered = rendered.rstrip() + newline
+    def write(path):
+        with open(path, "w", encoding=encoding, newline="") as f:
+            # trailing whitespace is held back since the output is stripped
+            # down to a single final newline
+            pending = ""
+
+            for chunk in template.generate(context):
+                stripped = chunk.rstrip()
+
+                if len(stripped) == 0:
+                    pending += chunk
+                    continue
+
+                f.write(pending)
+                f.write(stripped)
+                pending = chunk[len(stripped) :]
+
+            f.write(newline)
 
-    destination.write_bytes(rendered.encode(encoding))
+    return epcpm.artifacts.write_if_changed(path=destination, write=write)
@@ -1,3 +1,4 @@
+import functools
 import itertools
 import string
 import uuid
@@ -14,6 +15,8 @@ import epyqlib.treenode
 import epyqlib.utils.general
 import epyqlib.utils.qt
 
+import epcpm.attrsmodel
+
 # See file COPYING in this source tree
 __copyright__ = "Copyright 2017, EPC Power Corp."
 __license__ = "GPLv2+"
@@ -285,6 +288,41 @@ class Message(epyqlib.treenode.TreeNode):
     check = epyqlib.attrsmodel.check_just_children
 
 
+def check_multiplexed_children(node, models, by_identifier):
+    """Check the children like epyqlib.attrsmodel.check_just_children() but
+    hand the multiplexers, including those within tables, the message's index
+    of MUX IDs.
+    """
+    child_results = []
+
+    for child in node.children:
+        if isinstance(child, Multiplexer):
+            results = child.check_with_index(
+                models=models,
+                by_identifier=by_identifier,
+            )
+        elif isinstance(child, CanTable):
+            results = check_multiplexed_children(
+                node=child,
+                models=models,
+                by_identifier=by_identifier,
+            )
+        else:
+            results = child.check(models=models)
+
+        if results is not None:
+            child_results.append(results)
+
+    if len(child_results) == 0:
+        return None
+
+    return epyqlib.checkresultmodel.Node.build(
+        name=getattr(node, "name", ""),
+        node=node,
+        child_results=child_results,
+    )
+
+
 @graham.schemify(tag="multiplexer")
 @epyqlib.attrsmodel.ify()
 @epyqlib.utils.qt.pyqtify()
@@ -379,20 +417,24 @@ class Multiplexer(epyqlib.treenode.TreeNode):
 
         return True
 
-    @epyqlib.attrsmodel.check_children
-    def check(self, result, models):
-        # TODO: we should really get all the mux id's passed in here.
-        #       searching for them all from each place is wasteful
-
+    def check(self, models):
         multiplexer_message = self.tree_parent
         while not isinstance(multiplexer_message, MultiplexedMessage):
             multiplexer_message = multiplexer_message.tree_parent
 
-        for other in multiplexer_message.multiplexer_id_nodes():
-            if other is self:
-                continue
+        return self.check_with_index(
+            models=models,
+            by_identifier=multiplexer_message.multiplexer_id_nodes_by_identifier(),
+        )
+
+    def check_with_index(self, models, by_identifier):
+        result = epyqlib.attrsmodel.check_just_children(self, models=models)
 
-            if other.identifier != self.identifier:
+        if result is None:
+            result = epyqlib.checkresultmodel.Node.build(name=self.name, node=self)
+
+        for other in by_identifier.get(self.identifier, ()):
+            if other is self:
                 continue
 
             result.append_child(
@@ -419,6 +461,9 @@ class Multiplexer(epyqlib.treenode.TreeNode):
                 )
             )
 
+        if len(result.children) == 0:
+            return None
+
         return result
 
     def multiplexer_id_nodes(self):
@@ -545,9 +590,24 @@ class MultiplexedMessage(epyqlib.treenode.TreeNode):
             )
         )
 
+    def multiplexer_id_nodes_by_identifier(self):
+        by_identifier = {}
+        for node in self.multiplexer_id_nodes():
+            by_identifier.setdefault(node.identifier, []).append(node)
+
+        return by_identifier
+
+    def check(self, models):
+        # each multiplexer looks up its conflicts so share one index across
+        # the whole pass rather than collecting the ids for every multiplexer
+        return check_multiplexed_children(
+            node=self,
+            models=models,
+            by_identifier=self.multiplexer_id_nodes_by_identifier(),
+        )
+
     remove_old_on_drop = epyqlib.attrsmodel.default_remove_old_on_drop
     internal_move = epyqlib.attrsmodel.default_internal_move
-    check = epyqlib.attrsmodel.check_just_children
 
 
 @graham.schemify(tag="multiplexed_message_clone")
@@ -646,6 +706,127 @@ class MultiplexedMessageClone(epyqlib.treenode.TreeNode):
     check = epyqlib.attrsmodel.check_just_children
 
 
+@attr.s(frozen=True)
+class LeafOrder:
+    """Order table leaves by the names of the nodes at positions in their
+    paths.  Each level is a path index and the names in their order, most
+    significant level first.
+    """
+
+    levels = attr.ib(converter=tuple)
+
+    def key(self, node_from_uuid):
+        ranks = [
+            (index, {name: rank for rank, name in enumerate(names)})
+            for index, names in self.levels
+        ]
+
+        names = {}
+
+        def name(element):
+            element_name = names.get(element)
+            if element_name is None:
+                element_name = node_from_uuid(element).name
+                names[element] = element_name
+
+            return element_name
+
+        def key(leaf):
+            return tuple(rank[name(leaf.path[index])] for index, rank in ranks)
+
+        return key
+
+    def sorted(self, leaves, node_from_uuid):
+        return sorted(leaves, key=self.key(node_from_uuid=node_from_uuid))
+
+
+# TODO: backmatching
+# used for tables that don't set their own leaf_order
+leaf_orders = {
+    # Frequency
+    uuid.UUID("ed3bf0c2-9eed-4203-929b-d85f2e7300c5"): LeafOrder(
+        levels=(
+            (1, ("RideThrough", "Trip")),
+            (0, ("Low", "High")),
+            (2, ("1", "2", "3", "4")),
+            (3, ("Before", "seconds", "hertz", "After")),
+        ),
+    ),
+    # Voltage
+    uuid.UUID("b148f2a8-6605-4aac-a235-9c66581c213b"): LeafOrder(
+        levels=(
+            (1, ("RideThrough", "Trip")),
+            (0, ("Low", "High")),
+            (2, ("1", "2", "3", "4")),
+            (3, ("Before", "seconds", "percent", "After")),
+        ),
+    ),
+    # VoltVar
+    uuid.UUID("b1c598b8-1a56-42eb-94b8-85c3b434d7a7"): LeafOrder(
+        levels=(
+            (0, ("1", "2", "3", "4")),
+            (
+                1,
+                (
+                    "Before",
+                    "Settings",
+                    "percent_nominal_volts",
+                    "percent_nominal_var",
+                    "After",
+                ),
+            ),
+        ),
+    ),
+    # HertzWatts
+    uuid.UUID("6ea3bd0d-3799-4d2d-8998-a45dc80eb0bd"): LeafOrder(
+        levels=(
+            (0, ("1", "2", "3", "4")),
+            (1, ("Before", "Settings", "hertz", "percent_nominal_pwr", "After")),
+        ),
+    ),
+    # VoltWatts
+    uuid.UUID("3e435024-5cad-4af0-81f8-dac56fbcc629"): LeafOrder(
+        levels=(
+            (0, ("1", "2", "3", "4")),
+            (
+                1,
+                (
+                    "Before",
+                    "Settings",
+                    "percent_nominal_volts",
+                    "percent_nominal_pwr",
+                    "After",
+                ),
+            ),
+        ),
+    ),
+}
+
+
+def to_leaf_order_levels(value):
+    if value is None:
+        return None
+
+    return tuple((int(index), tuple(names)) for index, names in value)
+
+
+class LeafOrderField(marshmallow.fields.Field):
+    def _serialize(self, value, attr, obj):
+        if value is None:
+            # left out so tables without their own order dump as before
+            return marshmallow.missing
+
+        return [{"path_index": index, "names": list(names)} for index, names in value]
+
+    def _deserialize(self, value, attr, data):
+        if self.allow_none and value is None:
+            return None
+
+        return to_leaf_order_levels(
+            (level["path_index"], level["names"]) for level in value
+        )
+
+
 @graham.schemify(tag="table", register=True)
 @epyqlib.attrsmodel.ify()
 @epyqlib.utils.qt.pyqtify()
@@ -681,6 +862,19 @@ class CanTable(epyqlib.treenode.TreeNode):
         human_name="Table UUID",
     )
 
+    # levels of LeafOrder used to sort the multiplexed table leaves
+    leaf_order = attr.ib(
+        default=None,
+        converter=to_leaf_order_levels,
+        metadata=graham.create_metadata(
+            field=LeafOrderField(allow_none=True),
+        ),
+    )
+    epyqlib.attrsmodel.attrib(
+        attribute=leaf_order,
+        no_column=True,
+    )
+
     children = attr.ib(
         default=attr.Factory(list),
         metadata=graham.create_metadata(
@@ -698,6 +892,8 @@ class CanTable(epyqlib.treenode.TreeNode):
     def __attrs_post_init__(self):
         super().__init__()
 
+        self._fingerprint = None
+
     @classmethod
     def all_addable_types(cls):
         return epyqlib.attrsmodel.create_addable_types(())
@@ -717,22 +913,9 @@ class CanTable(epyqlib.treenode.TreeNode):
         return True
 
     def update(self, table=None, warn=False):
-        array_uuid_to_signal = {
-            child.parameter_uuid: child
-            for child in self.children
-            if isinstance(child, Signal)
-        }
-
-        existing_signal_order = [
-            node for node in self.children if isinstance(node, Signal)
-        ]
-
-        for signal in array_uuid_to_signal.values():
-            self.remove_child(child=signal)
-
-        nodes = self.recursively_remove_children()
-
         if self.table_uuid is None:
+            self._fingerprint = None
+            self.recursively_remove_children()
             return
 
         root = self.find_root()
@@ -743,13 +926,122 @@ class CanTable(epyqlib.treenode.TreeNode):
         elif table.uuid != self.table_uuid:
             raise ConsistencyError()
 
+        node_from_uuid = functools.lru_cache(maxsize=None)(model.node_from_uuid)
+
+        fingerprint = self.fingerprint(table=table, node_from_uuid=node_from_uuid)
+        if fingerprint == self._fingerprint:
+            return
+
+        children = self.build_children(
+            table=table,
+            node_from_uuid=node_from_uuid,
+            warn=warn,
+        )
+
+        # fill in detached multiplexers before adding them to the tree
+        for child, grandchildren in children:
+            if grandchildren is not None:
+                epcpm.attrsmodel.update_children(parent=child, children=grandchildren)
+
+        epcpm.attrsmodel.update_children(
+            parent=self, children=[child for child, _ in children]
+        )
+
+        self._fingerprint = self.fingerprint(
+            table=table,
+            node_from_uuid=node_from_uuid,
+        )
+
+    def leaf_order_for(self, table):
+        if self.leaf_order is None:
+            return leaf_orders.get(table.uuid)
+
+        return LeafOrder(levels=self.leaf_order)
+
+    def fingerprint(self, table, node_from_uuid):
+        """Everything from the parameter table and this table that the
+        generated multiplexers and signals depend on.
+        """
+        leaves = table.group.leaves()
+        path_uuids = dict.fromkeys(element for leaf in leaves for element in leaf.path)
+        path_nodes = [node_from_uuid(element) for element in path_uuids]
+
+        return (
+            self.multiplexer_range_first,
+            self.leaf_order_for(table=table),
+            tuple(
+                (
+                    child.uuid,
+                    child.name,
+                    child.parameter_uuid,
+                    child.bits,
+                    child.factor,
+                    child.signed,
+                    child.enumeration_uuid,
+                )
+                for child in self.children
+                if isinstance(child, Signal)
+            ),
+            tuple(
+                (
+                    child.uuid,
+                    child.name,
+                    tuple(
+                        (parameter.uuid, parameter.name)
+                        for parameter in child.children
+                        if isinstance(child, epyqlib.pm.parametermodel.Group)
+                    ),
+                )
+                for child in table.children
+                if isinstance(
+                    child,
+                    (epyqlib.pm.parametermodel.Array, epyqlib.pm.parametermodel.Group),
+                )
+            ),
+            tuple(
+                (
+                    leaf.uuid,
+                    leaf.name,
+                    leaf.path,
+                    leaf.original.uuid,
+                    type(leaf.original.tree_parent),
+                )
+                for leaf in leaves
+            ),
+            tuple(
+                (node.uuid, node.name, type(node), node.tree_parent.name)
+                for node in path_nodes
+            ),
+            tuple(
+                (child.uuid, tuple(grandchild.uuid for grandchild in child.children))
+                for child in self.children
+            ),
+        )
+
+    def build_children(self, table, node_from_uuid, warn):
+        """Collect the signals and multiplexers for the table, reusing the
+        present nodes where they match.  Each child is paired with its
+        children, or None for the signals.
+        """
+        array_uuid_to_signal = {
+            child.parameter_uuid: child
+            for child in self.children
+            if isinstance(child, Signal)
+        }
+
+        existing_signal_order = [
+            node for node in self.children if isinstance(node, Signal)
+        ]
+
         old_by_path = {}
-        for node in nodes:
+        for node in self.children:
             if isinstance(node, Multiplexer):
-                path = (*node.path, node.path_children)
-            else:
-                path = node.path
-            old_by_path[path] = node
+                old_by_path[(*node.path, node.path_children)] = node
+
+                for signal in node.children:
+                    old_by_path[signal.path] = signal
+
+        children = []
 
         arrays = [
             child
@@ -776,10 +1068,10 @@ class CanTable(epyqlib.treenode.TreeNode):
                 signal.name = array.name
                 signal.parameter_uuid = array.uuid
 
-            self.append_child(signal)
+            children.append((signal, None))
 
         manually_ordered = [
-            model.node_from_uuid(node.parameter_uuid)
+            node_from_uuid(node.parameter_uuid)
             for node in existing_signal_order
             if isinstance(node, Signal)
         ]
@@ -801,88 +1093,12 @@ class CanTable(epyqlib.treenode.TreeNode):
                     signal.name = parameter.name
                     signal.parameter_uuid = parameter.uuid
 
-                self.append_child(signal)
-
-        # TODO: backmatching
-        def my_sorted(sequence, order):
-            s = sequence
-            for o, r in reversed(order):
-                d = {c: i for i, c in enumerate(r)}
-                s = sorted(s, key=lambda x: d[model.node_from_uuid(x.path[o]).name])
+                children.append((signal, None))
 
-            return s
-
-        # TODO: backmatching
         leaves = table.group.leaves()
-        if table.uuid == uuid.UUID("ed3bf0c2-9eed-4203-929b-d85f2e7300c5"):  # Frequency
-            leaves = my_sorted(
-                leaves,
-                (
-                    (1, ("RideThrough", "Trip")),
-                    (0, ("Low", "High")),
-                    (2, ("1", "2", "3", "4")),
-                    (3, ("Before", "seconds", "hertz", "After")),
-                ),
-            )
-        elif table.uuid == uuid.UUID("b148f2a8-6605-4aac-a235-9c66581c213b"):  # Voltage
-            leaves = my_sorted(
-                leaves,
-                (
-                    (1, ("RideThrough", "Trip")),
-                    (0, ("Low", "High")),
-                    (2, ("1", "2", "3", "4")),
-                    (3, ("Before", "seconds", "percent", "After")),
-                ),
-            )
-        elif table.uuid == uuid.UUID("b1c598b8-1a56-42eb-94b8-85c3b434d7a7"):  # VoltVar
-            leaves = my_sorted(
-                leaves,
-                (
-                    (0, ("1", "2", "3", "4")),
-                    (
-                        1,
-                        (
-                            "Before",
-                            "Settings",
-                            "percent_nominal_volts",
-                            "percent_nominal_var",
-                            "After",
-                        ),
-                    ),
-                ),
-            )
-        elif table.uuid == uuid.UUID(
-            "6ea3bd0d-3799-4d2d-8998-a45dc80eb0bd"
-        ):  # HertzWatts  (was incorrectly HertzWatts instead of HzWatts that would never have been reached)
-            leaves = my_sorted(
-                leaves,
-                (
-                    (0, ("1", "2", "3", "4")),
-                    (
-                        1,
-                        ("Before", "Settings", "hertz", "percent_nominal_pwr", "After"),
-                    ),
-                ),
-            )
-        elif table.uuid == uuid.UUID(
-            "3e435024-5cad-4af0-81f8-dac56fbcc629"
-        ):  # VoltWatts  (was incorrectly HertzWatts duplicate that would never have been reached)
-            leaves = my_sorted(
-                leaves,
-                (
-                    (0, ("1", "2", "3", "4")),
-                    (
-                        1,
-                        (
-                            "Before",
-                            "Settings",
-                            "percent_nominal_volts",
-                            "percent_nominal_pwr",
-                            "After",
-                        ),
-                    ),
-                ),
-            )
+        leaf_order = self.leaf_order_for(table=table)
+        if leaf_order is not None:
+            leaves = leaf_order.sorted(leaves, node_from_uuid=node_from_uuid)
 
         # TODO: this is arrays and groups...
         leaf_groups = [
@@ -934,7 +1150,7 @@ class CanTable(epyqlib.treenode.TreeNode):
                             icon=QtWidgets.QMessageBox.Warning,
                         )
 
-                return
+                return children
 
             if not is_group:
                 # TODO: actually calculate space to use
@@ -949,7 +1165,7 @@ class CanTable(epyqlib.treenode.TreeNode):
             for chunk, letter in zip(chunks, string.ascii_uppercase):
                 path = chunk[0].path
 
-                path_nodes = [model.node_from_uuid(u) for u in path]
+                path_nodes = [node_from_uuid(u) for u in path]
 
                 enumerators = []
                 other = []
@@ -993,6 +1209,7 @@ class CanTable(epyqlib.treenode.TreeNode):
                     multiplexer.path_children = multiplexer_path_children
 
                 multiplexer.length = 8
+                multiplexer_children = []
 
                 mux_value += 1
 
@@ -1085,10 +1302,12 @@ class CanTable(epyqlib.treenode.TreeNode):
                         new_signal.parameter_uuid = array_element.uuid
                         new_signal.path = signal_path
 
-                    multiplexer.append_child(new_signal)
+                    multiplexer_children.append(new_signal)
                     start_bit += new_signal.bits
 
-                self.append_child(multiplexer)
+                children.append((multiplexer, multiplexer_children))
+
+        return children
 
     def child_from(self, node):
         if isinstance(node, epyqlib.pm.parametermodel.Table):
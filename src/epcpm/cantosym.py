@@ -9,7 +9,9 @@ import canmatrix.formats
 import epyqlib.pm.parametermodel
 import epyqlib.utils.general
 
+import epcpm.artifacts
 import epcpm.canmodel
+import epcpm.exportcontext
 import epcpm.symtoproject
 
 builders = epyqlib.utils.general.TypeMap()
@@ -23,19 +25,33 @@ def dehumanize_name(name):
 #     return epyqlib.utils.general.spaced_to_upper_camel(name)
 
 
-def export(path, can_model, parameters_model):
+def export(path, can_model, parameters_model, context=None):
+    parameters_model.ensure_updated()
+    can_model.ensure_updated()
+
+    if context is None:
+        context = epcpm.exportcontext.ExportContext(
+            parameters_root=parameters_model.root,
+            can_root=can_model.root,
+        )
+
     finder = can_model.node_from_uuid
-    access_levels = parameters_model.list_selection_roots["access level"]
     builder = epcpm.cantosym.builders.wrap(
         wrapped=can_model.root,
-        access_levels=access_levels,
+        access_levels=context.access_levels,
         parameter_uuid_finder=finder,
         parameter_model=parameters_model,
+        context=context,
     )
 
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8", newline="\n") as f:
-        f.write(builder.gen())
+    changed = epcpm.artifacts.write_text_if_changed(
+        path=path,
+        text=builder.gen(),
+        encoding="utf-8",
+    )
+
+    return [path] if changed else []
 
 
 class SignalOutsideMessageError(Exception):
@@ -73,6 +89,7 @@ class Root:
     access_levels = attr.ib()
     parameter_uuid_finder = attr.ib(default=None)
     parameter_model = attr.ib(default=None)
+    context = attr.ib(default=None)
 
     def gen(self):
         matrix = canmatrix.canmatrix.CanMatrix()
@@ -124,29 +141,16 @@ class Root:
         return f.read().decode(codec)
 
     def collect_enumerations(self):
-        collected = []
-
         if self.parameter_model is None:
-            return collected
-
-        def collect(node, collected):
-            is_enumeration = isinstance(
-                node,
-                (
-                    epyqlib.pm.parametermodel.Enumeration,
-                    epyqlib.pm.parametermodel.AccessLevels,
-                ),
-            )
-            if is_enumeration:
-                collected.append(node)
+            return []
 
-        self.parameter_model.root.traverse(
-            call_this=collect,
-            payload=collected,
-            internal_nodes=True,
-        )
+        context = self.context
+        if context is None:
+            context = epcpm.exportcontext.ExportContext(
+                parameters_root=self.parameter_model.root,
+            )
 
-        return collected
+        return list(context.enumerations)
 
 
 @builders(epcpm.canmodel.Message)
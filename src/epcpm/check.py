@@ -0,0 +1,484 @@
+import concurrent.futures
+import threading
+import uuid
+
+import attr
+
+import epyqlib.checkresultmodel
+import epyqlib.treenode
+
+
+@attr.s(frozen=True)
+class Finding:
+    node_uuid = attr.ib()
+    severity = attr.ib()
+    message = attr.ib()
+
+
+@attr.s(frozen=True)
+class CheckedNode:
+    name = attr.ib()
+    node_uuid = attr.ib()
+    children = attr.ib(default=())
+
+
+@attr.s(frozen=True)
+class Report:
+    models = attr.ib()
+
+    def findings(self):
+        def walk(checked, path):
+            path = (*path, checked.name)
+
+            for child in checked.children:
+                if isinstance(child, Finding):
+                    yield path, child
+                else:
+                    yield from walk(checked=child, path=path)
+
+        for name, checked_nodes in self.models:
+            for checked in checked_nodes:
+                yield from walk(checked=checked, path=(name,))
+
+    @property
+    def failed(self):
+        return any(
+            finding.severity == epyqlib.checkresultmodel.ResultSeverity.error
+            for _, finding in self.findings()
+        )
+
+    def lines(self):
+        for path, finding in self.findings():
+            severity = getattr(finding.severity, "name", finding.severity)
+            yield f"{severity}: {' / '.join(path)}: {finding.message}"
+
+
+def detach(result, detached=None):
+    """Copy a check result tree into plain data so it can be produced on a
+    worker thread and kept between checks.  Results already in detached, a
+    dict keyed by result id, are reused and the new copies are added to it.
+    """
+    if detached is None:
+        detached = {}
+
+    existing = detached.get(id(result))
+    if existing is not None:
+        return existing
+
+    node_uuid = getattr(result.node, "uuid", None)
+
+    if isinstance(result, epyqlib.checkresultmodel.Result):
+        copy = Finding(
+            node_uuid=node_uuid,
+            severity=result.severity,
+            message=result.message,
+        )
+    else:
+        copy = CheckedNode(
+            name=result.name,
+            node_uuid=node_uuid,
+            children=tuple(
+                detach(result=child, detached=detached) for child in result.children
+            ),
+        )
+
+    detached[id(result)] = copy
+
+    return copy
+
+
+def attach(checked, node_from_uuid):
+    """Build the check result tree for a detached result, referencing the
+    nodes found by the finder.  Results for nodes that no longer exist are
+    dropped.
+    """
+    node = node_from_uuid(checked.node_uuid)
+    if node is None:
+        return None
+
+    if isinstance(checked, Finding):
+        return epyqlib.checkresultmodel.Result(
+            node=node,
+            severity=checked.severity,
+            message=checked.message,
+        )
+
+    result = epyqlib.checkresultmodel.Node(name=checked.name, node=node)
+
+    for child in checked.children:
+        child_result = attach(checked=child, node_from_uuid=node_from_uuid)
+        if child_result is not None:
+            result.append_child(child_result)
+
+    return result
+
+
+def node_finder(models):
+    def node_from_uuid(u):
+        for model in models.values():
+            node = model.uuid_to_node.get(u)
+            if node is not None:
+                return node
+
+        return None
+
+    return node_from_uuid
+
+
+def result_root(report, models):
+    node_from_uuid = node_finder(models)
+    root = epyqlib.checkresultmodel.Root()
+
+    for name, checked_nodes in report.models:
+        model = models[name]
+        node = epyqlib.checkresultmodel.Node(name=name, node=model.root)
+
+        for checked in checked_nodes:
+            result = attach(checked=checked, node_from_uuid=node_from_uuid)
+            if result is not None:
+                node.append_child(result)
+
+        root.append_child(node)
+
+    return root
+
+
+def references(node):
+    """The uuids of the nodes the node refers to through its own attributes."""
+    found = set()
+
+    for name, value in node.__pyqtify_instance__.values.items():
+        if name == "uuid":
+            continue
+
+        if isinstance(value, epyqlib.treenode.TreeNode):
+            value = value.uuid
+
+        if isinstance(value, uuid.UUID):
+            found.add(value)
+
+    return frozenset(found)
+
+
+def referenced_uuids(node, node_from_uuid):
+    """Collect the uuids a node refers to, following the references of the
+    referenced nodes as well since checks commonly look through them.
+    """
+    found = set()
+    pending = [node]
+
+    while len(pending) > 0:
+        for value in references(pending.pop()):
+            if value in found:
+                continue
+
+            found.add(value)
+
+            referenced = node_from_uuid(value)
+            if referenced is not None:
+                pending.append(referenced)
+
+    return frozenset(found)
+
+
+@attr.s(frozen=True)
+class CacheEntry:
+    checked = attr.ib()
+    references = attr.ib()
+    depends_on = attr.ib()
+    ancestors = attr.ib()
+
+
+def failed_check(node, exception):
+    return CheckedNode(
+        name=getattr(node, "name", ""),
+        node_uuid=node.uuid,
+        children=(
+            Finding(
+                node_uuid=node.uuid,
+                severity=epyqlib.checkresultmodel.ResultSeverity.error,
+                message=f"Check failed: {type(exception).__name__}: {exception}",
+            ),
+        ),
+    )
+
+
+def check_node(node, models, cache, node_from_uuid):
+    """Check the node and return cache entries for it and the nodes within it
+    that were checked.  Nodes with a cached entry are not checked again, their
+    results are used in place of calling their check().
+    """
+    ancestors = ()
+    parent = node.tree_parent
+    while parent is not None:
+        ancestors = (parent.uuid, *ancestors)
+        parent = parent.tree_parent
+
+    results = {}
+    detached = {}
+    checked = []
+    shadowed = []
+
+    def replay(entry):
+        def check(models):
+            if entry.checked is None:
+                return None
+
+            result = attach(checked=entry.checked, node_from_uuid=node_from_uuid)
+            if result is not None:
+                detached[id(result)] = entry.checked
+
+            return result
+
+        return check
+
+    def record(descendant, original):
+        def check(models):
+            result = original(models=models)
+            results[descendant.uuid] = result
+
+            return result
+
+        return check
+
+    def shadow(descendant, ancestors):
+        entry = cache.get(descendant.uuid)
+        if entry is not None:
+            descendant.check = replay(entry=entry)
+            shadowed.append(descendant)
+            return
+
+        descendant.check = record(descendant=descendant, original=descendant.check)
+        shadowed.append(descendant)
+        checked.append((descendant, ancestors))
+
+        ancestors = (*ancestors, descendant.uuid)
+        for child in descendant.children:
+            shadow(descendant=child, ancestors=ancestors)
+
+    def cache_entry(descendant, checked, ancestors):
+        return CacheEntry(
+            checked=checked,
+            references=references(descendant),
+            depends_on=referenced_uuids(
+                node=descendant,
+                node_from_uuid=node_from_uuid,
+            ),
+            ancestors=ancestors,
+        )
+
+    try:
+        shadow(descendant=node, ancestors=ancestors)
+
+        try:
+            node.check(models=models)
+        except Exception as e:
+            # the failure is only recorded against the node itself
+            failure = failed_check(node=node, exception=e)
+            return {
+                node.uuid: cache_entry(node, checked=failure, ancestors=ancestors),
+            }
+    finally:
+        for descendant in shadowed:
+            del descendant.check
+
+    entries = {}
+    for descendant, descendant_ancestors in checked:
+        if descendant.uuid not in results:
+            # the parent's check didn't ask for it
+            continue
+
+        result = results[descendant.uuid]
+        if result is not None:
+            result = detach(result=result, detached=detached)
+
+        entries[descendant.uuid] = cache_entry(
+            descendant,
+            checked=result,
+            ancestors=descendant_ancestors,
+        )
+
+    return entries
+
+
+@attr.s
+class Checker:
+    """Check the top level nodes of each model, keeping the results until
+    the node or anything it refers to changes in the watched models.
+    """
+
+    _cache = attr.ib(factory=dict)
+    _version = attr.ib(default=0)
+    _lock = attr.ib(factory=threading.Lock)
+    _connections = attr.ib(factory=list)
+
+    @property
+    def version(self):
+        with self._lock:
+            return self._version
+
+    def check(self, models, version=None, jobs=1, progress=None, canceled=None):
+        """Check the models, reusing the cached results.  When the models are
+        a snapshot checked on another thread, pass the version read when the
+        snapshot was taken so that results are only cached if nothing was
+        edited since.
+        """
+        with self._lock:
+            if version is None:
+                version = self._version
+
+            cache = dict(self._cache)
+
+        node_from_uuid = node_finder(models)
+
+        nodes = [
+            (name, child)
+            for name, model in models.items()
+            for child in model.root.children
+        ]
+
+        stale = [node for _, node in nodes if node.uuid not in cache]
+        lock = threading.Lock()
+        finished = []
+
+        def run(node):
+            if canceled is not None and canceled():
+                return {}
+
+            entries = check_node(
+                node=node,
+                models=models,
+                cache=cache,
+                node_from_uuid=node_from_uuid,
+            )
+
+            if progress is not None:
+                with lock:
+                    finished.append(node)
+                    progress(len(finished), len(stale), getattr(node, "name", ""))
+
+            return entries
+
+        if jobs == 1:
+            checked = [run(node) for node in stale]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+                checked = list(executor.map(run, stale))
+
+        if canceled is not None and canceled():
+            return None
+
+        fresh = {}
+        for entries in checked:
+            fresh.update(entries)
+
+        with self._lock:
+            # anything edited while checking may have made these stale already
+            if self._version == version:
+                self._cache = {
+                    node_uuid: entry
+                    for node_uuid, entry in {**cache, **fresh}.items()
+                    if node_from_uuid(node_uuid) is not None
+                }
+
+        results = {name: [] for name, _ in models.items()}
+        for name, node in nodes:
+            entry = fresh.get(node.uuid, cache.get(node.uuid))
+            if entry.checked is not None:
+                results[name].append(entry.checked)
+
+        return Report(
+            models=tuple((name, tuple(checked)) for name, checked in results.items())
+        )
+
+    def invalidate(self, uuids, referenced=()):
+        """Drop the results of the nodes with the uuids and of the nodes that
+        depend on them.  The results of the referenced nodes, and of those the
+        changed nodes referred to when checked, are dropped as well since
+        checks such as a parameter's look for the nodes using it.  The
+        results of the nodes containing any of these go too.
+        """
+        uuids = set(uuids)
+
+        with self._lock:
+            self._version += 1
+
+            referenced = set(referenced)
+            for node_uuid in uuids:
+                entry = self._cache.get(node_uuid)
+                if entry is not None:
+                    referenced.update(entry.references)
+
+            dropped = {
+                node_uuid
+                for node_uuid, entry in self._cache.items()
+                if node_uuid in uuids
+                or node_uuid in referenced
+                or not uuids.isdisjoint(entry.depends_on)
+            }
+
+            for node_uuid in list(dropped):
+                dropped.update(self._cache[node_uuid].ancestors)
+
+            self._cache = {
+                node_uuid: entry
+                for node_uuid, entry in self._cache.items()
+                if node_uuid not in dropped
+            }
+
+    def invalidate_all(self):
+        with self._lock:
+            self._version += 1
+            self._cache = {}
+
+    def watch(self, models):
+        self.unwatch()
+
+        for model in models.values():
+            qt_model = model.model
+
+            def data_changed(top_left, *_, model=model):
+                self._changed(model=model, index=top_left)
+
+            def rows_changed(parent, first, last, model=model):
+                self._changed(
+                    model=model,
+                    index=parent,
+                    rows=range(first, last + 1),
+                )
+
+            def reset():
+                self.invalidate_all()
+
+            for signal, slot in (
+                (qt_model.dataChanged, data_changed),
+                (qt_model.rowsInserted, rows_changed),
+                (qt_model.rowsAboutToBeRemoved, rows_changed),
+                (qt_model.modelReset, reset),
+            ):
+                signal.connect(slot)
+                self._connections.append((signal, slot))
+
+    def unwatch(self):
+        for signal, slot in self._connections:
+            signal.disconnect(slot)
+
+        self._connections = []
+        self.invalidate_all()
+
+    def _changed(self, model, index, rows=()):
+        node = model.node_from_index(index)
+
+        changed = {node.uuid}
+        referenced = set(references(node))
+
+        def collect(descendant, _):
+            changed.add(descendant.uuid)
+            referenced.update(references(descendant))
+
+        for row in rows:
+            child_index = model.model.index(row, 0, index)
+            child = model.node_from_index(child_index)
+            child.traverse(call_this=collect, internal_nodes=True)
+
+        self.invalidate(uuids=changed, referenced=referenced)
@@ -6,6 +6,7 @@ import graham
 
 import epyqlib.pm.valuesetmodel
 
+import epcpm.attrsmodel
 import epcpm.project
 import epcpm.symtoproject
 
@@ -26,11 +27,11 @@ def cli(sym, hierarchy, parameters, value_set):
 
     project_model = epcpm.project.Project(
         models=epcpm.project.Models(
-            parameters=epyqlib.attrsmodel.Model(
+            parameters=epcpm.attrsmodel.Model(
                 root=parameters_root,
                 columns=epyqlib.pm.parametermodel.columns,
             ),
-            can=epyqlib.attrsmodel.Model(
+            can=epcpm.attrsmodel.Model(
                 root=can_root,
                 columns=epcpm.canmodel.columns,
             ),
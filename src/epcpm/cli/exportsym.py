@@ -28,6 +28,7 @@ def relative_path(target, reference):
 )
 def cli(project_file, sym_file, hierarchy_file):
     project = epcpm.project.load(project_file)
+    project.models.can.ensure_updated()
 
     (access_levels,) = project.models.parameters.root.nodes_by_filter(
         filter=(lambda node: isinstance(node, epyqlib.pm.parametermodel.AccessLevels)),
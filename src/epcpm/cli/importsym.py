@@ -3,10 +3,10 @@ import pathlib
 import click
 import graham
 
-import epyqlib.attrsmodel
 import epyqlib.pm.parametermodel
 import epyqlib.pm.valuesetmodel
 
+import epcpm.attrsmodel
 import epcpm.canmodel
 import epcpm.project
 import epcpm.symtoproject
@@ -57,15 +57,15 @@ def cli(
             sunspec=relative_path(sunspec.name, project_path),
         ),
         models=epcpm.project.Models(
-            parameters=epyqlib.attrsmodel.Model(
+            parameters=epcpm.attrsmodel.Model(
                 root=parameters_root,
                 columns=epyqlib.pm.parametermodel.columns,
             ),
-            can=epyqlib.attrsmodel.Model(
+            can=epcpm.attrsmodel.Model(
                 root=can_root,
                 columns=epcpm.canmodel.columns,
             ),
-            sunspec=epyqlib.attrsmodel.Model(
+            sunspec=epcpm.attrsmodel.Model(
                 root=sunspec_root,
                 columns=epcpm.sunspecmodel.columns,
             ),
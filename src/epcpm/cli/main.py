@@ -1,3 +1,5 @@
+import concurrent.futures
+import functools
 import os
 import pathlib
 import subprocess
@@ -6,9 +8,9 @@ import textwrap
 
 import click
 import epyqlib.pm.valuesetmodel
-import lxml.etree
 
 import epcpm.__main__
+import epcpm.check
 import epcpm.cli.exportdocx
 import epcpm.cli.utils
 import epcpm.importexport
@@ -68,12 +70,28 @@ export.add_command(epcpm.cli.exportdocx.cli, name="docx")
     "include_uuid_in_item",
     default=False,
 )
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of generators to run and model files to load concurrently",
+)
+@click.option(
+    "--incremental/--full",
+    "incremental",
+    default=True,
+    help="Only regenerate outputs whose inputs changed since the last build",
+)
+@epcpm.cli.utils.project_cache_option()
 def build(
     project,
     target_path,
     only_if_stale,
     skip_sunspec,
     include_uuid_in_item,
+    jobs,
+    incremental,
+    project_cache,
 ):
     """Export PM data to embedded project directory"""
     project = pathlib.Path(project)
@@ -95,17 +113,44 @@ def build(
 
         click.echo("Generated files appear to be out of date, starting export")
 
-    loaded_project = epcpm.project.loadp(project)
+    loaded_project = epcpm.project.loadp(
+        project,
+        use_cache=project_cache,
+        jobs=jobs,
+    )
 
-    epcpm.importexport.full_export(
+    report = epcpm.importexport.full_export(
         project=loaded_project,
         target_directory=target_path,
         paths=paths,
         first_time=False,
         skip_sunspec=skip_sunspec,
         include_uuid_in_item=include_uuid_in_item,
+        jobs=jobs,
+        incremental=incremental,
     )
 
+    click.echo()
+    for timing in report.timings:
+        click.echo(f"{timing.name}: {timing.seconds:.2f}s")
+
+    for name in report.up_to_date:
+        click.echo(f"{name}: up to date")
+
+    for result in report.scripts:
+        if result.skipped:
+            click.echo(f"{result.name}: inputs unchanged, skipped")
+        else:
+            click.echo(
+                f"{result.name}: exited {result.returncode}"
+                f" after {result.seconds:.2f}s",
+            )
+
+    click.echo()
+    click.echo(f"{len(report.changed)} files changed")
+    for path in report.changed:
+        click.echo(f"    {path}")
+
     click.echo()
     click.echo("done")
 
@@ -131,9 +176,13 @@ def validate():
     type=click.Path(exists=True, dir_okay=False, resolve_path=True),
 )
 @click.option("--smdx-glob", default="smdx_*.xml")
-def batch(reference, schema, subject, smdx_glob):
-    failed = False
-
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of files to validate concurrently",
+)
+def batch(reference, schema, subject, smdx_glob, jobs):
     reference_directory_path = pathlib.Path(reference)
     subject_directory_path = pathlib.Path(subject)
 
@@ -148,70 +197,97 @@ def batch(reference, schema, subject, smdx_glob):
         file_glob=smdx_glob,
     )
 
-    schema = lxml.etree.fromstring(schema.read_bytes())
-    schema = lxml.etree.XMLSchema(schema, attribute_defaults=True)
-
-    spacing = "\n\n"
-    present_spacing = ""
-
-    diff_indent = "        "
+    validations = []
 
     for reference_path, subject_path in sorted(paired_paths.pairs.items()):
-        click.echo(present_spacing, nl=False)
-        present_spacing = spacing
-
-        click.echo(
-            textwrap.dedent(
-                f"""\
+        header = textwrap.dedent(
+            f"""\
         Cross validating: {subject_path.name}
                reference: {reference_path}
                  subject: {subject_path}
         """
-            )
         )
+        validate = functools.partial(
+            epcpm.smdx.validate_path_against_reference,
+            subject_path=subject_path,
+            schema_path=schema,
+            reference_path=reference_path,
+        )
+        validations.append((header, validate))
 
-        reference = lxml.etree.fromstring(reference_path.read_bytes())
-        subject = lxml.etree.fromstring(subject_path.read_bytes())
-
-        result = epcpm.smdx.validate_against_reference(
-            subject=subject,
-            schema=schema,
-            reference=reference,
+    for subject_path in sorted(paired_paths.only_right):
+        header = textwrap.dedent(
+            f"""\
+        Validating: {subject_path.name}
+           subject: {subject_path}
+        """
         )
+        validate = functools.partial(
+            epcpm.smdx.validate_path_against_schema,
+            subject_path=subject_path,
+            schema_path=schema,
+        )
+        validations.append((header, validate))
 
-        if result.failed:
-            failed = True
+    def echo_results(results):
+        failed = False
 
-        for line in result.notes.splitlines():
-            click.echo(diff_indent + line)
+        spacing = "\n\n"
+        present_spacing = ""
 
-    for subject in sorted(paired_paths.only_right):
-        click.echo(present_spacing, nl=False)
-        present_spacing = spacing
+        diff_indent = "        "
 
-        click.echo(
-            textwrap.dedent(
-                f"""\
-        Validating: {subject.name}
-           subject: {subject}
-        """
-            )
-        )
+        for (header, _), result in zip(validations, results):
+            click.echo(present_spacing, nl=False)
+            present_spacing = spacing
 
-        result = epcpm.smdx.validate_against_schema(
-            subject=subject,
-            schema=schema,
-        )
+            click.echo(header)
+
+            if result.failed:
+                failed = True
+
+            for line in result.notes.splitlines():
+                click.echo(diff_indent + line)
 
-        if result.failed:
-            failed = True
+        return failed
 
-        for line in result.notes.splitlines():
-            click.echo(diff_indent + line)
+    if jobs == 1:
+        failed = echo_results(validate() for _, validate in validations)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(validate) for _, validate in validations]
+            # reported in the same order as the serial run
+            failed = echo_results(future.result() for future in futures)
 
     sys.exit(failed)
 
 
+@validate.command(name="project")
+@epcpm.cli.utils.project_option(required=True)
+@epcpm.cli.utils.project_cache_option()
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Number of model files to load and top level nodes to check concurrently",
+)
+def validate_project(project, project_cache, jobs):
+    """Run the model checks and exit non-zero on any errors"""
+    loaded_project = epcpm.project.loadp(
+        project,
+        use_cache=project_cache,
+        jobs=jobs,
+    )
+    loaded_project.models.ensure_updated()
+
+    report = epcpm.check.Checker().check(models=loaded_project.models, jobs=jobs)
+
+    for line in report.lines():
+        click.echo(line)
+
+    sys.exit(report.failed)
+
+
 @main.command()
 @epcpm.cli.utils.target_path_option(required=True)
 def transition(target_path):
@@ -351,10 +427,12 @@ def pmvs():
 @epcpm.cli.utils.project_option(required=True)
 @click.option("--input", type=click.File())
 @click.option("--output", type=click.Path(dir_okay=False))
-def filter(project, input, output):
+@epcpm.cli.utils.project_cache_option()
+def filter(project, input, output, project_cache):
     """Export PM data to embedded project directory"""
     project = pathlib.Path(project)
-    project = epcpm.project.loadp(project)
+    project = epcpm.project.loadp(project, use_cache=project_cache)
+    project.models.parameters.ensure_updated()
 
     value_set = epyqlib.pm.valuesetmodel.load(input)
     items = epcpm.parameterstosil.collect_items(project.models.parameters.root)
@@ -10,6 +10,14 @@ def project_option(required=False):
     )
 
 
+def project_cache_option():
+    return click.option(
+        "--project-cache/--no-project-cache",
+        default=False,
+        help="Reuse a cache of the loaded models next to the .pmp file",
+    )
+
+
 def target_path_option(required):
     return click.option(
         "--target-path",
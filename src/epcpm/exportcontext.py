@@ -0,0 +1,211 @@
+import threading
+
+import attr
+
+import epyqlib.pm.parametermodel
+
+import epcpm.parameterstosil
+import epcpm.sunspecmodel
+
+
+def collect(root, wanted):
+    collected = []
+
+    if root is None:
+        return collected
+
+    def visit(node, _):
+        if wanted(node):
+            collected.append(node)
+
+    root.traverse(call_this=visit, internal_nodes=True)
+
+    return collected
+
+
+def has_parameter_uuid(node):
+    return getattr(node, "parameter_uuid", None) is not None
+
+
+@attr.s(frozen=True)
+class SunspecIndex:
+    """The SunSpec nodes the exporters look up by the parameter, or for
+    blocks the original, they refer to.  Collected in one traversal.
+    """
+
+    parameter_uuid_to_node = attr.ib(factory=dict)
+    table_point_references = attr.ib(factory=dict)
+    data_points = attr.ib(factory=dict)
+    block_references = attr.ib(factory=dict)
+
+    @classmethod
+    def build(cls, sunspec_root):
+        index = cls()
+
+        if sunspec_root is None:
+            return index
+
+        def visit(node, _):
+            if (
+                isinstance(
+                    node,
+                    (
+                        epcpm.sunspecmodel.DataPoint,
+                        epcpm.sunspecmodel.DataPointBitfieldMember,
+                    ),
+                )
+                and has_parameter_uuid(node)
+            ):
+                index.parameter_uuid_to_node[node.parameter_uuid] = node
+
+            if isinstance(
+                node,
+                epcpm.sunspecmodel.TableRepeatingBlockReferenceDataPointReference,
+            ):
+                points = index.table_point_references
+                points.setdefault(node.parameter_uuid, []).append(node)
+            elif isinstance(node, epcpm.sunspecmodel.DataPoint):
+                points = index.data_points
+                points.setdefault(node.parameter_uuid, []).append(node)
+            elif isinstance(node, epcpm.sunspecmodel.TableRepeatingBlockReference):
+                if node.original is None:
+                    return
+
+                references = index.block_references
+                references.setdefault(node.original.uuid, []).append(node)
+
+        sunspec_root.traverse(call_this=visit, internal_nodes=True)
+
+        return index
+
+
+@attr.s
+class ExportContext:
+    """Lookups that several generators derive from the same trees.  Each is
+    built on first use and then shared so that an export, possibly running
+    the generators from several threads, walks each tree once.
+    """
+
+    parameters_root = attr.ib(default=None)
+    can_root = attr.ib(default=None)
+    sunspec_root = attr.ib(default=None)
+    _built = attr.ib(factory=dict)
+    _locks = attr.ib(factory=dict)
+    _lock = attr.ib(factory=threading.Lock)
+
+    @classmethod
+    def from_models(cls, models):
+        return cls(
+            parameters_root=models.parameters.root,
+            can_root=models.can.root,
+            sunspec_root=models.sunspec.root,
+        )
+
+    def get(self, name, build):
+        with self._lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+
+        with lock:
+            if name not in self._built:
+                self._built[name] = build()
+
+            return self._built[name]
+
+    @property
+    def can_nodes_with_parameter_uuid(self):
+        return self.get(
+            name="can_nodes_with_parameter_uuid",
+            build=lambda: collect(root=self.can_root, wanted=has_parameter_uuid),
+        )
+
+    @property
+    def sunspec_index(self):
+        return self.get(
+            name="sunspec_index",
+            build=lambda: SunspecIndex.build(sunspec_root=self.sunspec_root),
+        )
+
+    @property
+    def parameter_uuid_to_sunspec_node(self):
+        return self.sunspec_index.parameter_uuid_to_node
+
+    @property
+    def nodes_by_uuid(self):
+        """The parameter and SunSpec nodes, as the SunSpec model's
+        ``node_from_uuid()`` finds them, in one dict rather than one per model.
+        """
+
+        def build():
+            nodes = {}
+
+            for root in (self.parameters_root, self.sunspec_root):
+                if root is not None:
+                    nodes.update(root.model.uuid_to_node)
+
+            return nodes
+
+        return self.get(name="nodes_by_uuid", build=build)
+
+    def node_finder(self):
+        return self.nodes_by_uuid.__getitem__
+
+    @property
+    def table_elements(self):
+        """Table array elements by the uuid of the group two layers above
+        them and the names from there down, as ``descendent()`` finds them.
+        """
+
+        def build():
+            elements = {}
+
+            for element in collect(
+                root=self.parameters_root,
+                wanted=lambda node: isinstance(
+                    node,
+                    epyqlib.pm.parametermodel.TableArrayElement,
+                ),
+            ):
+                array = element.tree_parent
+                layer = array.tree_parent
+                key = (layer.tree_parent.uuid, layer.name, array.name, element.name)
+                elements.setdefault(key, element)
+
+            return elements
+
+        return self.get(name="table_elements", build=build)
+
+    def table_element_finder(self):
+        elements = self.table_elements
+
+        def find(group, *names):
+            return elements[(group.uuid, *names)]
+
+        return find
+
+    @property
+    def enumerations(self):
+        enumeration_types = (
+            epyqlib.pm.parametermodel.Enumeration,
+            epyqlib.pm.parametermodel.AccessLevels,
+        )
+
+        return self.get(
+            name="enumerations",
+            build=lambda: collect(
+                root=self.parameters_root,
+                wanted=lambda node: isinstance(node, enumeration_types),
+            ),
+        )
+
+    @property
+    def access_levels(self):
+        return self.parameters_root.model.list_selection_roots["access level"]
+
+    @property
+    def sil_items(self):
+        return self.get(
+            name="sil_items",
+            build=lambda: epcpm.parameterstosil.collect_items(
+                parameters_root=self.parameters_root,
+            ),
+        )
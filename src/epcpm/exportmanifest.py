@@ -0,0 +1,232 @@
+import hashlib
+import json
+import os
+import pathlib
+
+import attr
+import graham
+
+import epcpm
+
+
+manifest_version = 1
+default_name = ".pm_export_manifest.json"
+
+# parameter node types whose whole subtree is read when any node inside
+# them is referenced
+widening_types = {"table", "array"}
+
+
+def digest(data):
+    encoded = json.dumps(
+        data,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    ).encode("utf-8")
+
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def file_digest(path):
+    try:
+        content = pathlib.Path(path).read_bytes()
+    except FileNotFoundError:
+        return None
+
+    return hashlib.sha256(content).hexdigest()
+
+
+def index_dumped(data, parent=None, index=None):
+    if index is None:
+        index = {}
+
+    if isinstance(data, dict):
+        uuid = data.get("uuid")
+        if uuid is not None:
+            index[uuid] = (data, parent)
+            parent = uuid
+
+        for value in data.values():
+            index_dumped(data=value, parent=parent, index=index)
+    elif isinstance(data, list):
+        for value in data:
+            index_dumped(data=value, parent=parent, index=index)
+
+    return index
+
+
+def referenced_uuids(data, candidates, found=None):
+    if found is None:
+        found = set()
+
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == "uuid":
+                continue
+
+            if isinstance(value, str):
+                if value in candidates:
+                    found.add(value)
+            else:
+                referenced_uuids(data=value, candidates=candidates, found=found)
+    elif isinstance(data, list):
+        for value in data:
+            if isinstance(value, str):
+                if value in candidates:
+                    found.add(value)
+            else:
+                referenced_uuids(data=value, candidates=candidates, found=found)
+
+    return found
+
+
+def scalars(data):
+    return {key: value for key, value in data.items() if key != "children"}
+
+
+@attr.s
+class Fingerprints:
+    models = attr.ib()
+    _dumped = attr.ib(factory=dict)
+    _digests = attr.ib(factory=dict)
+    _parameters_index = attr.ib(default=None)
+
+    def dumped(self, name):
+        data = self._dumped.get(name)
+
+        if data is None:
+            model = self.models[name]
+            data = graham.schema(type(model.root)).dump(model.root).data
+            self._dumped[name] = data
+
+        return data
+
+    def parameters_index(self):
+        if self._parameters_index is None:
+            self._parameters_index = index_dumped(self.dumped("parameters"))
+
+        return self._parameters_index
+
+    def referenced_parameters(self, name):
+        """Digest the parameter nodes that the named model refers to along
+        with the context the exporters read around them.
+        """
+        index = self.parameters_index()
+
+        pending = referenced_uuids(data=self.dumped(name), candidates=index)
+        pending.update(
+            str(root.uuid)
+            for root in self.models.parameters.list_selection_roots.values()
+            if root is not None and str(root.uuid) in index
+        )
+
+        included = {}
+
+        while len(pending) > 0:
+            uuid = pending.pop()
+
+            target = uuid
+            ancestor = uuid
+            while ancestor is not None:
+                data, ancestor = index[ancestor]
+                if data.get("_type") in widening_types:
+                    target = str(data["uuid"])
+
+            if target in included:
+                continue
+
+            data, parent = index[target]
+
+            context = []
+            while parent is not None:
+                parent_data, parent = index[parent]
+                context.append(scalars(parent_data))
+
+            included[target] = (context, data)
+            pending.update(referenced_uuids(data=data, candidates=index))
+
+        return digest(sorted(included.items()))
+
+    def get(self, key):
+        result = self._digests.get(key)
+
+        if result is None:
+            model_name, _, referenced = key.partition(".")
+
+            if referenced == "":
+                result = digest(self.dumped(model_name))
+            elif referenced == "parameters":
+                result = self.referenced_parameters(model_name)
+            else:
+                raise Exception(f"Unknown fingerprint key: {key!r}")
+
+            self._digests[key] = result
+
+        return result
+
+    def inputs_digest(self, inputs, options, templates):
+        return digest(
+            {
+                "version": epcpm.__version__,
+                "inputs": {key: self.get(key) for key in inputs},
+                "options": options,
+                "templates": {
+                    os.fspath(template): file_digest(template) for template in templates
+                },
+            }
+        )
+
+
+@attr.s
+class Manifest:
+    path = attr.ib()
+    artifacts = attr.ib(factory=dict)
+
+    @classmethod
+    def load(cls, path):
+        path = pathlib.Path(path)
+
+        try:
+            raw = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return cls(path=path)
+
+        if raw.get("version") != manifest_version:
+            return cls(path=path)
+
+        return cls(path=path, artifacts=raw.get("artifacts", {}))
+
+    def save(self):
+        content = json.dumps(
+            {"version": manifest_version, "artifacts": self.artifacts},
+            indent=4,
+            sort_keys=True,
+        )
+        with self.path.open("w", encoding="utf-8", newline="\n") as f:
+            f.write(content + "\n")
+
+    def relative(self, path):
+        return pathlib.Path(os.path.relpath(path, self.path.parent)).as_posix()
+
+    def up_to_date(self, name, inputs, outputs):
+        artifact = self.artifacts.get(name)
+
+        if artifact is None or artifact["inputs"] != inputs:
+            return False
+
+        recorded = artifact["outputs"]
+        if set(recorded) != {self.relative(output) for output in outputs}:
+            return False
+
+        return all(
+            recorded[self.relative(output)] == file_digest(output) for output in outputs
+        )
+
+    def record(self, name, inputs, outputs):
+        self.artifacts[name] = {
+            "inputs": inputs,
+            "outputs": {
+                self.relative(output): file_digest(output) for output in outputs
+            },
+        }
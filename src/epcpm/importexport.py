@@ -1,13 +1,20 @@
+import concurrent.futures
+import functools
 import itertools
 import math
 import os
 import pathlib
 import subprocess
+import threading
+import time
 
 import attr
 import graham
 
+import epcpm.attrsmodel
 import epcpm.cantosym
+import epcpm.exportcontext
+import epcpm.exportmanifest
 import epcpm.parameterstohierarchy
 import epcpm.parameterstointerface
 import epcpm.parameterstosil
@@ -20,7 +27,7 @@ import epcpm.sunspectomanualc
 import epcpm.sunspectomanualh
 import epcpm.sunspectoxlsx
 import epcpm.symtoproject
-import epyqlib.attrsmodel
+import epyqlib.pm.parametermodel
 
 
 def full_import(paths):
@@ -33,15 +40,15 @@ def full_import(paths):
 
     project = epcpm.project.Project()
 
-    project.models.parameters = epyqlib.attrsmodel.Model(
+    project.models.parameters = epcpm.attrsmodel.Model(
         root=parameters_root,
         columns=epyqlib.pm.parametermodel.columns,
     )
-    project.models.can = epyqlib.attrsmodel.Model(
+    project.models.can = epcpm.attrsmodel.Model(
         root=can_root,
         columns=epcpm.canmodel.columns,
     )
-    project.models.sunspec = epyqlib.attrsmodel.Model(
+    project.models.sunspec = epcpm.attrsmodel.Model(
         root=sunspec_root,
         columns=epcpm.sunspecmodel.columns,
     )
@@ -59,6 +66,7 @@ def full_import(paths):
     enumerations.append_child(sunspec_types)
 
     project.models.update_enumeration_roots()
+    project.models.ensure_updated()
 
     sunspec_models = []
     prefix = "smdx_"
@@ -104,122 +112,569 @@ def full_import(paths):
     return project
 
 
-def full_export(
+@attr.s(frozen=True)
+class Generator:
+    name = attr.ib()
+    generate = attr.ib()
+    outputs = attr.ib(default=())
+    # None marks generators that are always run and never recorded
+    inputs = attr.ib(default=None)
+    options = attr.ib(factory=dict)
+    templates = attr.ib(default=())
+
+
+@attr.s(frozen=True)
+class GeneratorTiming:
+    name = attr.ib()
+    seconds = attr.ib()
+    # the outputs that were actually rewritten
+    changed = attr.ib(default=())
+
+
+@attr.s(frozen=True)
+class ExportReport:
+    timings = attr.ib(factory=list)
+    up_to_date = attr.ib(factory=list)
+    scripts = attr.ib(factory=list)
+
+    @property
+    def changed(self):
+        return [path for timing in self.timings for path in timing.changed]
+
+
+def templates_for(*paths):
+    return tuple(path.with_suffix(f"{path.suffix}_pm") for path in paths)
+
+
+class ExportCanceled(Exception):
+    pass
+
+
+def run_generators(generators, jobs=1, progress=None, canceled=None):
+    lock = threading.Lock()
+    finished = []
+
+    def run(generator):
+        if canceled is not None and canceled():
+            raise ExportCanceled()
+
+        start = time.monotonic()
+        changed = generator.generate()
+        end = time.monotonic()
+
+        if not isinstance(changed, (list, tuple)):
+            # generators that don't report what they rewrote are taken to
+            # have rewritten all of their outputs
+            changed = generator.outputs
+
+        if progress is not None:
+            with lock:
+                finished.append(generator.name)
+                progress(len(finished), len(generators), generator.name)
+
+        return GeneratorTiming(
+            name=generator.name,
+            seconds=end - start,
+            changed=tuple(changed),
+        )
+
+    if jobs == 1:
+        return [run(generator) for generator in generators]
+
+    # The models are Qt backed trees that can't be pickled off to other
+    # processes so the generators share them read-only from a thread pool.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run, generator) for generator in generators]
+
+        return [future.result() for future in futures]
+
+
+@attr.s
+class SharedInputs:
+    """The lookups and spreadsheet rows shared by the generators."""
+
+    models = attr.ib()
+    skip_sunspec = attr.ib(default=False)
+    _context = attr.ib(default=None)
+    _spreadsheet_sheets = attr.ib(default=None)
+    _lock = attr.ib(factory=threading.Lock)
+
+    def context(self):
+        with self._lock:
+            if self._context is None:
+                # each tree is walked once per export
+                self._context = epcpm.exportcontext.ExportContext.from_models(
+                    models=self.models,
+                )
+
+            return self._context
+
+    def spreadsheet_sheets(self):
+        with self._lock:
+            if self._spreadsheet_sheets is None:
+                # both spreadsheets are written from the same rows
+                self._spreadsheet_sheets = epcpm.sunspectoxlsx.SharedSheets(
+                    sunspec_model=self.models.sunspec,
+                    parameters_model=self.models.parameters,
+                    skip_sunspec=self.skip_sunspec,
+                )
+
+            return self._spreadsheet_sheets
+
+
+def with_shared(function, **shared):
+    """Wrap the function to be called with the results of the shared getters
+    as additional keyword arguments.
+    """
+
+    def call(**kwargs):
+        return function(
+            **kwargs,
+            **{name: get() for name, get in shared.items()},
+        )
+
+    return call
+
+
+def export_generators(
     project,
     paths,
-    target_directory,
     first_time=False,
     skip_sunspec=False,
     include_uuid_in_item=False,
 ):
-    epcpm.cantosym.export(
-        path=paths.can,
-        can_model=project.models.can,
-        parameters_model=project.models.parameters,
-    )
+    interface_h = paths.interface_c.with_suffix(".h")
+    sunspec_tables_h = paths.sunspec_tables_c.with_suffix(".h")
+    sil_h = paths.sil_c.with_suffix(".h")
+    sunspec_bitfields_h = paths.sunspec_bitfields_c.with_suffix(".h")
+
+    # built when the first generator that uses them runs, so an export with
+    # everything up to date doesn't walk the trees
+    shared = SharedInputs(models=project.models, skip_sunspec=skip_sunspec)
+
+    generators = [
+        Generator(
+            name="can",
+            generate=functools.partial(
+                with_shared(epcpm.cantosym.export, context=shared.context),
+                path=paths.can,
+                can_model=project.models.can,
+                parameters_model=project.models.parameters,
+            ),
+            outputs=(paths.can,),
+            inputs=("can", "can.parameters"),
+        ),
+        Generator(
+            name="hierarchy",
+            generate=functools.partial(
+                with_shared(epcpm.parameterstohierarchy.export, context=shared.context),
+                path=paths.hierarchy,
+                can_model=project.models.can,
+                parameters_model=project.models.parameters,
+            ),
+            outputs=(paths.hierarchy,),
+            inputs=("can", "parameters"),
+        ),
+        Generator(
+            name="interface_c",
+            generate=functools.partial(
+                with_shared(epcpm.parameterstointerface.export, context=shared.context),
+                c_path=paths.interface_c,
+                h_path=interface_h,
+                can_model=project.models.can,
+                sunspec_model=project.models.sunspec,
+                parameters_model=project.models.parameters,
+                skip_sunspec=skip_sunspec,
+                include_uuid_in_item=include_uuid_in_item,
+            ),
+            outputs=(paths.interface_c, interface_h),
+            inputs=("can", "sunspec", "parameters"),
+            options={
+                "skip_sunspec": skip_sunspec,
+                "include_uuid_in_item": include_uuid_in_item,
+            },
+            templates=templates_for(paths.interface_c, interface_h),
+        ),
+        Generator(
+            name="spreadsheet",
+            generate=functools.partial(
+                with_shared(
+                    epcpm.sunspectoxlsx.export,
+                    sheets=shared.spreadsheet_sheets,
+                ),
+                path=paths.spreadsheet,
+                sunspec_model=project.models.sunspec,
+                parameters_model=project.models.parameters,
+                skip_sunspec=skip_sunspec,
+            ),
+            outputs=(paths.spreadsheet,),
+            inputs=("sunspec", "sunspec.parameters"),
+            options={"skip_sunspec": skip_sunspec},
+        ),
+        Generator(
+            name="spreadsheet_user",
+            generate=functools.partial(
+                with_shared(
+                    epcpm.sunspectoxlsx.export,
+                    sheets=shared.spreadsheet_sheets,
+                ),
+                path=paths.spreadsheet_user,
+                sunspec_model=project.models.sunspec,
+                parameters_model=project.models.parameters,
+                skip_sunspec=skip_sunspec,
+                column_filter=attr.evolve(
+                    epcpm.sunspectoxlsx.attr_fill(epcpm.sunspectoxlsx.Fields, True),
+                    get=False,
+                    set=False,
+                    item=False,
+                ),
+            ),
+            outputs=(paths.spreadsheet_user,),
+            inputs=("sunspec", "sunspec.parameters"),
+            options={"skip_sunspec": skip_sunspec},
+        ),
+        Generator(
+            name="sunspec_tables_c",
+            generate=functools.partial(
+                with_shared(epcpm.sunspectotablesc.export, context=shared.context),
+                c_path=paths.sunspec_tables_c,
+                h_path=sunspec_tables_h,
+                sunspec_model=project.models.sunspec,
+                skip_sunspec=skip_sunspec,
+            ),
+            outputs=(paths.sunspec_tables_c, sunspec_tables_h),
+            inputs=("sunspec", "sunspec.parameters"),
+            options={"skip_sunspec": skip_sunspec},
+            templates=templates_for(paths.sunspec_tables_c, sunspec_tables_h),
+        ),
+        Generator(
+            name="sil_c",
+            generate=functools.partial(
+                with_shared(epcpm.parameterstosil.export, context=shared.context),
+                c_path=paths.sil_c,
+                h_path=sil_h,
+                parameters_model=project.models.parameters,
+            ),
+            outputs=(paths.sil_c, sil_h),
+            inputs=("parameters",),
+            templates=templates_for(paths.sil_c, sil_h),
+        ),
+        Generator(
+            name="sunspec_bitfields_c",
+            generate=functools.partial(
+                with_shared(epcpm.sunspectobitfieldsc.export, context=shared.context),
+                c_path=paths.sunspec_bitfields_c,
+                h_path=sunspec_bitfields_h,
+                sunspec_model=project.models.sunspec,
+                include_uuid_in_item=include_uuid_in_item,
+            ),
+            outputs=(paths.sunspec_bitfields_c, sunspec_bitfields_h),
+            inputs=("sunspec", "sunspec.parameters"),
+            options={"include_uuid_in_item": include_uuid_in_item},
+        ),
+    ]
 
-    epcpm.parameterstohierarchy.export(
-        path=paths.hierarchy,
-        can_model=project.models.can,
-        parameters_model=project.models.parameters,
-    )
+    if first_time and not skip_sunspec:
+        generators.extend(
+            [
+                Generator(
+                    name="sunspec_c",
+                    generate=functools.partial(
+                        epcpm.sunspectomanualc.export,
+                        path=paths.sunspec_c,
+                        sunspec_model=project.models.sunspec,
+                    ),
+                ),
+                Generator(
+                    name="sunspec_h",
+                    generate=functools.partial(
+                        epcpm.sunspectomanualh.export,
+                        path=paths.sunspec_c,
+                        sunspec_model=project.models.sunspec,
+                    ),
+                ),
+            ]
+        )
 
-    epcpm.parameterstointerface.export(
-        c_path=paths.interface_c,
-        h_path=paths.interface_c.with_suffix(".h"),
-        can_model=project.models.can,
-        sunspec_model=project.models.sunspec,
-        parameters_model=project.models.parameters,
-        skip_sunspec=skip_sunspec,
-        include_uuid_in_item=include_uuid_in_item,
-    )
+    return generators
 
-    epcpm.sunspectoxlsx.export(
-        path=paths.spreadsheet,
-        sunspec_model=project.models.sunspec,
-        parameters_model=project.models.parameters,
-        skip_sunspec=skip_sunspec,
-    )
 
-    epcpm.sunspectoxlsx.export(
-        path=paths.spreadsheet_user,
-        sunspec_model=project.models.sunspec,
-        parameters_model=project.models.parameters,
+def full_export(
+    project,
+    paths,
+    target_directory,
+    first_time=False,
+    skip_sunspec=False,
+    include_uuid_in_item=False,
+    jobs=1,
+    incremental=False,
+    progress=None,
+    canceled=None,
+):
+    generators = export_generators(
+        project=project,
+        paths=paths,
+        first_time=first_time,
         skip_sunspec=skip_sunspec,
-        column_filter=attr.evolve(
-            epcpm.sunspectoxlsx.attr_fill(epcpm.sunspectoxlsx.Fields, True),
-            get=False,
-            set=False,
-            item=False,
-        ),
+        include_uuid_in_item=include_uuid_in_item,
     )
 
-    epcpm.sunspectotablesc.export(
-        c_path=paths.sunspec_tables_c,
-        h_path=paths.sunspec_tables_c.with_suffix(".h"),
-        sunspec_model=project.models.sunspec,
-        skip_sunspec=skip_sunspec,
-    )
+    up_to_date = []
 
-    epcpm.parameterstosil.export(
-        c_path=paths.sil_c,
-        h_path=paths.sil_c.with_suffix(".h"),
-        parameters_model=project.models.parameters,
-    )
+    if incremental:
+        manifest = epcpm.exportmanifest.Manifest.load(
+            pathlib.Path(target_directory) / epcpm.exportmanifest.default_name,
+        )
+        fingerprints = epcpm.exportmanifest.Fingerprints(models=project.models)
 
-    epcpm.sunspectobitfieldsc.export(
-        c_path=paths.sunspec_bitfields_c,
-        h_path=paths.sunspec_bitfields_c.with_suffix(".h"),
-        sunspec_model=project.models.sunspec,
-        include_uuid_in_item=include_uuid_in_item,
+        input_digests = {
+            generator.name: fingerprints.inputs_digest(
+                inputs=generator.inputs,
+                options=generator.options,
+                templates=generator.templates,
+            )
+            for generator in generators
+            if generator.inputs is not None
+        }
+
+        stale = []
+        for generator in generators:
+            digest = input_digests.get(generator.name)
+            if digest is not None and manifest.up_to_date(
+                name=generator.name,
+                inputs=digest,
+                outputs=generator.outputs,
+            ):
+                up_to_date.append(generator.name)
+            else:
+                stale.append(generator)
+
+        generators = stale
+
+    if len(generators) > 0:
+        # regenerate stale tables here since the generators may run concurrently
+        project.models.ensure_updated()
+
+    timings = run_generators(
+        generators=generators,
+        jobs=jobs,
+        progress=progress,
+        canceled=canceled,
     )
 
-    if first_time and not skip_sunspec:
-        epcpm.sunspectomanualc.export(
-            path=paths.sunspec_c,
-            sunspec_model=project.models.sunspec,
+    # checked before recording so the canceled generators get run by the
+    # next incremental export
+    if canceled is not None and canceled():
+        raise ExportCanceled()
+
+    if not incremental:
+        manifest = None
+    else:
+        for generator in generators:
+            digest = input_digests.get(generator.name)
+            if digest is not None:
+                manifest.record(
+                    name=generator.name,
+                    inputs=digest,
+                    outputs=generator.outputs,
+                )
+
+        manifest.save()
+
+    # the scripts track their own inputs so they are also run when an earlier
+    # export left them stale
+    try:
+        scripts = run_generation_scripts(
+            target_directory,
+            skip_sunspec=skip_sunspec,
+            manifest=manifest,
         )
+    finally:
+        if manifest is not None:
+            manifest.save()
+
+    return ExportReport(timings=timings, up_to_date=up_to_date, scripts=scripts)
+
+
+@attr.s(frozen=True)
+class GenerationScript:
+    name = attr.ib()
+    command = attr.ib()
+    # the files whose content decides whether the script needs to run again
+    inputs = attr.ib()
+    # files or directories of files written by the script, rerun when they
+    # are missing or were changed since
+    outputs = attr.ib(default=())
+
+
+@attr.s(frozen=True)
+class ScriptResult:
+    name = attr.ib()
+    # None when the script was skipped since its inputs were unchanged
+    returncode = attr.ib()
+    seconds = attr.ib(default=0)
+    output = attr.ib(default="")
+
+    @property
+    def skipped(self):
+        return self.returncode is None
 
-        epcpm.sunspectomanualh.export(
-            path=paths.sunspec_c,
-            sunspec_model=project.models.sunspec,
+    @property
+    def failed(self):
+        return not self.skipped and self.returncode != 0
+
+
+class GenerationScriptsFailed(Exception):
+    def __init__(self, results):
+        self.results = results
+
+        statuses = ", ".join(
+            f"{result.name}: {result.returncode}" for result in results
+        )
+        outputs = "".join(
+            f"\n\n{result.name}:\n{result.output}"
+            for result in results
+            if result.failed
         )
 
-    run_generation_scripts(target_directory, skip_sunspec=skip_sunspec)
+        super().__init__(f"Generation scripts failed ({statuses}){outputs}")
 
 
-def run_generation_scripts(base_path, skip_sunspec=False):
+def generation_scripts(base_path):
     scripts = base_path / "venv" / "Scripts"
     interface = base_path / "interface"
+    emb_lib = base_path / "embedded-library"
 
-    subprocess.run(
-        [
-            os.fspath(scripts / "generatestripcollect"),
-            os.fspath(interface / "EPC_DG_ID247_FACTORY.sym"),
-            "-o",
-            os.fspath(interface / "EPC_DG_ID247.sym"),
-            "--hierarchy",
-            os.fspath(interface / "EPC_DG_ID247_FACTORY.parameters.json"),
-            "--hierarchy-out",
-            os.fspath(interface / "EPC_DG_ID247.parameters.json"),
-            "--device-file",
-            os.fspath(interface / "devices.json"),
-            "--output-directory",
-            os.fspath(interface / "devices"),
-        ],
-        check=True,
+    factory_sym = interface / "EPC_DG_ID247_FACTORY.sym"
+    factory_hierarchy = interface / "EPC_DG_ID247_FACTORY.parameters.json"
+    devices = interface / "devices.json"
+    spreadsheet = emb_lib / "MODBUS_SunSpec-EPC.xlsx"
+
+    sym = interface / "EPC_DG_ID247.sym"
+    hierarchy = interface / "EPC_DG_ID247.parameters.json"
+    devices_directory = interface / "devices"
+
+    return [
+        GenerationScript(
+            name="generatestripcollect",
+            command=[
+                os.fspath(scripts / "generatestripcollect"),
+                os.fspath(factory_sym),
+                "-o",
+                os.fspath(sym),
+                "--hierarchy",
+                os.fspath(factory_hierarchy),
+                "--hierarchy-out",
+                os.fspath(hierarchy),
+                "--device-file",
+                os.fspath(devices),
+                "--output-directory",
+                os.fspath(devices_directory),
+            ],
+            inputs=(factory_sym, factory_hierarchy, devices),
+            outputs=(sym, hierarchy, devices_directory),
+        ),
+        GenerationScript(
+            name="sunspecparser",
+            command=[
+                os.fspath(scripts / "sunspecparser"),
+                os.fspath(spreadsheet),
+            ],
+            inputs=(spreadsheet,),
+            outputs=(emb_lib / "python" / "embeddedlibrary" / "tables.py",),
+        ),
+    ]
+
+
+def run_generation_script(script):
+    start = time.monotonic()
+    completed = subprocess.run(
+        script.command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
     )
+    end = time.monotonic()
 
-    emb_lib = base_path / "embedded-library"
-    subprocess.run(
-        [
-            os.fspath(scripts / "sunspecparser"),
-            os.fspath(emb_lib / "MODBUS_SunSpec-EPC.xlsx"),
-        ],
-        check=True,
+    return ScriptResult(
+        name=script.name,
+        returncode=completed.returncode,
+        seconds=end - start,
+        output=completed.stdout.decode("utf-8", errors="replace"),
     )
 
 
+def output_files(script):
+    for path in script.outputs:
+        if path.is_dir():
+            yield from sorted(child for child in path.rglob("*") if child.is_file())
+        else:
+            yield path
+
+
+def run_generation_scripts(base_path, skip_sunspec=False, manifest=None):
+    """Run the independent generation scripts concurrently.  When a manifest
+    is given, scripts whose inputs hash the same as at their last successful
+    run and whose outputs are all present and unchanged are skipped, and the
+    successful runs are recorded in it.  The results are returned once every
+    script finished and if any failed they are all reported together.
+    """
+    scripts = generation_scripts(base_path=base_path)
+
+    input_digests = {
+        script.name: epcpm.exportmanifest.digest(
+            {
+                path.name: epcpm.exportmanifest.file_digest(path)
+                for path in script.inputs
+            }
+        )
+        for script in scripts
+    }
+
+    def name(script):
+        return f"script:{script.name}"
+
+    def up_to_date(script):
+        if manifest is None:
+            return False
+
+        if not all(path.exists() for path in script.outputs):
+            return False
+
+        return manifest.up_to_date(
+            name=name(script),
+            inputs=input_digests[script.name],
+            outputs=list(output_files(script)),
+        )
+
+    stale = [script for script in scripts if not up_to_date(script)]
+
+    results = {
+        script.name: ScriptResult(name=script.name, returncode=None)
+        for script in scripts
+    }
+
+    if len(stale) > 0:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(stale)) as executor:
+            for result in executor.map(run_generation_script, stale):
+                results[result.name] = result
+
+    results = [results[script.name] for script in scripts]
+
+    if manifest is not None:
+        for script, result in zip(scripts, results):
+            if result.returncode == 0:
+                manifest.record(
+                    name=name(script),
+                    inputs=input_digests[script.name],
+                    outputs=list(output_files(script)),
+                )
+
+    if any(result.failed for result in results):
+        raise GenerationScriptsFailed(results=results)
+
+    return results
+
+
 def modification_time_or(path, alternative):
     try:
         return path.stat().st_mtime
@@ -17,8 +17,11 @@ import epyqlib.pm.parametermodel
 import epyqlib.pm.valuesetmodel
 import epyqlib.utils.qt
 
+import epcpm.attrsmodel
+import epcpm.background
 import epcpm.canmodel
 import epcpm.cantosym
+import epcpm.check
 import epcpm.importexport
 import epcpm.importexportdialog
 import epcpm.parameterstoc
@@ -49,6 +52,23 @@ class ModelView:
     selection = attr.ib(default=None)
 
 
+class CloseBlocker(QtCore.QObject):
+    blocked = QtCore.pyqtSignal()
+
+    def __init__(self, blocking):
+        super().__init__()
+
+        self.blocking = blocking
+
+    def eventFilter(self, _, event):
+        if event.type() == QtCore.QEvent.Close and self.blocking():
+            event.ignore()
+            self.blocked.emit()
+            return True
+
+        return False
+
+
 class Window:
     def __init__(self, title, icon_path):
         logging.debug("Working directory: {}".format(os.getcwd()))
@@ -139,6 +159,18 @@ class Window:
         self.value_set = None
         self.check_result = None
 
+        self.thread_pool = QtCore.QThreadPool()
+        self.tasks = set()
+
+        # saves still writing, the window is closed once they are done
+        self.saving = 0
+        self.close_when_saved = False
+        self.close_blocker = CloseBlocker(blocking=lambda: self.saving > 0)
+        self.close_blocker.blocked.connect(self.close_blocked)
+        self.main_window.installEventFilter(self.close_blocker)
+
+        self.checker = epcpm.check.Checker()
+
         self.set_title()
 
         search_boxes = (
@@ -248,19 +280,19 @@ class Window:
 
         project = epcpm.project.Project()
 
-        project.models.parameters = epyqlib.attrsmodel.Model(
+        project.models.parameters = epcpm.attrsmodel.Model(
             root=parameters_root,
             columns=epyqlib.pm.parametermodel.columns,
         )
-        project.models.can = epyqlib.attrsmodel.Model(
+        project.models.can = epcpm.attrsmodel.Model(
             root=can_root,
             columns=epcpm.canmodel.columns,
         )
-        project.models.sunspec = epyqlib.attrsmodel.Model(
+        project.models.sunspec = epcpm.attrsmodel.Model(
             root=sunspec_root,
             columns=epcpm.sunspecmodel.columns,
         )
-        project.models.static_modbus = epyqlib.attrsmodel.Model(
+        project.models.static_modbus = epcpm.attrsmodel.Model(
             root=static_modbus_root,
             columns=epcpm.staticmodbusmodel.columns,
         )
@@ -323,20 +355,93 @@ class Window:
             return
 
         paths = dialog.paths_result
+        target_directory = dialog.directory
+        snapshot = self.project.snapshot()
+
+        def export(progress, canceled):
+            return epcpm.importexport.full_export(
+                project=snapshot.build(),
+                paths=paths,
+                target_directory=target_directory,
+                first_time=first_time,
+                include_uuid_in_item=True,
+                progress=progress,
+                canceled=canceled,
+            )
 
-        epcpm.importexport.full_export(
-            project=self.project,
-            paths=paths,
-            target_directory=dialog.directory,
-            first_time=first_time,
-            include_uuid_in_item=True,
-        )
+        def finished(report):
+            QtWidgets.QMessageBox.information(
+                self.main_window,
+                "Export Complete",
+                f"Export complete, {len(report.changed)} files changed.",
+            )
 
-        QtWidgets.QMessageBox.information(
-            self.main_window,
-            "Export Complete",
-            "Export complete.",
-        )
+        self.run_in_background(
+            title="Exporting",
+            function=export,
+            finished=finished,
+            cancel_exceptions=(epcpm.importexport.ExportCanceled,),
+        )
+
+    def run_in_background(
+        self,
+        title,
+        function,
+        finished,
+        failed=None,
+        cancellable=True,
+        cancel_exceptions=(),
+    ):
+        task = epcpm.background.Task(
+            function=function,
+            cancel_exceptions=(epcpm.background.Canceled, *cancel_exceptions),
+        )
+
+        # not modal so the project can still be browsed while the task runs
+        progress = epyqlib.utils.qt.progress_dialog(
+            parent=self.main_window,
+            cancellable=cancellable,
+        )
+        progress.setWindowModality(QtCore.Qt.NonModal)
+        progress.setWindowTitle(title)
+        progress.setLabelText(f"{title}...")
+        progress.canceled.connect(task.cancel)
+
+        def progressed(done, total, label):
+            progress.setMaximum(total)
+            progress.setValue(done)
+            progress.setLabelText(f"{title}: {label}")
+
+        def done():
+            self.tasks.discard(task)
+            progress.close()
+
+        def task_finished(result):
+            done()
+            finished(result)
+
+        def task_failed(message):
+            done()
+            epyqlib.utils.qt.dialog(
+                parent=self.main_window,
+                message=message,
+                title=f"{title} Failed",
+                icon=QtWidgets.QMessageBox.Critical,
+            )
+
+            if failed is not None:
+                failed()
+
+        task.signals.progressed.connect(progressed)
+        task.signals.finished.connect(task_finished)
+        task.signals.failed.connect(task_failed)
+        task.signals.canceled.connect(done)
+
+        self.tasks.add(task)
+        progress.show()
+        self.thread_pool.start(task)
+
+        return task
 
     def open_project(self, filename=None, project=None):
         if project is not None:
@@ -345,7 +450,7 @@ class Window:
             if filename is None:
                 self.project = epcpm.project.create_blank()
             else:
-                self.project = epcpm.project.loadp(filename)
+                self.project = epcpm.project.loadp(filename, jobs=os.cpu_count())
 
         model_views = epcpm.project.Models()
 
@@ -384,14 +489,14 @@ class Window:
             view.setAcceptDrops(True)
 
             if model is None:
-                model_view.model = epyqlib.attrsmodel.Model(
+                model_view.model = epcpm.attrsmodel.Model(
                     root=model_view.root_factory(),
                     columns=model_view.columns,
                 )
             else:
                 model_view.model = model
 
-            model.update_nodes()
+            model_view.model.ensure_updated()
 
             self.set_model(name=name, view_model=model_view)
             view.collapseAll()
@@ -417,10 +522,41 @@ class Window:
         self.uuid_notifiers["sunspec"].set_view(self.ui.sunspec_view)
         self.uuid_notifiers["check_result"].set_view(self.ui.check_result_view)
 
+        self.checker.watch(self.project.models)
+
         return
 
     def save_project(self):
-        self.project.save(parent=self.main_window)
+        self.project.choose_paths(parent=self.main_window)
+        snapshot = self.project.snapshot()
+
+        def save(progress, canceled):
+            snapshot.build().write(progress=progress)
+
+        def saved(_):
+            self.saving -= 1
+            if self.close_when_saved and self.saving == 0:
+                self.main_window.close()
+
+        def failed():
+            self.saving -= 1
+            # leave the window open so the save can be retried
+            self.close_when_saved = False
+
+        self.saving += 1
+
+        # a partially written project is worse than waiting so saving can't
+        # be canceled
+        self.run_in_background(
+            title="Saving",
+            function=save,
+            finished=saved,
+            failed=failed,
+            cancellable=False,
+        )
+
+    def close_blocked(self):
+        self.close_when_saved = True
 
     def save_as_project(self):
         project = attr.evolve(self.project)
@@ -429,8 +565,9 @@ class Window:
         #       original project is referencing
         project.paths.set_all(None)
 
-        project.save(parent=self.main_window)
+        project.choose_paths(parent=self.main_window)
         self.project = project
+        self.save_project()
 
     def new_value_set(self):
         parameters = self.view_models.get("parameters")
@@ -540,18 +677,32 @@ class Window:
         self.value_set = value_set
 
     def check(self):
-        root = epyqlib.checkresultmodel.Root()
-
-        for name, model in self.project.models.items():
-            node = epyqlib.checkresultmodel.Node.build(
-                name=name,
-                node=model.root,
-            )
-            model.root.check_and_append(
-                parent=node,
-                models=self.project.models,
+        # read along with the snapshot so that edits made before the worker
+        # starts keep its results out of the cache
+        version = self.checker.version
+        snapshot = self.project.snapshot()
+
+        def check(progress, canceled):
+            return self.checker.check(
+                models=snapshot.build().models,
+                version=version,
+                jobs=os.cpu_count(),
+                progress=progress,
+                canceled=canceled,
             )
-            root.append_child(node)
+
+        def finished(report):
+            if report is not None:
+                self.show_check_report(report)
+
+        self.run_in_background(
+            title="Checking",
+            function=check,
+            finished=finished,
+        )
+
+    def show_check_report(self, report):
+        root = epcpm.check.result_root(report=report, models=self.project.models)
 
         # self.check_view = QtWidgets.QTreeView()
         # self.check_model = epyqlib.attrsmodel.Model(
@@ -702,23 +853,34 @@ class Window:
         )
 
     def generate_symbol_file(self):
-        finder = self.view_models["can"].model.node_from_uuid
-        access_levels = self.project.models.parameters.list_selection_roots[
-            "access level"
-        ]
-        builder = epcpm.cantosym.builders.wrap(
-            wrapped=self.view_models["can"].model.root,
-            access_levels=access_levels,
-            parameter_uuid_finder=finder,
-            parameter_model=self.view_models["parameters"].model,
-        )
+        snapshot = self.project.snapshot()
+
+        def generate(progress, canceled):
+            project = snapshot.build()
+            builder = epcpm.cantosym.builders.wrap(
+                wrapped=project.models.can.root,
+                access_levels=project.models.parameters.list_selection_roots[
+                    "access level"
+                ],
+                parameter_uuid_finder=project.models.can.node_from_uuid,
+                parameter_model=project.models.parameters,
+            )
 
-        epyqlib.utils.qt.dialog(
-            parent=self.main_window,
-            message=builder.gen(),
-            modal=False,
-            save_filters=(("CAN Symbols", ["sym"]), ("All Files", ["*"])),
-            save_caption="Save CAN Symbols",
+            return builder.gen()
+
+        def finished(symbols):
+            epyqlib.utils.qt.dialog(
+                parent=self.main_window,
+                message=symbols,
+                modal=False,
+                save_filters=(("CAN Symbols", ["sym"]), ("All Files", ["*"])),
+                save_caption="Save CAN Symbols",
+            )
+
+        self.run_in_background(
+            title="Generating symbol file",
+            function=generate,
+            finished=finished,
         )
 
     def selection_changed(self, selected, deselected):
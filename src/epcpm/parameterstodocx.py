@@ -1,3 +1,4 @@
+import copy
 import itertools
 
 import attr
@@ -7,7 +8,6 @@ import docx.enum.text
 
 import epyqlib.cangenmanual
 import epyqlib.pm.parametermodel
-import epyqlib.treenode
 import epyqlib.utils.general
 
 builders = epyqlib.utils.general.TypeMap()
@@ -41,6 +41,117 @@ class Row:
         )
 
 
+@attr.s(frozen=True)
+class Index:
+    signals = attr.ib()
+    access_levels = attr.ib()
+    enumeration_names = attr.ib()
+
+    @classmethod
+    def build(cls, parameter_root, can_root):
+        signals = {
+            parameter_uuid: list(nodes)[-1]
+            for parameter_uuid, nodes in can_root.model.parameter_uuid_to_nodes.items()
+        }
+
+        access_levels = {}
+        enumeration_names = {}
+
+        def visit(node, _):
+            if isinstance(node, epyqlib.pm.parametermodel.AccessLevel):
+                access_levels[node.uuid] = node
+            elif isinstance(
+                node,
+                (
+                    epyqlib.pm.parametermodel.Enumeration,
+                    epyqlib.pm.parametermodel.AccessLevels,
+                ),
+            ):
+                enumeration_names[node.uuid] = node.name
+
+        parameter_root.traverse(call_this=visit, internal_nodes=True)
+
+        return cls(
+            signals=signals,
+            access_levels=access_levels,
+            enumeration_names=enumeration_names,
+        )
+
+
+def set_cell_text(tc, text):
+    """Set the text of the table cell element to a single run in its first
+    paragraph, the way python-docx's cell text setter leaves it.
+    """
+    p, *extra_paragraphs = tc.p_lst
+    for extra in extra_paragraphs:
+        tc.remove(extra)
+
+    runs = p.r_lst
+    if len(runs) == 0:
+        r = p.add_r()
+    else:
+        r, *extra_runs = runs
+        for extra in extra_runs:
+            p.remove(extra)
+
+    r.text = text
+
+
+def fill_table(doc_table, table, headings, rows, max_indent):
+    """Fill the docx table with the headings and rows.  Adding thousands of
+    rows through python-docx is slow so it only formats a sample row for
+    each indent and shading, which are then copied for the actual rows.
+    """
+    samples = [
+        Row(name="", indent=indent) for indent in range(max_indent) for _ in range(2)
+    ]
+
+    sample_table = attr.evolve(
+        table,
+        rows=[sample.to_tuple(max_indent=max_indent) for sample in samples],
+    )
+    sample_table.fill_docx(doc_table)
+
+    # an optional title and comment row precede the headings
+    header_rows = len(doc_table.rows) - len(samples)
+
+    epyqlib.cangenmanual.set_repeat_table_header(doc_table.rows[0])
+    epyqlib.cangenmanual.prevent_row_breaks(doc_table)
+
+    for row, doc_row in zip(
+        itertools.chain((headings,), samples),
+        doc_table.rows[header_rows - 1 :],
+    ):
+        base_cell = doc_row.cells[row.indent]
+        base_cell.merge(doc_row.cells[max_indent - 1])
+
+    for row in doc_table.rows:
+        for cell in row.cells:
+            cell.text = cell.text.strip()
+            cell.paragraphs[
+                0
+            ].paragraph_format.line_spacing_rule = docx.enum.text.WD_LINE_SPACING.SINGLE
+
+    tbl = doc_table._tbl
+    templates = {}
+    for index, (sample, tr) in enumerate(zip(samples, tbl.tr_lst[header_rows:])):
+        # the shading alternates by row so keep a sample of each
+        templates[sample.indent, index % 2] = tr
+        tbl.remove(tr)
+
+    for index, row in enumerate(rows):
+        tr = copy.deepcopy(templates[row.indent, index % 2])
+
+        texts = row.to_tuple(max_indent=max_indent)
+        # the name cell is merged across the remaining indentation
+        texts = (*texts[: row.indent + 1], *texts[max_indent:])
+
+        for tc, text in zip(tr.tc_lst, texts):
+            set_cell_text(tc=tc, text=str(text).strip())
+
+        tbl.append(tr)
+
+
 @builders(epyqlib.pm.parametermodel.Root)
 @attr.s
 class Root:
@@ -90,6 +201,8 @@ class Root:
 
         start = time.monotonic()
 
+        index = Index.build(parameter_root=self.wrapped, can_root=self.can_root)
+
         for child in self.wrapped.children:
             if child.name.endswith("Other"):
                 continue
@@ -97,8 +210,7 @@ class Root:
             try:
                 builder = builders.wrap(
                     wrapped=child,
-                    parameter_root=self.wrapped,
-                    can_root=self.can_root,
+                    index=index,
                     access_level=self.access_level,
                 )
             except KeyError:
@@ -111,15 +223,6 @@ class Root:
         start = now
         print("rows built", int(delta))
 
-        raw_rows = table.rows
-
-        table.rows = tuple(row.to_tuple(max_indent=max_indent) for row in table.rows)
-
-        now = time.monotonic()
-        delta = now - start
-        start = now
-        print("rows converted", int(delta))
-
         if self.template is not None:
             doc = docx.Document(self.template)
         else:
@@ -128,23 +231,13 @@ class Root:
         doc_table = doc.add_table(rows=0, cols=len(table.headings))
         doc_table.autofit = False
 
-        table.fill_docx(doc_table)
-
-        epyqlib.cangenmanual.set_repeat_table_header(doc_table.rows[0])
-        epyqlib.cangenmanual.prevent_row_breaks(doc_table)
-
-        for row, doc_row in zip(itertools.chain((headings,), raw_rows), doc_table.rows):
-            base_cell = doc_row.cells[row.indent]
-            base_cell.merge(doc_row.cells[max_indent - 1])
-
-        for row in doc_table.rows:
-            for cell in row.cells:
-                cell.text = cell.text.strip()
-                cell.paragraphs[
-                    0
-                ].paragraph_format.line_spacing_rule = (
-                    docx.enum.text.WD_LINE_SPACING.SINGLE
-                )
+        fill_table(
+            doc_table=doc_table,
+            table=table,
+            headings=headings,
+            rows=table.rows,
+            max_indent=max_indent,
+        )
 
         now = time.monotonic()
         delta = now - start
@@ -161,8 +254,7 @@ class Root:
 @attr.s
 class Group:
     wrapped = attr.ib()
-    parameter_root = attr.ib()
-    can_root = attr.ib()
+    index = attr.ib()
     access_level = attr.ib()
 
     def gen(self, indent):
@@ -176,8 +268,7 @@ class Group:
         for child in self.wrapped.children:
             builder = builders.wrap(
                 wrapped=child,
-                parameter_root=self.parameter_root,
-                can_root=self.can_root,
+                index=self.index,
                 access_level=self.access_level,
             )
             rows.extend(builder.gen(indent=indent + 1))
@@ -189,27 +280,17 @@ class Group:
 @attr.s
 class Parameter:
     wrapped = attr.ib()
-    parameter_root = attr.ib()
-    can_root = attr.ib()
+    index = attr.ib()
     access_level = attr.ib()
 
     def gen(self, indent):
-        try:
-            access_level = self.parameter_root.nodes_by_attribute(
-                attribute_value=self.wrapped.access_level_uuid,
-                attribute_name="uuid",
-            ).pop()
-        except epyqlib.treenode.NotFoundError:
-            pass
-        else:
+        access_level = self.index.access_levels.get(self.wrapped.access_level_uuid)
+        if access_level is not None:
             if access_level.value > self.access_level.value:
                 print("skipping", self.wrapped.name)
                 return []
 
-        signal = self.can_root.nodes_by_attribute(
-            attribute_value=self.wrapped.uuid,
-            attribute_name="parameter_uuid",
-        ).pop()
+        signal = self.index.signals[self.wrapped.uuid]
 
         factor = signal.factor
         if factor is None or factor == 1:
@@ -219,17 +300,10 @@ class Parameter:
         if units is None:
             units = ""
 
-        try:
-            enumeration = (
-                self.parameter_root.nodes_by_attribute(
-                    attribute_value=self.wrapped.enumeration_uuid,
-                    attribute_name="uuid",
-                )
-                .pop()
-                .name
-            )
-        except epyqlib.treenode.NotFoundError:
-            enumeration = ""
+        enumeration = self.index.enumeration_names.get(
+            self.wrapped.enumeration_uuid,
+            "",
+        )
 
         default = self.wrapped.default
         if default is None:
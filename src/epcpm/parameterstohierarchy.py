@@ -5,7 +5,9 @@ import attr
 import epyqlib.pm.parametermodel
 import epyqlib.utils.general
 
+import epcpm.artifacts
 import epcpm.cantosym
+import epcpm.exportcontext
 
 builders = epyqlib.utils.general.TypeMap()
 
@@ -13,15 +15,23 @@ builders = epyqlib.utils.general.TypeMap()
 dehumanize_name = epcpm.cantosym.dehumanize_name
 
 
-def export(path, can_model, parameters_model):
+def export(path, can_model, parameters_model, context=None):
+    parameters_model.ensure_updated()
+    can_model.ensure_updated()
+
     builder = epcpm.parameterstohierarchy.builders.wrap(
         wrapped=parameters_model.root,
         can_root=can_model.root,
+        context=context,
     )
 
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", newline="\n") as f:
-        f.write(builder.gen(indent=4))
+    changed = epcpm.artifacts.write_text_if_changed(
+        path=path,
+        text=builder.gen(indent=4),
+    )
+
+    return [path] if changed else []
 
 
 @builders(epyqlib.pm.parametermodel.Root)
@@ -29,6 +39,7 @@ def export(path, can_model, parameters_model):
 class Root:
     wrapped = attr.ib()
     can_root = attr.ib()
+    context = attr.ib(default=None)
 
     def gen(self, json_output=True, **kwargs):
         parameters = next(
@@ -54,9 +65,15 @@ class Root:
 
             return True
 
-        can_nodes_with_parameter_uuid = self.can_root.nodes_by_filter(
-            filter=can_node_wanted,
-        )
+        context = self.context
+        if context is None:
+            context = epcpm.exportcontext.ExportContext(can_root=self.can_root)
+
+        can_nodes_with_parameter_uuid = [
+            node
+            for node in context.can_nodes_with_parameter_uuid
+            if can_node_wanted(node)
+        ]
 
         parameter_uuid_to_can_node = {
             node.parameter_uuid: node for node in can_nodes_with_parameter_uuid
@@ -13,6 +13,7 @@ import epyqlib.pm.parametermodel
 import epyqlib.utils.general
 
 import epcpm.cantosym
+import epcpm.exportcontext
 import epcpm.sunspecmodel
 import epcpm.sunspectoxlsx
 
@@ -58,7 +59,12 @@ def export(
     sunspec_model,
     skip_sunspec=False,
     include_uuid_in_item=False,
+    context=None,
 ):
+    parameters_model.ensure_updated()
+    can_model.ensure_updated()
+    sunspec_model.ensure_updated()
+
     if skip_sunspec:
         sunspec_root = None
     else:
@@ -69,6 +75,7 @@ def export(
         can_root=can_model.root,
         sunspec_root=sunspec_root,
         include_uuid_in_item=include_uuid_in_item,
+        context=context,
     )
 
     c_path.parent.mkdir(parents=True, exist_ok=True)
@@ -86,17 +93,15 @@ def export(
         "declarations": epcpm.c.format_nested_lists(built_h).strip(),
     }
 
-    epcpm.c.render(
-        source=c_path.with_suffix(f"{c_path.suffix}_pm"),
-        destination=c_path,
-        context=template_context,
-    )
-
-    epcpm.c.render(
-        source=h_path.with_suffix(f"{h_path.suffix}_pm"),
-        destination=h_path,
-        context=template_context,
-    )
+    return [
+        path
+        for path in (c_path, h_path)
+        if epcpm.c.render(
+            source=path.with_suffix(f"{path.suffix}_pm"),
+            destination=path,
+            context=template_context,
+        )
+    ]
 
 
 @builders(epyqlib.pm.parametermodel.Root)
@@ -106,8 +111,17 @@ class Root:
     can_root = attr.ib()
     sunspec_root = attr.ib()
     include_uuid_in_item = attr.ib()
+    context = attr.ib(default=None)
 
     def gen(self):
+        context = self.context
+        if context is None:
+            context = epcpm.exportcontext.ExportContext(
+                parameters_root=self.wrapped,
+                can_root=self.can_root,
+                sunspec_root=self.sunspec_root,
+            )
+
         def can_node_wanted(node):
             if getattr(node, "parameter_uuid", None) is None:
                 return False
@@ -120,37 +134,23 @@ class Root:
             ]
             return not any(ancestor.uuid in uuids for ancestor in node.ancestors())
 
-        can_nodes_with_parameter_uuid = self.can_root.nodes_by_filter(
-            filter=can_node_wanted,
-        )
+        can_nodes_with_parameter_uuid = [
+            node
+            for node in context.can_nodes_with_parameter_uuid
+            if can_node_wanted(node)
+        ]
 
         parameter_uuid_to_can_node = {
             node.parameter_uuid: node for node in can_nodes_with_parameter_uuid
         }
 
-        def sunspec_node_wanted(node):
-            if getattr(node, "parameter_uuid", None) is None:
-                return False
-
-            wanted_types = (
-                epcpm.sunspecmodel.DataPoint,
-                epcpm.sunspecmodel.DataPointBitfieldMember,
-            )
-            if not isinstance(node, wanted_types):
-                return False
-
-            return True
-
         if self.sunspec_root is None:
-            parameter_uuid_to_sunspec_node = {}
+            sunspec_index = epcpm.exportcontext.SunspecIndex()
         else:
-            sunspec_nodes_with_parameter_uuid = self.sunspec_root.nodes_by_filter(
-                filter=sunspec_node_wanted,
-            )
+            sunspec_index = context.sunspec_index
 
-            parameter_uuid_to_sunspec_node = {
-                node.parameter_uuid: node for node in sunspec_nodes_with_parameter_uuid
-            }
+        parameter_uuid_to_sunspec_node = sunspec_index.parameter_uuid_to_node
+        table_element_finder = context.table_element_finder()
 
         lengths_equal = len(can_nodes_with_parameter_uuid) == len(
             parameter_uuid_to_can_node
@@ -184,6 +184,8 @@ class Root:
                 parameter_uuid_to_can_node=parameter_uuid_to_can_node,
                 parameter_uuid_to_sunspec_node=(parameter_uuid_to_sunspec_node),
                 parameter_uuid_finder=self.wrapped.model.node_from_uuid,
+                sunspec_index=sunspec_index,
+                table_element_finder=table_element_finder,
             ).gen()
 
             c.extend(c_built)
@@ -225,6 +227,8 @@ class Group:
     parameter_uuid_to_can_node = attr.ib()
     parameter_uuid_to_sunspec_node = attr.ib()
     parameter_uuid_finder = attr.ib()
+    sunspec_index = attr.ib()
+    table_element_finder = attr.ib()
 
     def gen(self):
         c = []
@@ -251,6 +255,8 @@ class Group:
                 parameter_uuid_to_can_node=(self.parameter_uuid_to_can_node),
                 parameter_uuid_to_sunspec_node=(self.parameter_uuid_to_sunspec_node),
                 parameter_uuid_finder=self.parameter_uuid_finder,
+                sunspec_index=self.sunspec_index,
+                table_element_finder=self.table_element_finder,
             ).gen()
 
             c.extend(c_built)
@@ -329,6 +335,8 @@ class Parameter:
     parameter_uuid_to_can_node = attr.ib()
     parameter_uuid_to_sunspec_node = attr.ib()
     parameter_uuid_finder = attr.ib()
+    sunspec_index = attr.ib()
+    table_element_finder = attr.ib()
 
     def gen(self):
         parameter = self.wrapped
@@ -824,6 +832,8 @@ class TableBaseStructures:
     parameter_uuid_to_sunspec_node = attr.ib()
     parameter_uuid_finder = attr.ib()
     include_uuid_in_item = attr.ib()
+    sunspec_index = attr.ib()
+    table_element_finder = attr.ib()
     common_structure_names = attr.ib(factory=dict)
     c_code = attr.ib(factory=list)
     h_code = attr.ib(factory=list)
@@ -984,6 +994,7 @@ class TableBaseStructures:
             node_in_model = get_sunspec_point_from_table_element(
                 sunspec_point=sunspec_point,
                 table_element=table_element,
+                sunspec_index=self.sunspec_index,
             )
 
             if node_in_model is not None:
@@ -1113,7 +1124,7 @@ class TableBaseStructures:
 
 
 # TODO: CAMPid 3078980986754174316996743174316967431
-def get_sunspec_point_from_table_element(sunspec_point, table_element):
+def get_sunspec_point_from_table_element(sunspec_point, table_element, sunspec_index):
     value = table_element.original
 
     if isinstance(value, epyqlib.pm.parametermodel.ArrayParameterElement):
@@ -1121,18 +1132,7 @@ def get_sunspec_point_from_table_element(sunspec_point, table_element):
 
     value = value.uuid
 
-    nodes_in_model = [
-        node
-        for node in sunspec_point.find_root().nodes_by_attribute(
-            attribute_value=value,
-            attribute_name="parameter_uuid",
-            raise_=False,
-        )
-        if isinstance(
-            node,
-            epcpm.sunspecmodel.TableRepeatingBlockReferenceDataPointReference,
-        )
-    ]
+    nodes_in_model = sunspec_index.table_point_references.get(value, [])
 
     for node in nodes_in_model:
         for child in node.tree_parent.original.children:
@@ -1149,16 +1149,12 @@ def get_sunspec_point_from_table_element(sunspec_point, table_element):
 
 
 # TODO: CAMPid 3078980986754174316996743174316967431
-def get_sunspec_model_from_table_group_element(sunspec_point, table_element):
-    nodes_in_model = [
-        node
-        for node in sunspec_point.find_root().nodes_by_attribute(
-            attribute_value=table_element.uuid,
-            attribute_name="parameter_uuid",
-            raise_=False,
-        )
-        if isinstance(node, epcpm.sunspecmodel.DataPoint)
-    ]
+def get_sunspec_model_from_table_group_element(
+    sunspec_point,
+    table_element,
+    sunspec_index,
+):
+    nodes_in_model = sunspec_index.data_points.get(table_element.uuid, [])
 
     for node in nodes_in_model:
         for child in node.tree_parent.children:
@@ -1172,15 +1168,10 @@ def get_sunspec_model_from_table_group_element(sunspec_point, table_element):
     else:
         return None
 
-    (model_repeating_block,) = [
-        node
-        for node in sunspec_point.find_root().nodes_by_attribute(
-            attribute_value=node_in_model.tree_parent,
-            attribute_name="original",
-            raise_=False,
-        )
-        if isinstance(node, epcpm.sunspecmodel.TableRepeatingBlockReference)
-    ]
+    (model_repeating_block,) = sunspec_index.block_references.get(
+        node_in_model.tree_parent.uuid,
+        [],
+    )
 
     return model_repeating_block.tree_parent
 
@@ -1195,6 +1186,8 @@ class Table:
     parameter_uuid_to_can_node = attr.ib()
     parameter_uuid_to_sunspec_node = attr.ib()
     parameter_uuid_finder = attr.ib()
+    sunspec_index = attr.ib()
+    table_element_finder = attr.ib()
 
     def gen(self):
         (group,) = (
@@ -1241,6 +1234,8 @@ class Table:
             parameter_uuid_to_sunspec_node=(self.parameter_uuid_to_sunspec_node),
             parameter_uuid_finder=self.parameter_uuid_finder,
             include_uuid_in_item=self.include_uuid_in_item,
+            sunspec_index=self.sunspec_index,
+            table_element_finder=self.table_element_finder,
         )
 
         item_code = builders.wrap(
@@ -1343,7 +1338,9 @@ class TableArrayElement:
         table_element = self.wrapped
         zone_node = table_element.tree_parent.tree_parent.tree_parent
         curve_node = zone_node.children[0]
-        parameter = curve_node.descendent(
+        parameter = self.table_base_structures.table_element_finder(
+            zone_node,
+            curve_node.name,
             self.wrapped.tree_parent.name,
             self.wrapped.name,
         )
@@ -37,9 +37,12 @@ class CHContents:
         self.h.append(other.h)
 
 
-def export(c_path, h_path, parameters_model):
+def export(c_path, h_path, parameters_model, context=None):
+    parameters_model.ensure_updated()
+
     builder = builders.wrap(
         wrapped=parameters_model.root,
+        context=context,
     )
 
     c_path.parent.mkdir(parents=True, exist_ok=True)
@@ -52,17 +55,15 @@ def export(c_path, h_path, parameters_model):
         "declarations": epcpm.c.format_nested_lists(built.h).rstrip(),
     }
 
-    epcpm.c.render(
-        source=c_path.with_suffix(f"{c_path.suffix}_pm"),
-        destination=c_path,
-        context=template_context,
-    )
-
-    epcpm.c.render(
-        source=h_path.with_suffix(f"{h_path.suffix}_pm"),
-        destination=h_path,
-        context=template_context,
-    )
+    return [
+        path
+        for path in (c_path, h_path)
+        if epcpm.c.render(
+            source=path.with_suffix(f"{path.suffix}_pm"),
+            destination=path,
+            context=template_context,
+        )
+    ]
 
 
 def collect_items(parameters_root):
@@ -99,12 +100,16 @@ def collect_items(parameters_root):
 @attr.s
 class Root:
     wrapped = attr.ib()
+    context = attr.ib(default=None)
 
     def gen(self):
         contents = CHContents()
         types = set()
 
-        items = collect_items(parameters_root=self.wrapped)
+        if self.context is None:
+            items = collect_items(parameters_root=self.wrapped)
+        else:
+            items = self.context.sil_items
         for index, item in enumerate(items):
             types.add(item.type)
             item_lines = item.create_initializer(index=index)
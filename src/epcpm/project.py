@@ -1,4 +1,9 @@
+import concurrent.futures
+import functools
+import json
+import os
 import pathlib
+import time
 
 import attr
 import graham
@@ -7,7 +12,10 @@ import marshmallow
 import epyqlib.pm.parametermodel
 import epyqlib.utils.qt
 
+import epcpm.artifacts
+import epcpm.attrsmodel
 import epcpm.canmodel
+import epcpm.projectcache
 import epcpm.sunspecmodel
 import epcpm.staticmodbusmodel
 
@@ -27,91 +35,195 @@ def create_blank():
     return project
 
 
-def loads(s, project_path=None, post_load=True):
+def loads(s, project_path=None, post_load=True, use_cache=False, jobs=1):
     project = graham.schema(Project).loads(s).data
 
     if project_path is not None:
         project.filename = pathlib.Path(project_path).absolute()
 
     if post_load:
-        _post_load(project)
+        _post_load(project, use_cache=use_cache, jobs=jobs)
 
     return project
 
 
-def load(f, post_load=True):
-    project = loads(f.read(), project_path=f.name, post_load=post_load)
+def load(f, post_load=True, use_cache=False, jobs=1):
+    project = loads(
+        f.read(),
+        project_path=f.name,
+        post_load=post_load,
+        use_cache=use_cache,
+        jobs=jobs,
+    )
 
     return project
 
 
-def loadp(path, post_load=True):
+def loadp(path, post_load=True, use_cache=False, jobs=1):
     with open(path) as f:
-        return load(f, post_load=post_load)
+        return load(f, post_load=post_load, use_cache=use_cache, jobs=jobs)
+
 
+def root_types():
+    return {
+        "parameters": epyqlib.pm.parametermodel.Root,
+        "can": epcpm.canmodel.Root,
+        "sunspec": epcpm.sunspecmodel.Root,
+        "staticmodbus": epcpm.staticmodbusmodel.Root,
+    }
 
-def _post_load(project):
+
+def _post_load(project, use_cache=False, jobs=1):
     models = project.models
 
+    to_read = {
+        name: path
+        for name, path in project.paths.items()
+        if models[name] is None and path is not None and len(path) > 0
+    }
+
+    cache = None
+    cached_roots = {}
+    if use_cache and project.filename is not None and len(to_read) > 0:
+        cache = epcpm.projectcache.Cache.for_project(
+            project_path=project.filename,
+            source_paths={
+                name: resolve_path(project=project, path=path)
+                for name, path in to_read.items()
+            },
+            root_types=root_types(),
+        )
+        cached_roots = cache.load()
+        if cached_roots is None:
+            cached_roots = {}
+
+    to_decode = [name for name in to_read if name not in cached_roots]
+    decoding = {}
+    if jobs > 1 and len(to_decode) > 1:
+        # the files are decoded and deserialized in other processes while
+        # the nodes backing the models are built on this thread from the
+        # records they return
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(jobs, len(to_decode)),
+        )
+        decoding = {
+            name: executor.submit(
+                decode_model,
+                path=resolve_path(project=project, path=to_read[name]),
+                name=name,
+            )
+            for name in to_decode
+        }
+        executor.shutdown(wait=False)
+
+    def load(name, **kwargs):
+        start = time.monotonic()
+
+        root = cached_roots.get(name)
+        if root is not None:
+            model = epcpm.attrsmodel.Model(root=root, **kwargs)
+            end = time.monotonic()
+
+            project.load_timings[name] = ModelLoadTiming(
+                decode=None,
+                deserialize=end - start,
+            )
+
+            return model
+
+        future = decoding.get(name)
+        if future is not None:
+            decoded = future.result()
+
+            start = time.monotonic()
+            (root,) = epcpm.projectcache.inflate(
+                root_indexes=decoded.root_indexes,
+                records=decoded.records,
+                root_types=root_types(),
+            ).values()
+            model = model_from_root(root=root, **kwargs)
+            end = time.monotonic()
+
+            project.load_timings[name] = ModelLoadTiming(
+                decode=decoded.decode,
+                deserialize=decoded.deserialize + end - start,
+            )
+
+            return model
+
+        data, decode_time = read_model(project=project, path=project.paths[name])
+
+        start = time.monotonic()
+        model = load_model(
+            project=project,
+            path=project.paths[name],
+            root_type=root_types()[name],
+            decoded=data,
+            **kwargs,
+        )
+        end = time.monotonic()
+
+        project.load_timings[name] = ModelLoadTiming(
+            decode=decode_time,
+            deserialize=end - start,
+        )
+
+        return model
+
     if models.parameters is None:
         if project.paths.parameters is None:
-            models.parameters = epyqlib.attrsmodel.Model(
+            models.parameters = epcpm.attrsmodel.Model(
                 root=epyqlib.pm.parametermodel.Root(),
                 columns=epyqlib.pm.parametermodel.columns,
             )
         else:
-            models.parameters = load_model(
-                project=project,
-                path=project.paths.parameters,
-                root_type=epyqlib.pm.parametermodel.Root,
+            models.parameters = load(
+                name="parameters",
                 columns=epyqlib.pm.parametermodel.columns,
             )
 
     if models.can is None:
         if project.paths.can is None:
-            models.can = epyqlib.attrsmodel.Model(
+            models.can = epcpm.attrsmodel.Model(
                 root=epcpm.canmodel.Root(),
                 columns=epcpm.canmodel.columns,
             )
         else:
-            models.can = load_model(
-                project=project,
-                path=project.paths.can,
-                root_type=epcpm.canmodel.Root,
+            models.can = load(
+                name="can",
                 columns=epcpm.canmodel.columns,
             )
 
     if models.sunspec is None:
         if project.paths.sunspec is None:
-            models.sunspec = epyqlib.attrsmodel.Model(
+            models.sunspec = epcpm.attrsmodel.Model(
                 root=epcpm.sunspecmodel.Root(),
                 columns=epcpm.sunspecmodel.columns,
             )
         else:
-            models.sunspec = load_model(
-                project=project,
-                path=project.paths.sunspec,
-                root_type=epcpm.sunspecmodel.Root,
+            models.sunspec = load(
+                name="sunspec",
                 columns=epcpm.sunspecmodel.columns,
                 drop_sources=(models.parameters,),
             )
 
     if models.staticmodbus is None:
         if project.paths.staticmodbus is None or len(project.paths.staticmodbus) == 0:
-            models.staticmodbus = epyqlib.attrsmodel.Model(
+            models.staticmodbus = epcpm.attrsmodel.Model(
                 root=epcpm.staticmodbusmodel.Root(),
                 columns=epcpm.staticmodbusmodel.columns,
                 drop_sources=(models.parameters,),
             )
         else:
-            models.staticmodbus = load_model(
-                project=project,
-                path=project.paths.staticmodbus,
-                root_type=epcpm.staticmodbusmodel.Root,
+            models.staticmodbus = load(
+                name="staticmodbus",
                 columns=epcpm.staticmodbusmodel.columns,
                 drop_sources=(models.parameters,),
             )
 
+    if cache is not None and len(cached_roots) == 0:
+        cache.save(roots={name: models[name].root for name in to_read})
+
     models.parameters.droppable_from.add(models.parameters)
 
     models.can.droppable_from.add(models.parameters)
@@ -238,10 +350,19 @@ class Models:
         self.staticmodbus.list_selection_roots["enumerations"] = enumerations_root
 
         self.can.list_selection_roots["enumerations"] = enumerations_root
-        self.parameters.update_nodes()
-        self.can.update_nodes()
-        self.sunspec.update_nodes()
-        self.staticmodbus.update_nodes()
+
+        # the tables are regenerated when first used rather than on every load
+        self.mark_stale()
+
+    def mark_stale(self):
+        for model in self.values():
+            if model is not None:
+                model.mark_stale()
+
+    def ensure_updated(self):
+        for model in self.values():
+            if model is not None:
+                model.ensure_updated()
 
 
 @graham.schemify(tag="project")
@@ -257,8 +378,13 @@ class Project:
     models = attr.ib(default=attr.Factory(Models))
     filters = attr.ib(default=(("Parameter Project", ["pmp"]), ("All Files", ["*"])))
     data_filters = attr.ib(default=(("Dataset", ["json"]), ("All Files", ["*"])))
+    load_timings = attr.ib(factory=dict)
 
     def save(self, parent=None):
+        self.choose_paths(parent=parent)
+        self.write()
+
+    def choose_paths(self, parent=None):
         if self.filename is None:
             project_path = epyqlib.utils.qt.file_dialog(
                 filters=self.filters,
@@ -294,57 +420,269 @@ class Project:
 
         self.paths = paths
 
-        with open(self.filename, "w", newline="\n") as f:
-            s = graham.dumps(self, indent=4).data
-            f.write(s)
+    def write(self, progress=None):
+        self.models.ensure_updated()
+
+        project_directory = self.filename.parents[0]
+
+        targets = [(self, self.filename)]
+        targets.extend(
+            (model.root, project_directory / path)
+            for path, model in zip(self.paths.values(), self.models.values())
+        )
+
+        for done, (instance, path) in enumerate(targets):
+            if progress is not None:
+                progress(done, len(targets), os.fspath(path))
+
+            write_json(instance=instance, path=path)
+
+    def snapshot(self):
+        """Record the models as plain data.  The snapshot can then be built
+        into a copy of the project on a worker thread while the originals
+        remain editable.
+        """
+        self.models.ensure_updated()
+
+        names = [name for name, model in self.models.items() if model is not None]
+        root_indexes, records = epcpm.projectcache.flatten(
+            roots={name: self.models[name].root for name in names},
+            root_types=root_types(),
+        )
+
+        return ProjectSnapshot(
+            filename=self.filename,
+            paths=attr.evolve(self.paths),
+            columns={name: self.models[name].columns for name in names},
+            root_indexes=root_indexes,
+            records=records,
+        )
+
+
+@attr.s(frozen=True)
+class ProjectSnapshot:
+    filename = attr.ib()
+    paths = attr.ib()
+    columns = attr.ib()
+    root_indexes = attr.ib()
+    records = attr.ib()
+
+    def build(self):
+        roots = epcpm.projectcache.inflate(
+            root_indexes=self.root_indexes,
+            records=self.records,
+            root_types=root_types(),
+        )
+
+        project = Project(filename=self.filename, paths=attr.evolve(self.paths))
+
+        for name, root in roots.items():
+            drop_sources = ()
+            if name != "parameters" and project.models.parameters is not None:
+                drop_sources = (project.models.parameters,)
+
+            project.models[name] = epcpm.attrsmodel.Model(
+                root=root,
+                columns=self.columns[name],
+                drop_sources=drop_sources,
+            )
+
+        _post_load(project)
+
+        # recorded from up to date models so there is nothing to regenerate
+        for name in roots:
+            project.models[name].stale_nodes = []
+
+        return project
+
+
+def write_json(instance, path):
+    """Stream the graham serialization of the instance to the path one node
+    at a time.  The file is left untouched when the content would not change.
+    """
+
+    def write(temporary_path):
+        with open(temporary_path, "w", newline="\n") as f:
+            for chunk in iterencode(instance):
+                f.write(chunk)
+
+            f.write("\n")
+
+    return epcpm.artifacts.write_if_changed(path=path, write=write)
+
 
-            if not s.endswith("\n"):
-                f.write("\n")
+@functools.lru_cache(maxsize=None)
+def node_schema(cls):
+    """The schema for the fields of a node other than its children along
+    with the children field, or None for types without a children list.
+    """
+    schema = graham.schema(cls)
+    children = schema.fields.get("children")
+    if not isinstance(children, graham.fields.MixedList):
+        return None
 
-        for path, model in zip(paths.values(), self.models.values()):
-            s = graham.dumps(model.root, indent=4).data
+    return type(schema)(exclude=("children",)), children
 
-            with open(project_directory / path, "w", newline="\n") as f:
-                f.write(s)
 
-                if not s.endswith("\n"):
-                    f.write("\n")
+def iterencode(instance, indent=""):
+    """Encode the graham serialization of the instance the same as
+    json.dump() with indent=4 but without dumping the whole tree at once.
+    """
+    found = node_schema(type(instance))
+    if found is None:
+        encoded = json.dumps(graham.schema(instance).dump(instance).data, indent=4)
+        yield encoded.replace("\n", "\n" + indent)
+        return
 
+    schema, children_field = found
+    data = schema.dump(instance).data
+    names = [
+        name
+        for name in graham.schema(instance).fields
+        if name == "children" or name in data
+    ]
 
-def load_model(project, path, root_type, columns, drop_sources=()):
-    resolved_path = path
-    if project.filename is not None:
-        resolved_path = project.filename.parents[0] / resolved_path
+    inner = indent + "    "
 
-    with open(resolved_path) as f:
-        raw = f.read()
+    yield "{"
+    for index, name in enumerate(names):
+        yield "{}\n{}{}: ".format("," if index > 0 else "", inner, json.dumps(name))
+
+        if name != "children":
+            yield json.dumps(data[name], indent=4).replace("\n", "\n" + inner)
+            continue
+
+        children = [
+            child
+            for child in instance.children
+            if not isinstance(child, children_field.exclude)
+        ]
+        if len(children) == 0:
+            yield "[]"
+            continue
+
+        child_indent = inner + "    "
+
+        yield "["
+        for child_index, child in enumerate(children):
+            yield "{}\n{}".format("," if child_index > 0 else "", child_indent)
+            yield from iterencode(child, indent=child_indent)
+        yield "\n{}]".format(inner)
+
+    yield "\n{}}}".format(indent)
+
+
+@attr.s(frozen=True)
+class ModelLoadTiming:
+    decode = attr.ib()
+    deserialize = attr.ib()
+
+
+def resolve_path(project, path):
+    if project.filename is None:
+        return path
+
+    return project.filename.parents[0] / path
+
+
+def read_model(project, path):
+    start = time.monotonic()
+
+    with open(resolve_path(project=project, path=path)) as f:
+        data = json.load(f)
+
+    end = time.monotonic()
+
+    return data, end - start
+
+
+@attr.s(frozen=True)
+class DecodedModel:
+    root_indexes = attr.ib()
+    records = attr.ib()
+    decode = attr.ib()
+    deserialize = attr.ib()
+
+
+def decode_model(path, name):
+    """Read and deserialize a model file in a worker process.  The tree is
+    returned as projectcache records since the nodes can't be pickled.
+    """
+    start = time.monotonic()
+
+    with open(path) as f:
+        data = json.load(f)
+
+    decoded = time.monotonic()
+
+    types = root_types()
+    root = graham.schema(types[name]).load(data).data
+    root_indexes, records = epcpm.projectcache.flatten(
+        roots={name: root},
+        root_types=types,
+    )
+
+    end = time.monotonic()
+
+    return DecodedModel(
+        root_indexes=root_indexes,
+        records=records,
+        decode=decoded - start,
+        deserialize=end - decoded,
+    )
+
+
+def load_model(project, path, root_type, columns, drop_sources=(), decoded=None):
+    if decoded is None:
+        decoded, _ = read_model(project=project, path=path)
 
     root_schema = graham.schema(root_type)
-    root = root_schema.loads(raw).data
+    root = root_schema.load(decoded).data
+
+    return model_from_root(root=root, columns=columns, drop_sources=drop_sources)
 
-    def collect(node, payload):
-        payload[node.uuid] = node
 
+def model_from_root(root, columns, drop_sources=()):
     uuid_to_node = {}
-    root.traverse(call_this=collect, payload=uuid_to_node, internal_nodes=True)
+    unresolved = []
 
-    def update(node, payload):
-        for field in attr.fields(type(node)):
-            if field.metadata.get(graham.core.metadata_key) is None or not isinstance(
-                field.metadata.get(graham.core.metadata_key).field,
-                epyqlib.attrsmodel.Reference,
-            ):
-                continue
+    def collect_and_resolve(node, _):
+        uuid_to_node[node.uuid] = node
+
+        for name in reference_field_names(type(node)):
+            value = getattr(node, name)
+            original = uuid_to_node.get(value)
+            if original is None:
+                # possibly a forward reference, retry once everything is seen
+                unresolved.append((node, name, value))
+            else:
+                setattr(node, name, original)
 
-            value = getattr(node, field.name)
-            original = payload.get(value)
-            if original is not None:
-                setattr(node, field.name, original)
+    root.traverse(call_this=collect_and_resolve, internal_nodes=True)
 
-    root.traverse(call_this=update, payload=uuid_to_node, internal_nodes=True)
+    for node, name, value in unresolved:
+        original = uuid_to_node.get(value)
+        if original is not None:
+            setattr(node, name, original)
 
-    return epyqlib.attrsmodel.Model(
+    return epcpm.attrsmodel.Model(
         root=root,
         columns=columns,
         drop_sources=drop_sources,
+        uuid_to_node=uuid_to_node,
     )
+
+
+@functools.lru_cache(maxsize=None)
+def reference_field_names(cls):
+    names = []
+
+    for field in attr.fields(cls):
+        metadata = field.metadata.get(graham.core.metadata_key)
+        if metadata is not None and isinstance(
+            metadata.field,
+            epyqlib.attrsmodel.Reference,
+        ):
+            names.append(field.name)
+
+    return tuple(names)
@@ -0,0 +1,245 @@
+import decimal
+import json
+import os
+import pathlib
+import sys
+import uuid
+
+import attr
+import epyqlib.treenode
+import epyqlib.utils.qt
+
+import epcpm
+import epcpm.exportmanifest
+
+
+format_version = 2
+suffix = ".cache"
+
+
+class UnknownNodeType(Exception):
+    pass
+
+
+def type_name(type_):
+    return f"{type_.__module__}:{type_.__qualname__}"
+
+
+def resolve_type(name, root_types):
+    """Find the node class for a name written by flatten().  Only classes
+    from already imported modules are accepted so the records can't cause
+    anything else to be imported or called.
+    """
+    if isinstance(name, dict):
+        return root_types[name["root"]]
+
+    module_name, _, qualname = name.partition(":")
+    target = sys.modules.get(module_name)
+    for part in qualname.split("."):
+        target = getattr(target, part, None)
+
+    if not isinstance(target, type) or not issubclass(
+        target, epyqlib.treenode.TreeNode
+    ):
+        raise UnknownNodeType(name)
+
+    return target
+
+
+def encode(value, indexes):
+    if value is None or type(value) in {bool, int, float, str}:
+        return value
+
+    if isinstance(value, epyqlib.treenode.TreeNode):
+        index = indexes.get(id(value))
+        if index is None:
+            raise TypeError(f"Reference to a node outside the roots: {value!r}")
+
+        return {"node": index}
+
+    if isinstance(value, uuid.UUID):
+        return {"uuid": str(value)}
+
+    if isinstance(value, decimal.Decimal):
+        return {"decimal": str(value)}
+
+    if type(value) is tuple:
+        return {"tuple": [encode(item, indexes) for item in value]}
+
+    if type(value) is list:
+        return [encode(item, indexes) for item in value]
+
+    raise TypeError(f"Unable to record value of type {type(value)!r}")
+
+
+def decode(value, nodes):
+    if isinstance(value, list):
+        return [decode(item, nodes) for item in value]
+
+    if isinstance(value, dict):
+        ((kind, content),) = value.items()
+
+        if kind == "node":
+            return nodes[content]
+
+        if kind == "uuid":
+            return uuid.UUID(content)
+
+        if kind == "decimal":
+            return decimal.Decimal(content)
+
+        if kind == "tuple":
+            return tuple(decode(item, nodes) for item in content)
+
+        raise TypeError(f"Unknown recorded value kind: {kind!r}")
+
+    return value
+
+
+def references_nodes(value):
+    if isinstance(value, list):
+        return any(references_nodes(item) for item in value)
+
+    if isinstance(value, dict):
+        ((kind, content),) = value.items()
+
+        return kind == "node" or (kind == "tuple" and references_nodes(content))
+
+    return False
+
+
+def flatten(roots, root_types):
+    """Record the trees below the roots as plain data that can be written
+    as JSON and handed to other threads.
+    """
+    root_type_names = {type_: name for name, type_ in root_types.items()}
+
+    nodes = []
+    indexes = {}
+
+    def visit(node, _):
+        indexes[id(node)] = len(nodes)
+        nodes.append(node)
+
+    for root in roots.values():
+        root.traverse(call_this=visit, internal_nodes=True)
+
+    records = []
+    for node in nodes:
+        type_ = type(node)
+        if type_ in root_type_names:
+            # root classes are built by a factory and can't be found by name
+            name = {"root": root_type_names[type_]}
+        else:
+            name = type_name(type_)
+
+        values = {
+            field.name: encode(
+                epyqlib.utils.qt.pyqtify_get(node, field.name),
+                indexes,
+            )
+            for field in attr.fields(type_)
+            if field.name not in {"children", "model"}
+        }
+        children = [indexes[id(child)] for child in node.children]
+
+        records.append([name, values, children])
+
+    root_indexes = {name: indexes[id(root)] for name, root in roots.items()}
+
+    return root_indexes, records
+
+
+def inflate(root_indexes, records, root_types):
+    nodes = [resolve_type(name, root_types)() for name, _, _ in records]
+
+    references = []
+    for node, (_, values, children) in zip(nodes, records):
+        for name, value in values.items():
+            if references_nodes(value):
+                references.append((node, name, value))
+            else:
+                epyqlib.utils.qt.pyqtify_set(node, name, decode(value, nodes))
+
+        if len(children) > 0:
+            # set directly rather than appended so that nodes like tables
+            # don't regenerate while only partly filled in
+            epyqlib.utils.qt.pyqtify_set(
+                node,
+                "children",
+                [nodes[index] for index in children],
+            )
+            for child in node.children:
+                child.tree_parent = node
+
+    # references go through the properties so passthrough attributes get
+    # connected to their originals
+    for node, name, value in references:
+        setattr(node, name, decode(value, nodes))
+
+    return {name: nodes[index] for name, index in root_indexes.items()}
+
+
+@attr.s
+class Cache:
+    path = attr.ib()
+    key = attr.ib()
+    root_types = attr.ib()
+
+    @classmethod
+    def for_project(cls, project_path, source_paths, root_types):
+        project_path = pathlib.Path(project_path)
+
+        key = {
+            "format": format_version,
+            "version": epcpm.__version__,
+            "sources": {
+                name: epcpm.exportmanifest.file_digest(path)
+                for name, path in sorted(source_paths.items())
+            },
+        }
+
+        return cls(
+            path=project_path.with_name(project_path.name + suffix),
+            key=key,
+            root_types=root_types,
+        )
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                content = json.load(f)
+
+            if content["key"] != self.key:
+                return None
+
+            return inflate(
+                root_indexes=content["roots"],
+                records=content["records"],
+                root_types=self.root_types,
+            )
+        except Exception:
+            # a missing, stale or unreadable cache just means loading the
+            # json instead
+            return None
+
+    def save(self, roots):
+        temporary_path = self.path.with_name(self.path.name + ".tmp")
+
+        try:
+            # values that can't be recorded leave the project uncached
+            root_indexes, records = flatten(roots=roots, root_types=self.root_types)
+
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"key": self.key, "roots": root_indexes, "records": records},
+                    f,
+                    separators=(",", ":"),
+                )
+
+            os.replace(temporary_path, self.path)
+        except (OSError, TypeError, ValueError):
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
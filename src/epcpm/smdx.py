@@ -1,3 +1,7 @@
+import copy
+import functools
+import hashlib
+import pathlib
 import re
 
 import attr
@@ -29,6 +33,31 @@ class ValidationResult:
     notes = attr.ib(default="")
 
 
+@functools.lru_cache(maxsize=None)
+def load_schema(path):
+    """Compile the schema once per process, workers validate many files
+    against it.
+    """
+    schema = lxml.etree.fromstring(pathlib.Path(path).read_bytes())
+
+    return lxml.etree.XMLSchema(schema, attribute_defaults=True)
+
+
+def validate_path_against_schema(subject_path, schema_path):
+    return validate_against_schema(
+        subject=subject_path,
+        schema=load_schema(schema_path),
+    )
+
+
+def validate_path_against_reference(subject_path, schema_path, reference_path):
+    return validate_against_reference(
+        subject=lxml.etree.fromstring(subject_path.read_bytes()),
+        schema=load_schema(schema_path),
+        reference=lxml.etree.fromstring(reference_path.read_bytes()),
+    )
+
+
 def validate_against_schema(subject, schema):
     subject_xml = lxml.etree.fromstring(subject.read_bytes())
     success = schema.validate(subject_xml)
@@ -169,6 +198,71 @@ def remove_elements_by_name(tree, names):
     return tree
 
 
+def canonical_digest(element):
+    return hashlib.sha256(lxml.etree.tostring(element, method="c14n")).digest()
+
+
+def blocks(tree):
+    return tree.xpath("/sunSpecModels/model/block")
+
+
+def skeleton_digest(tree):
+    skeleton = copy.deepcopy(tree)
+
+    for block in blocks(skeleton):
+        block.clear(keep_tail=True)
+
+    return canonical_digest(skeleton)
+
+
+def rebase_path(path, base):
+    _, _, rest = path[1:].partition("/")
+    if len(rest) > 0:
+        return f"{base}/{rest}"
+
+    if not base.endswith("]"):
+        return f"{base}[1]"
+
+    return base
+
+
+def rebase_change(change, base):
+    rebased = {
+        field: rebase_path(path=getattr(change, field), base=base)
+        for field in ("node", "target")
+        if field in change._fields
+    }
+
+    return change._replace(**rebased)
+
+
+def diff_differing_blocks(reference, subject):
+    """Diff only what differs since xmldiff gets slow on large models.
+    Canonically identical trees have no changes and if only the content of
+    some blocks differs then only those blocks are diffed.
+    """
+    if canonical_digest(reference) == canonical_digest(subject):
+        return []
+
+    if skeleton_digest(reference) != skeleton_digest(subject):
+        return xmldiff.main.diff_trees(reference, subject)
+
+    reference_tree = reference.getroottree()
+    changes = []
+
+    for reference_block, subject_block in zip(blocks(reference), blocks(subject)):
+        if canonical_digest(reference_block) == canonical_digest(subject_block):
+            continue
+
+        base = reference_tree.getpath(reference_block)
+        changes.extend(
+            rebase_change(change=change, base=base)
+            for change in xmldiff.main.diff_trees(reference_block, subject_block)
+        )
+
+    return changes
+
+
 def compare_to_reference(subject, reference):
     trimmed_subject, trimmed_reference = (
         remove_elements_by_name(tree=tree, names=("description", "notes"))
@@ -178,7 +272,10 @@ def compare_to_reference(subject, reference):
     for element in vendor_specific_elements(trimmed_subject):
         remove_element(element=element)
 
-    diff = xmldiff.main.diff_trees(trimmed_reference, trimmed_subject)
+    diff = diff_differing_blocks(
+        reference=trimmed_reference,
+        subject=trimmed_subject,
+    )
 
     return tuple(
         f"{change}"
@@ -12,6 +12,8 @@ import epyqlib.utils.qt
 from PyQt5 import QtCore
 from PyQt5 import QtWidgets
 
+import epcpm.attrsmodel
+
 
 class ConsistencyError(Exception):
     pass
@@ -933,6 +935,8 @@ class Table(epyqlib.treenode.TreeNode):
     def __attrs_post_init__(self):
         super().__init__()
 
+        self._fingerprint = None
+
     @classmethod
     def all_addable_types(cls):
         return epyqlib.attrsmodel.create_addable_types(())
@@ -956,13 +960,9 @@ class Table(epyqlib.treenode.TreeNode):
         return None
 
     def update(self, table=None):
-        old_nodes = self.recursively_remove_children()
-        old_nodes_by_path = {
-            getattr(node, "path", getattr(node, "parameter_uuid", node.uuid)): node
-            for node in old_nodes
-        }
-
         if self.parameter_table_uuid is None:
+            self._fingerprint = None
+            self.recursively_remove_children()
             return
 
         root = self.find_root()
@@ -973,6 +973,104 @@ class Table(epyqlib.treenode.TreeNode):
         elif table.uuid != self.table_uuid:
             raise ConsistencyError()
 
+        fingerprint = self.fingerprint(table=table)
+        if fingerprint == self._fingerprint:
+            return
+
+        children = self.build_children(table=table)
+
+        # fill in detached blocks before adding them to the tree
+        for child, grandchildren in children:
+            if grandchildren is not None:
+                epcpm.attrsmodel.update_children(parent=child, children=grandchildren)
+
+        epcpm.attrsmodel.update_children(
+            parent=self,
+            children=[child for child, _ in children],
+        )
+
+        self._fingerprint = self.fingerprint(table=table)
+
+    def fingerprint(self, table):
+        """Everything from the parameter table and this table that the
+        generated blocks and data points depend on.
+        """
+        tree = []
+
+        def visit(node, _):
+            original = node.original
+            tree.append(
+                (
+                    node.uuid,
+                    node.path,
+                    type(original),
+                    getattr(original, "uuid", None),
+                )
+            )
+
+        table.group.traverse(call_this=visit, internal_nodes=True)
+
+        return (
+            tuple(
+                (
+                    child.uuid,
+                    child.parameter_uuid,
+                    child.mandatory,
+                    child.units,
+                    child.type_uuid,
+                    child.size,
+                    child.enumeration_uuid,
+                )
+                for child in self.children
+                if isinstance(child, DataPoint)
+            ),
+            tuple(
+                (
+                    section.uuid,
+                    tuple(element.uuid for element in section.children),
+                )
+                for section in table.arrays_and_groups
+            ),
+            tuple(
+                tuple(
+                    (
+                        layer.uuid,
+                        layer.name,
+                        layer.tree_parent.name,
+                        tuple(child.name for child in layer.tree_parent.children),
+                    )
+                    for layer in combination
+                )
+                for combination in table.combinations
+            ),
+            tuple(tree),
+            tuple(
+                (child.uuid, tuple(grandchild.uuid for grandchild in child.children))
+                for child in self.children
+            ),
+        )
+
+    def build_children(self, table):
+        """Collect the data points and blocks for the table, reusing the
+        present nodes where they match.  Each child is paired with its
+        children, or None for the data points.
+        """
+        old_nodes = []
+        self.traverse(
+            call_this=lambda node, payload: payload.append(node),
+            payload=old_nodes,
+            internal_nodes=True,
+        )
+        old_nodes_by_path = {
+            getattr(node, "path", getattr(node, "parameter_uuid", node.uuid)): node
+            for node in old_nodes
+            if node is not self
+        }
+
+        in_tree_by_path = epcpm.attrsmodel.nodes_by_path(table.group)
+
+        children = []
+
         master_array_data_points_by_uuid = {}
 
         for section in table.arrays_and_groups:
@@ -983,7 +1081,7 @@ class Table(epyqlib.treenode.TreeNode):
                     node = DataPoint(
                         parameter_uuid=array_element.uuid,
                     )
-                self.append_child(node)
+                children.append((node, None))
                 master_array_data_points_by_uuid[array_element.uuid] = node
             elif isinstance(section, epyqlib.pm.parametermodel.Group):
                 for element in section.children:
@@ -992,7 +1090,7 @@ class Table(epyqlib.treenode.TreeNode):
                         node = DataPoint(
                             parameter_uuid=element.uuid,
                         )
-                    self.append_child(node)
+                    children.append((node, None))
                     master_array_data_points_by_uuid[element.uuid] = node
 
         for combination in table.combinations:
@@ -1033,12 +1131,10 @@ class Table(epyqlib.treenode.TreeNode):
 
             block_node.repeats = curve_count
 
-            self.append_child(block_node)
+            block_children = []
+            children.append((block_node, block_children))
 
-            (in_tree,) = table.group.nodes_by_attribute(
-                attribute_value=tuple(node.uuid for node in combination),
-                attribute_name="path",
-            )
+            (in_tree,) = in_tree_by_path[base_path]
             # continue
 
             block_offset = 0
@@ -1072,7 +1168,7 @@ class Table(epyqlib.treenode.TreeNode):
                 point_node.size = reference_data_point.size
                 point_node.enumeration_uuid = reference_data_point.enumeration_uuid
                 point_node.block_offset = block_offset
-                block_node.append_child(point_node)
+                block_children.append(point_node)
                 block_offset += point_node.size
 
             array_elements = itertools.chain.from_iterable(
@@ -1099,7 +1195,7 @@ class Table(epyqlib.treenode.TreeNode):
                 point_node.size = reference_data_point.size
                 point_node.enumeration_uuid = reference_data_point.enumeration_uuid
                 point_node.block_offset = block_offset
-                block_node.append_child(point_node)
+                block_children.append(point_node)
                 block_offset += point_node.size
 
             # TODO: CAMPid 143707880547014313476753071297360068134
@@ -1118,9 +1214,11 @@ class Table(epyqlib.treenode.TreeNode):
                 point_node.size = reference_data_point.size
                 point_node.enumeration_uuid = reference_data_point.enumeration_uuid
                 point_node.block_offset = block_offset
-                block_node.append_child(point_node)
+                block_children.append(point_node)
                 block_offset += point_node.size
 
+        return children
+
     remove_old_on_drop = epyqlib.attrsmodel.default_remove_old_on_drop
     internal_move = epyqlib.attrsmodel.default_internal_move
     check = epyqlib.attrsmodel.check_just_children
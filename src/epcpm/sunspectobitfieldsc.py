@@ -1,5 +1,6 @@
 import attr
 
+import epcpm.artifacts
 import epcpm.c
 import epcpm.parameterstointerface
 import epcpm.sunspecmodel
@@ -10,17 +11,24 @@ import epyqlib.utils.general
 builders = epyqlib.utils.general.TypeMap()
 
 
-def export(c_path, h_path, sunspec_model, include_uuid_in_item):
+def export(c_path, h_path, sunspec_model, include_uuid_in_item, context=None):
+    sunspec_model.ensure_updated()
+
+    if context is None:
+        parameter_uuid_finder = sunspec_model.node_from_uuid
+    else:
+        parameter_uuid_finder = context.node_finder()
+
     builder = builders.wrap(
         wrapped=sunspec_model.root,
-        parameter_uuid_finder=sunspec_model.node_from_uuid,
+        parameter_uuid_finder=parameter_uuid_finder,
         c_path=c_path,
         h_path=h_path,
         include_uuid_in_item=include_uuid_in_item,
     )
 
     c_path.parent.mkdir(parents=True, exist_ok=True)
-    builder.gen()
+    return builder.gen()
 
 
 def gen(self, first=0):
@@ -90,11 +98,14 @@ class Root:
 
         h_lines.append("#endif")
 
-        with self.c_path.open("w", newline="\n") as f:
-            f.write(epcpm.c.format_nested_lists(c_lines).strip() + "\n")
-
-        with self.h_path.open("w", newline="\n") as f:
-            f.write(epcpm.c.format_nested_lists(h_lines).strip() + "\n")
+        return [
+            path
+            for path, lines in ((self.c_path, c_lines), (self.h_path, h_lines))
+            if epcpm.artifacts.write_text_if_changed(
+                path=path,
+                text=epcpm.c.format_nested_lists(lines).strip() + "\n",
+            )
+        ]
 
 
 @builders(epcpm.sunspecmodel.Model)
@@ -1,5 +1,6 @@
 import attr
 
+import epcpm.artifacts
 import epcpm.c
 import epcpm.sunspecmodel
 import epcpm.sunspectoxlsx
@@ -10,6 +11,8 @@ builders = epyqlib.utils.general.TypeMap()
 
 
 def export(path, sunspec_model):
+    sunspec_model.ensure_updated()
+
     builder = builders.wrap(
         wrapped=sunspec_model.root,
         parameter_uuid_finder=sunspec_model.node_from_uuid,
@@ -17,7 +20,7 @@ def export(path, sunspec_model):
     )
 
     path.mkdir(parents=True, exist_ok=True)
-    builder.gen()
+    return builder.gen()
 
 
 def gen(self, first=0):
@@ -42,6 +45,8 @@ class Root:
     path = attr.ib()
 
     def gen(self):
+        changed = []
+
         for member in self.wrapped.children:
             builder = builders.wrap(
                 wrapped=member,
@@ -64,8 +69,14 @@ class Root:
                 "",
             ]
             lines.extend(builder.gen())
-            with path.open("w", newline="\n") as f:
-                f.write(epcpm.c.format_nested_lists(lines).strip() + "\n")
+            written = epcpm.artifacts.write_text_if_changed(
+                path=path,
+                text=epcpm.c.format_nested_lists(lines).strip() + "\n",
+            )
+            if written:
+                changed.append(path)
+
+        return changed
 
 
 @builders(epcpm.sunspecmodel.Model)
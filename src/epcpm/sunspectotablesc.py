@@ -1,6 +1,7 @@
 import attr
 import epyqlib.utils.general
 import epyqlib.pm.parametermodel
+import epyqlib.treenode
 
 import epcpm.sunspecmodel
 
@@ -8,10 +9,20 @@ import epcpm.sunspecmodel
 builders = epyqlib.utils.general.TypeMap()
 
 
-def export(c_path, h_path, sunspec_model, skip_sunspec=False):
+def export(c_path, h_path, sunspec_model, skip_sunspec=False, context=None):
+    sunspec_model.ensure_updated()
+
+    if context is None:
+        parameter_uuid_finder = sunspec_model.node_from_uuid
+        table_element_finder = epyqlib.treenode.TreeNode.descendent
+    else:
+        parameter_uuid_finder = context.node_finder()
+        table_element_finder = context.table_element_finder()
+
     builder = builders.wrap(
         wrapped=sunspec_model.root,
-        parameter_uuid_finder=sunspec_model.node_from_uuid,
+        parameter_uuid_finder=parameter_uuid_finder,
+        table_element_finder=table_element_finder,
         skip_sunspec=skip_sunspec,
     )
 
@@ -23,17 +34,15 @@ def export(c_path, h_path, sunspec_model, skip_sunspec=False):
         "declarations": h_content,
     }
 
-    epcpm.c.render(
-        source=c_path.with_suffix(f"{c_path.suffix}_pm"),
-        destination=c_path,
-        context=template_context,
-    )
-
-    epcpm.c.render(
-        source=h_path.with_suffix(f"{h_path.suffix}_pm"),
-        destination=h_path,
-        context=template_context,
-    )
+    return [
+        path
+        for path in (c_path, h_path)
+        if epcpm.c.render(
+            source=path.with_suffix(f"{path.suffix}_pm"),
+            destination=path,
+            context=template_context,
+        )
+    ]
 
 
 # TODO: CAMPid 079549750417808543178043180
@@ -52,6 +61,7 @@ def get_curve_type(combination_string):
 class Root:
     wrapped = attr.ib()
     parameter_uuid_finder = attr.ib()
+    table_element_finder = attr.ib()
     skip_sunspec = attr.ib(default=False)
 
     def gen(self):
@@ -67,6 +77,7 @@ class Root:
                 builder = builders.wrap(
                     wrapped=child,
                     parameter_uuid_finder=self.parameter_uuid_finder,
+                    table_element_finder=self.table_element_finder,
                 )
 
                 # table_results.append(builder.gen())
@@ -103,6 +114,7 @@ class Root:
 class Model:
     wrapped = attr.ib()
     parameter_uuid_finder = attr.ib()
+    table_element_finder = attr.ib()
 
     def gen(self):
         for child in self.wrapped.children:
@@ -118,6 +130,7 @@ class Model:
         builder = builders.wrap(
             wrapped=child,
             parameter_uuid_finder=self.parameter_uuid_finder,
+            table_element_finder=self.table_element_finder,
             model_id=self.wrapped.id,
         )
 
@@ -130,12 +143,14 @@ class TableRepeatingBlockReference:
     wrapped = attr.ib()
     model_id = attr.ib()
     parameter_uuid_finder = attr.ib()
+    table_element_finder = attr.ib()
 
     def gen(self):
         builder = builders.wrap(
             wrapped=self.wrapped.original,
             model_id=self.model_id,
             parameter_uuid_finder=self.parameter_uuid_finder,
+            table_element_finder=self.table_element_finder,
         )
 
         return builder.gen()
@@ -147,6 +162,7 @@ class TableRepeatingBlock:
     wrapped = attr.ib()
     model_id = attr.ib()
     parameter_uuid_finder = attr.ib()
+    table_element_finder = attr.ib()
 
     def gen(self):
         both_lines = [[], []]
@@ -164,6 +180,7 @@ class TableRepeatingBlock:
                     curve_index=curve_index,
                     curve_type=curve_type,
                     parameter_uuid_finder=self.parameter_uuid_finder,
+                    table_element_finder=self.table_element_finder,
                 )
 
                 for lines, more_lines in zip(both_lines, builder.gen()):
@@ -181,11 +198,13 @@ class DataPoint:
     curve_index = attr.ib()
     curve_type = attr.ib()
     parameter_uuid_finder = attr.ib()
+    table_element_finder = attr.ib()
 
     def gen(self):
         table_element = self.parameter_uuid_finder(self.wrapped.parameter_uuid)
         curve_parent = table_element.tree_parent.tree_parent.tree_parent
-        table_element = curve_parent.descendent(
+        table_element = self.table_element_finder(
+            curve_parent,
             str(self.curve_index + 1),
             table_element.tree_parent.name,
             table_element.name,
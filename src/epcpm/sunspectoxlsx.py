@@ -1,5 +1,6 @@
 import itertools
 import math
+import threading
 
 import attr
 import openpyxl
@@ -7,6 +8,7 @@ import openpyxl
 import epyqlib.pm.parametermodel
 import epyqlib.utils.general
 
+import epcpm.artifacts
 import epcpm.c
 import epcpm.sunspecmodel
 
@@ -54,6 +56,15 @@ class Fields:
             value for value, f in zip(attr.astuple(self), attr.astuple(filter_)) if f
         )
 
+    def as_indexed_tuple(self, indexes):
+        values = attr.astuple(self, recurse=False)
+
+        return tuple(values[index] for index in indexes)
+
+
+def column_indexes(column_filter):
+    return tuple(index for index, f in enumerate(attr.astuple(column_filter)) if f)
+
 
 field_names = Fields(
     field_type="Field Type",
@@ -102,43 +113,125 @@ enumerator_fields = Fields(
 )
 
 
+@attr.s(frozen=True)
+class Sheet:
+    title = attr.ib()
+    rows = attr.ib(factory=list)
+    header = attr.ib(default=True)
+
+
+@attr.s
+class SharedSheets:
+    """Build the sheets on first use so that several workbooks written from
+    the same export, possibly from different threads, share one pass over
+    the model.
+    """
+
+    sunspec_model = attr.ib()
+    parameters_model = attr.ib()
+    skip_sunspec = attr.ib(default=False)
+    _sheets = attr.ib(default=None)
+    _lock = attr.ib(factory=threading.Lock)
+
+    def get(self):
+        with self._lock:
+            if self._sheets is None:
+                self.parameters_model.ensure_updated()
+                self.sunspec_model.ensure_updated()
+
+                builder = builders.wrap(
+                    wrapped=self.sunspec_model.root,
+                    parameter_uuid_finder=self.sunspec_model.node_from_uuid,
+                    parameter_model=self.parameters_model,
+                    skip_sunspec=self.skip_sunspec,
+                )
+                self._sheets = builder.sheets()
+
+            return self._sheets
+
+
+def fill_workbook(workbook, sheets, column_filter):
+    indexes = column_indexes(column_filter)
+    header = field_names.as_indexed_tuple(indexes)
+
+    for sheet in sheets:
+        worksheet = workbook.create_sheet(sheet.title)
+
+        if sheet.header:
+            worksheet.append(header)
+
+        for row in sheet.rows:
+            worksheet.append(row.as_indexed_tuple(indexes))
+
+    return workbook
+
+
 def export(
-    path, sunspec_model, parameters_model, column_filter=None, skip_sunspec=False
+    path,
+    sunspec_model,
+    parameters_model,
+    column_filter=None,
+    skip_sunspec=False,
+    sheets=None,
 ):
     if column_filter is None:
         column_filter = attr_fill(Fields, True)
 
-    builder = epcpm.sunspectoxlsx.builders.wrap(
-        wrapped=sunspec_model.root,
-        parameter_uuid_finder=sunspec_model.node_from_uuid,
-        parameter_model=parameters_model,
-        skip_sunspec=skip_sunspec,
+    if sheets is None:
+        sheets = SharedSheets(
+            sunspec_model=sunspec_model,
+            parameters_model=parameters_model,
+            skip_sunspec=skip_sunspec,
+        )
+
+    # rows are streamed out as they are appended rather than kept as cells
+    workbook = openpyxl.Workbook(write_only=True)
+    fill_workbook(
+        workbook=workbook,
+        sheets=sheets.get(),
         column_filter=column_filter,
     )
 
-    workbook = builder.gen()
-
     path.parent.mkdir(parents=True, exist_ok=True)
-    workbook.save(path)
+    changed = epcpm.artifacts.write_if_changed(
+        path=path,
+        write=workbook.save,
+        digest=epcpm.artifacts.zip_digest,
+    )
+
+    return [path] if changed else []
 
 
 @builders(epcpm.sunspecmodel.Root)
 @attr.s
 class Root:
     wrapped = attr.ib()
-    column_filter = attr.ib()
+    column_filter = attr.ib(default=None)
     skip_sunspec = attr.ib(default=False)
     parameter_uuid_finder = attr.ib(default=None)
     parameter_model = attr.ib(default=None)
     sort_models = attr.ib(default=False)
 
     def gen(self):
+        column_filter = self.column_filter
+        if column_filter is None:
+            column_filter = attr_fill(Fields, True)
+
         workbook = openpyxl.Workbook()
         workbook.remove(workbook.active)
 
-        workbook.create_sheet("License Agreement")
-        workbook.create_sheet("Summary")
-        workbook.create_sheet("Index")
+        return fill_workbook(
+            workbook=workbook,
+            sheets=self.sheets(),
+            column_filter=column_filter,
+        )
+
+    def sheets(self):
+        sheets = [
+            Sheet(title="License Agreement", header=False),
+            Sheet(title="Summary", header=False),
+            Sheet(title="Index", header=False),
+        ]
 
         if not self.skip_sunspec:
             if self.sort_models:
@@ -158,36 +251,30 @@ class Root:
                     # TODO: for now, implement it soon...
                     continue
 
-                worksheet = workbook.create_sheet()
-
-                model_offset += builders.wrap(
+                rows, length = builders.wrap(
                     wrapped=model,
-                    worksheet=worksheet,
                     padding_type=self.parameter_model.list_selection_roots[
                         "sunspec types"
                     ].child_by_name("pad"),
                     parameter_uuid_finder=self.parameter_uuid_finder,
-                    column_filter=self.column_filter,
                     model_offset=model_offset,
                 ).gen()
 
-        return workbook
+                sheets.append(Sheet(title=str(model.id), rows=rows))
+                model_offset += length
+
+        return sheets
 
 
 @builders(epcpm.sunspecmodel.Model)
 @attr.s
 class Model:
     wrapped = attr.ib()
-    worksheet = attr.ib()
     padding_type = attr.ib()
-    column_filter = attr.ib()
     model_offset = attr.ib()  # starting Modbus address for the model
     parameter_uuid_finder = attr.ib(default=None)
 
     def gen(self):
-        self.worksheet.title = str(self.wrapped.id)
-        self.worksheet.append(field_names.as_filtered_tuple(self.column_filter))
-
         self.wrapped.children[0].check_offsets_and_length()
 
         overall_length = sum(
@@ -229,30 +316,21 @@ class Model:
             elif i == 1:
                 row.value = overall_length
 
-            self.worksheet.append(row.as_filtered_tuple(self.column_filter))
-
         for block in self.wrapped.children:
             builder = enumeration_builders.wrap(
                 wrapped=block,
                 parameter_uuid_finder=self.parameter_uuid_finder,
             )
-            rows = builder.gen()
-
-            for row in rows:
-                self.worksheet.append(
-                    row.as_filtered_tuple(self.column_filter),
-                )
+            rows.extend(builder.gen())
 
-        return overall_length + 2  # add header length
+        return rows, overall_length + 2  # add header length
 
 
 @builders(epcpm.sunspecmodel.Table)
 @attr.s
 class Table:
     wrapped = attr.ib()
-    worksheet = attr.ib()
     padding_type = attr.ib()
-    column_filter = attr.ib()
     parameter_uuid_finder = attr.ib(default=None)
 
     def gen(self):
@@ -0,0 +1,35 @@
+import os
+
+import epcpm.artifacts
+
+
+def test_unchanged_text_is_not_rewritten(tmp_path):
+    path = tmp_path / "generated.h"
+
+    assert epcpm.artifacts.write_text_if_changed(path=path, text="a\n")
+
+    os.utime(path, ns=(0, 0))
+
+    assert not epcpm.artifacts.write_text_if_changed(path=path, text="a\n")
+    assert path.stat().st_mtime_ns == 0
+    assert [p.name for p in tmp_path.iterdir()] == ["generated.h"]
+
+    assert epcpm.artifacts.write_text_if_changed(path=path, text="b\n")
+    assert path.read_text() == "b\n"
+
+
+def test_failed_write_leaves_path(tmp_path):
+    path = tmp_path / "generated.h"
+    path.write_text("a\n")
+
+    def write(temporary_path):
+        temporary_path.write_text("partial")
+        raise Exception("failed")
+
+    try:
+        epcpm.artifacts.write_if_changed(path=path, write=write)
+    except Exception:
+        pass
+
+    assert path.read_text() == "a\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["generated.h"]
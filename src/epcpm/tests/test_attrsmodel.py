@@ -0,0 +1,77 @@
+import uuid
+
+import epcpm.attrsmodel
+import epcpm.canmodel
+
+
+def build():
+    root = epcpm.canmodel.Root()
+    model = epcpm.attrsmodel.Model(root=root, columns=epcpm.canmodel.columns)
+
+    message = epcpm.canmodel.Message()
+    root.append_child(message)
+
+    return model, message
+
+
+def test_indexed_on_add():
+    model, message = build()
+
+    parameter_uuid = uuid.uuid4()
+    signal = epcpm.canmodel.Signal(parameter_uuid=parameter_uuid)
+    message.append_child(signal)
+
+    assert model.nodes_by_parameter_uuid(parameter_uuid) == [signal]
+    assert model.node_from_uuid(signal.uuid) is signal
+
+
+def test_reindexed_on_change():
+    model, message = build()
+
+    old_uuid = uuid.uuid4()
+    new_uuid = uuid.uuid4()
+    signal = epcpm.canmodel.Signal(parameter_uuid=old_uuid)
+    message.append_child(signal)
+
+    signal.parameter_uuid = new_uuid
+
+    assert model.nodes_by_parameter_uuid(old_uuid) == []
+    assert model.nodes_by_parameter_uuid(new_uuid) == [signal]
+
+    signal.parameter_uuid = None
+
+    assert model.nodes_by_parameter_uuid(new_uuid) == []
+
+
+def test_unindexed_on_remove():
+    model, message = build()
+
+    parameter_uuid = uuid.uuid4()
+    signals = [epcpm.canmodel.Signal(parameter_uuid=parameter_uuid) for _ in range(2)]
+    for signal in signals:
+        message.append_child(signal)
+
+    assert set(model.nodes_by_parameter_uuid(parameter_uuid)) == set(signals)
+
+    message.remove_child(child=signals[0])
+
+    assert model.nodes_by_parameter_uuid(parameter_uuid) == [signals[1]]
+
+    model.root.remove_child(child=message)
+
+    assert model.nodes_by_parameter_uuid(parameter_uuid) == []
+    assert model.parameter_uuid_to_nodes == {}
+
+
+def test_indexed_on_construction():
+    root = epcpm.canmodel.Root()
+    message = epcpm.canmodel.Message()
+    root.append_child(message)
+
+    parameter_uuid = uuid.uuid4()
+    signal = epcpm.canmodel.Signal(parameter_uuid=parameter_uuid)
+    message.append_child(signal)
+
+    model = epcpm.attrsmodel.Model(root=root, columns=epcpm.canmodel.columns)
+
+    assert model.nodes_by_parameter_uuid(parameter_uuid) == [signal]
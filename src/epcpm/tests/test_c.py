@@ -33,3 +33,37 @@ def test_format_nested_lists():
     }
     """
     )
+
+
+def test_render_strips_trailing_whitespace(tmp_path):
+    source = tmp_path / "example.c_pm"
+    source.write_text("{% for line in lines %}{{ line }}  \n\n{% endfor %}\n\n")
+    destination = tmp_path / "example.c"
+
+    epcpm.c.render(
+        source=source,
+        destination=destination,
+        context={"lines": ["a", " b", ""]},
+    )
+
+    assert destination.read_bytes() == b"a  \n\n b\n"
+    assert sorted(tmp_path.iterdir()) == sorted([source, destination])
+
+
+def test_render_shares_environment(tmp_path):
+    source = tmp_path / "example.c_pm"
+    source.write_text("{{ value }}")
+    destination = tmp_path / "example.c"
+
+    for value in ["first", "second"]:
+        epcpm.c.render(
+            source=source,
+            destination=destination,
+            context={"value": value},
+        )
+
+        assert destination.read_text() == f"{value}\n"
+
+    assert epcpm.c.environment(directory=tmp_path) is epcpm.c.environment(
+        directory=tmp_path,
+    )
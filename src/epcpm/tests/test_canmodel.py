@@ -1,4 +1,5 @@
 import collections
+import itertools
 import json
 import pathlib
 
@@ -235,3 +236,180 @@ TestAttrsModel = epyqlib.attrsmodel.build_tests(
     root_type=epcpm.canmodel.Root,
     columns=epcpm.canmodel.columns,
 )
+
+
+def test_multiplexer_id_conflicts():
+    message = epcpm.canmodel.MultiplexedMessage()
+    multiplexers = [
+        epcpm.canmodel.Multiplexer(name=name, identifier=identifier)
+        for name, identifier in (("A", 1), ("B", 2), ("C", 1), ("D", 1))
+    ]
+    for multiplexer in multiplexers:
+        message.append_child(multiplexer)
+
+    by_identifier = message.multiplexer_id_nodes_by_identifier()
+    assert by_identifier == {
+        1: [multiplexers[0], *multiplexers[2:]],
+        2: [multiplexers[1]],
+    }
+
+    result = message.check(models={})
+
+    conflicts = {
+        child.node.name: [grandchild.message for grandchild in child.children]
+        for child in result.children
+    }
+    assert conflicts == {
+        "A": ["MUX ID 1 is in use by C", "MUX ID 1 is in use by D"],
+        "C": ["MUX ID 1 is in use by A", "MUX ID 1 is in use by D"],
+        "D": ["MUX ID 1 is in use by A", "MUX ID 1 is in use by C"],
+    }
+
+
+def test_multiplexer_check_uses_given_index():
+    message = epcpm.canmodel.MultiplexedMessage()
+    first = epcpm.canmodel.Multiplexer(name="A", identifier=1)
+    second = epcpm.canmodel.Multiplexer(name="B", identifier=2)
+    message.append_child(first)
+    message.append_child(second)
+
+    # the index is the caller's, not recomputed from the message
+    result = first.check_with_index(
+        models={},
+        by_identifier={1: [first, second]},
+    )
+
+    assert [child.message for child in result.children] == [
+        "MUX ID 1 is in use by B",
+    ]
+    assert first.check(models={}) is None
+
+
+def test_table_update_incremental(sample):
+    structure_changes = []
+    data_changes = []
+
+    qt_model = sample.model.model
+    qt_model.rowsInserted.connect(lambda *args: structure_changes.append(args))
+    qt_model.rowsRemoved.connect(lambda *args: structure_changes.append(args))
+    qt_model.dataChanged.connect(lambda *args: data_changes.append(args))
+
+    sample.table.update()
+
+    assert structure_changes == []
+    assert data_changes == []
+
+    def generated():
+        return [
+            (child, list(child.children))
+            for child in sample.table.children
+            if isinstance(child, epcpm.canmodel.Multiplexer)
+        ]
+
+    original = generated()
+
+    (signal, *_) = (
+        child
+        for child in sample.table.children
+        if isinstance(child, epcpm.canmodel.Signal)
+    )
+    signal.factor = 2
+    del data_changes[:]
+
+    sample.table.update()
+
+    assert structure_changes == []
+    assert len(data_changes) > 0
+    assert generated() == original
+
+
+def test_leaf_order_matches_sorting_each_level():
+    @attr.s(frozen=True)
+    class Named:
+        name = attr.ib()
+
+    @attr.s(frozen=True)
+    class Leaf:
+        path = attr.ib()
+
+    levels = (
+        (1, ("RideThrough", "Trip")),
+        (0, ("Low", "High")),
+        (2, ("1", "2", "3")),
+    )
+
+    leaves = [
+        Leaf(path=path)
+        for path in itertools.product(
+            ("High", "Low"),
+            ("Trip", "RideThrough"),
+            ("3", "1", "2"),
+        )
+    ]
+    node_from_uuid = Named
+
+    expected = leaves
+    for index, names in reversed(levels):
+        expected = sorted(
+            expected,
+            key=lambda leaf: names.index(node_from_uuid(leaf.path[index]).name),
+        )
+
+    leaf_order = epcpm.canmodel.LeafOrder(levels=levels)
+
+    assert leaf_order.sorted(leaves, node_from_uuid=node_from_uuid) == expected
+
+
+def test_table_uses_configured_leaf_order(monkeypatch):
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+    project.models.ensure_updated()
+    (can_table,) = project.models.can.root.nodes_by_attribute(
+        attribute_value="First Table",
+        attribute_name="name",
+    )
+
+    def multiplexer_names():
+        return [
+            child.name
+            for child in can_table.children
+            if isinstance(child, epcpm.canmodel.Multiplexer)
+        ]
+
+    default = multiplexer_names()
+    assert "ArrayOne" in default[0]
+
+    def array_first(names, first):
+        return sorted(names, key=lambda name: first not in name)
+
+    # the orders kept by parameter table are used when the table has none
+    table = project.models.parameters.node_from_uuid(can_table.table_uuid)
+    monkeypatch.setitem(
+        epcpm.canmodel.leaf_orders,
+        table.uuid,
+        epcpm.canmodel.LeafOrder(levels=[(2, ["ArrayTwo", "ArrayOne"])]),
+    )
+    can_table.update()
+
+    assert multiplexer_names() == array_first(default, first="ArrayTwo")
+    assert "leaf_order" not in json.loads(graham.dumps(can_table).data)
+
+    # and the table's own order takes precedence over them
+    can_table.leaf_order = [(2, ["ArrayOne", "ArrayTwo"])]
+    can_table.update()
+
+    assert multiplexer_names() == array_first(default, first="ArrayOne")
+
+    can_table.leaf_order = [(2, ["ArrayTwo", "ArrayOne"])]
+    monkeypatch.delitem(epcpm.canmodel.leaf_orders, table.uuid)
+    can_table.update()
+
+    ordered = multiplexer_names()
+    assert sorted(ordered) == sorted(default)
+    assert ordered == array_first(default, first="ArrayTwo")
+
+    dumped = graham.dumps(can_table).data
+    loaded = graham.schema(epcpm.canmodel.CanTable).loads(dumped).data
+    assert loaded.leaf_order == ((2, ("ArrayTwo", "ArrayOne")),)
+    assert json.loads(dumped)["leaf_order"] == [
+        {"path_index": 2, "names": ["ArrayTwo", "ArrayOne"]},
+    ]
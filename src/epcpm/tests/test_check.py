@@ -0,0 +1,193 @@
+import pathlib
+
+import click.testing
+
+import epyqlib.checkresultmodel
+import epyqlib.pm.parametermodel
+
+import epcpm.canmodel
+import epcpm.check
+import epcpm.cli.main
+import epcpm.project
+import epcpm.sunspecmodel
+
+
+here = pathlib.Path(__file__).parent
+project_path = here / "project" / "project.pmp"
+
+
+def load():
+    project = epcpm.project.loadp(project_path)
+
+    for model in project.models.values():
+        model.update_nodes()
+
+    return project
+
+
+def checked_names(checker, models):
+    checked = []
+
+    checker.check(
+        models=models,
+        progress=lambda done, total, name: checked.append(name),
+    )
+
+    return checked
+
+
+def test_failed_check_reported_as_error():
+    project = load()
+
+    report = epcpm.check.Checker().check(models=project.models, jobs=2)
+
+    assert report.failed
+    assert any("Check failed" in line for line in report.lines())
+    assert [name for name, _ in report.models] == [
+        name for name, _ in project.models.items()
+    ]
+
+
+def test_result_root_matches_report():
+    project = load()
+
+    report = epcpm.check.Checker().check(models=project.models)
+    root = epcpm.check.result_root(report=report, models=project.models)
+
+    results = root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epyqlib.checkresultmodel.Result),
+    )
+
+    assert {(result.node.uuid, result.message) for result in results} == {
+        (finding.node_uuid, finding.message) for _, finding in report.findings()
+    }
+
+
+def test_cached_until_changed():
+    project = load()
+    checker = epcpm.check.Checker()
+    checker.watch(project.models)
+
+    everything = checked_names(checker, project.models)
+    assert len(everything) > 0
+    assert checked_names(checker, project.models) == []
+
+    (message,) = project.models.can.root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epcpm.canmodel.MultiplexedMessage),
+    )
+    message.children[0].name = "Renamed"
+
+    assert checked_names(checker, project.models) == [message.name]
+
+    checker.unwatch()
+    assert sorted(checked_names(checker, project.models)) == sorted(everything)
+
+
+def test_only_edited_parameter_rechecked(monkeypatch):
+    project = load()
+    checker = epcpm.check.Checker()
+    checker.watch(project.models)
+    checker.check(models=project.models)
+
+    parameters = project.models.parameters.root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epyqlib.pm.parametermodel.Parameter),
+    )
+    assert len(parameters) > 1
+
+    rechecked = []
+    check = epyqlib.pm.parametermodel.Parameter.check
+
+    def counting_check(self, models):
+        rechecked.append(self)
+        return check(self, models=models)
+
+    monkeypatch.setattr(
+        epyqlib.pm.parametermodel.Parameter,
+        "check",
+        counting_check,
+    )
+
+    edited = min(parameters, key=lambda node: node.uuid)
+    edited.name = "Renamed"
+
+    report = checker.check(models=project.models)
+
+    assert rechecked == [edited]
+    assert list(report.lines()) == list(
+        epcpm.check.Checker().check(models=project.models).lines()
+    )
+
+    checker.unwatch()
+
+
+def test_parameter_rechecked_when_point_removed():
+    project = load()
+    checker = epcpm.check.Checker()
+    checker.watch(project.models)
+
+    def missing_point_uuids():
+        return {
+            finding.node_uuid
+            for _, finding in checker.check(models=project.models).findings()
+            if finding.message == "No linked SunSpec data point found"
+        }
+
+    assert missing_point_uuids() == set()
+
+    points = project.models.sunspec.root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epcpm.sunspecmodel.DataPoint),
+    )
+    point = min(
+        (
+            point
+            for point in points
+            if isinstance(
+                project.models.parameters.node_from_uuid(point.parameter_uuid),
+                epyqlib.pm.parametermodel.Parameter,
+            )
+            if [other.parameter_uuid for other in points].count(
+                point.parameter_uuid,
+            )
+            == 1
+        ),
+        key=lambda point: point.uuid,
+    )
+    point.tree_parent.remove_child(child=point)
+
+    assert missing_point_uuids() == {point.parameter_uuid}
+    assert list(checker.check(models=project.models).lines()) == list(
+        epcpm.check.Checker().check(models=project.models).lines()
+    )
+
+    checker.unwatch()
+
+
+def test_not_cached_when_edited_after_snapshot():
+    project = load()
+    checker = epcpm.check.Checker()
+    checker.watch(project.models)
+
+    version = checker.version
+
+    (message,) = project.models.can.root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epcpm.canmodel.MultiplexedMessage),
+    )
+    message.children[0].name = "Renamed"
+
+    checker.check(models=project.models, version=version)
+
+    assert len(checked_names(checker, project.models)) > 0
+    assert checked_names(checker, project.models) == []
+
+    checker.unwatch()
+
+
+def test_cli_exit_code():
+    runner = click.testing.CliRunner()
+    result = runner.invoke(
+        epcpm.cli.main.main,
+        ["validate", "project", "--project", str(project_path)],
+    )
+
+    assert result.exit_code == 1
+    assert "error: " in result.output
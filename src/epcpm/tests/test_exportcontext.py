@@ -0,0 +1,128 @@
+import pathlib
+
+import epyqlib.pm.parametermodel
+
+import epcpm.exportcontext
+import epcpm.project
+import epcpm.sunspecmodel
+
+
+this = pathlib.Path(__file__).resolve()
+here = this.parent
+
+
+def test_lookups_are_shared():
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+    context = epcpm.exportcontext.ExportContext.from_models(models=project.models)
+
+    can_nodes = context.can_nodes_with_parameter_uuid
+    expected = project.models.can.root.nodes_by_filter(
+        filter=lambda node: getattr(node, "parameter_uuid", None) is not None,
+    )
+
+    assert {id(node) for node in can_nodes} == {id(node) for node in expected}
+    assert context.can_nodes_with_parameter_uuid is can_nodes
+
+
+def test_enumerations():
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+    context = epcpm.exportcontext.ExportContext.from_models(models=project.models)
+
+    enumerations = project.models.parameters.list_selection_roots["enumerations"]
+
+    assert context.enumerations == list(enumerations.children)
+
+
+def test_sunspec_index_matches_search():
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+    project.models.ensure_updated()
+    sunspec_root = project.models.sunspec.root
+
+    # reference the repeating blocks from models so that there are block
+    # references to index as well
+    blocks = sunspec_root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epcpm.sunspecmodel.TableRepeatingBlock),
+    )
+    for i, block in enumerate(sorted(blocks, key=lambda block: str(block.uuid))):
+        model = epcpm.sunspecmodel.Model(id=700 + i)
+        sunspec_root.append_child(model)
+        model.append_child(model.child_from(block))
+
+    index = epcpm.exportcontext.SunspecIndex.build(sunspec_root=sunspec_root)
+
+    def search(attribute_name, attribute_value, node_type):
+        return {
+            id(node)
+            for node in sunspec_root.nodes_by_attribute(
+                attribute_value=attribute_value,
+                attribute_name=attribute_name,
+                raise_=False,
+            )
+            if isinstance(node, node_type)
+        }
+
+    def ids(nodes):
+        return {id(node) for node in nodes}
+
+    table_point_type = epcpm.sunspecmodel.TableRepeatingBlockReferenceDataPointReference
+    assert len(index.table_point_references) > 0
+    for parameter_uuid, nodes in index.table_point_references.items():
+        assert ids(nodes) == search("parameter_uuid", parameter_uuid, table_point_type)
+
+    assert len(index.data_points) > 0
+    for parameter_uuid, nodes in index.data_points.items():
+        expected = search(
+            "parameter_uuid", parameter_uuid, epcpm.sunspecmodel.DataPoint
+        )
+        assert ids(nodes) == expected
+
+    assert len(index.block_references) > 0
+    block_reference_type = epcpm.sunspecmodel.TableRepeatingBlockReference
+    for block in blocks:
+        assert ids(index.block_references.get(block.uuid, [])) == search(
+            "original", block, block_reference_type
+        )
+
+    context = epcpm.exportcontext.ExportContext.from_models(models=project.models)
+    points = sunspec_root.nodes_by_filter(
+        filter=lambda node: (
+            isinstance(
+                node,
+                (
+                    epcpm.sunspecmodel.DataPoint,
+                    epcpm.sunspecmodel.DataPointBitfieldMember,
+                ),
+            )
+            and node.parameter_uuid is not None
+        ),
+    )
+    assert set(context.parameter_uuid_to_sunspec_node) == {
+        point.parameter_uuid for point in points
+    }
+
+
+def test_finders_match_model_lookups():
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+    project.models.ensure_updated()
+    context = epcpm.exportcontext.ExportContext.from_models(models=project.models)
+
+    find_node = context.node_finder()
+    for model in (project.models.parameters, project.models.sunspec):
+        for uuid_ in model.uuid_to_node:
+            assert find_node(uuid_) is project.models.sunspec.node_from_uuid(uuid_)
+
+    elements = project.models.parameters.root.nodes_by_filter(
+        filter=lambda node: isinstance(
+            node,
+            epyqlib.pm.parametermodel.TableArrayElement,
+        ),
+    )
+    assert len(elements) > 0
+
+    find_element = context.table_element_finder()
+    for element in elements:
+        array = element.tree_parent
+        layer = array.tree_parent
+        group = layer.tree_parent
+        names = (layer.name, array.name, element.name)
+        assert find_element(group, *names) is group.descendent(*names)
@@ -0,0 +1,79 @@
+import pathlib
+
+import epyqlib.pm.parametermodel
+
+import epcpm.exportmanifest
+import epcpm.project
+
+
+this = pathlib.Path(__file__).resolve()
+here = this.parent
+
+
+def fingerprint(project, *keys):
+    fingerprints = epcpm.exportmanifest.Fingerprints(models=project.models)
+
+    return {key: fingerprints.get(key) for key in keys}
+
+
+def test_unreferenced_parameter_edit():
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+
+    keys = ("parameters", "can", "can.parameters", "sunspec.parameters")
+    before = fingerprint(project, *keys)
+
+    project.models.parameters.root.append_child(
+        epyqlib.pm.parametermodel.Parameter(name="Unreferenced"),
+    )
+
+    after = fingerprint(project, *keys)
+
+    assert after["parameters"] != before["parameters"]
+    assert after["can"] == before["can"]
+    assert after["can.parameters"] == before["can.parameters"]
+    assert after["sunspec.parameters"] == before["sunspec.parameters"]
+
+
+def test_referenced_parameter_edit():
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+
+    keys = ("can", "can.parameters")
+    before = fingerprint(project, *keys)
+
+    (table,) = project.models.parameters.root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epyqlib.pm.parametermodel.Table),
+    )
+    array = next(
+        child
+        for child in table.children
+        if isinstance(child, epyqlib.pm.parametermodel.Array)
+    )
+    array.children[0].units = "furlongs"
+
+    after = fingerprint(project, *keys)
+
+    assert after["can"] == before["can"]
+    assert after["can.parameters"] != before["can.parameters"]
+
+
+def test_manifest_round_trip(tmp_path):
+    output = tmp_path / "output.txt"
+    output.write_text("content")
+
+    manifest = epcpm.exportmanifest.Manifest.load(
+        tmp_path / epcpm.exportmanifest.default_name,
+    )
+    assert not manifest.up_to_date(name="output", inputs="a", outputs=[output])
+
+    manifest.record(name="output", inputs="a", outputs=[output])
+    manifest.save()
+
+    manifest = epcpm.exportmanifest.Manifest.load(manifest.path)
+    assert manifest.up_to_date(name="output", inputs="a", outputs=[output])
+    assert not manifest.up_to_date(name="output", inputs="b", outputs=[output])
+
+    output.write_text("edited")
+    assert not manifest.up_to_date(name="output", inputs="a", outputs=[output])
+
+    output.unlink()
+    assert not manifest.up_to_date(name="output", inputs="a", outputs=[output])
@@ -0,0 +1,347 @@
+import json
+import pathlib
+import sys
+import textwrap
+import threading
+
+import click.testing
+import epyqlib.pm.parametermodel
+import openpyxl
+import pytest
+
+import epcpm.cli.main
+import epcpm.exportmanifest
+import epcpm.importexport
+import epcpm.importexportdialog
+import epcpm.project
+import epcpm.symtoproject
+
+
+project_path = pathlib.Path(__file__).parent / "project" / "project.pmp"
+
+
+@pytest.mark.parametrize("jobs", [1, 3])
+def test_run_generators_keeps_order(jobs):
+    ran = []
+    lock = threading.Lock()
+
+    def generator(name):
+        with lock:
+            ran.append(name)
+
+    names = ["a", "b", "c", "d", "e"]
+    generators = [
+        epcpm.importexport.Generator(
+            name=name, generate=lambda name=name: generator(name)
+        )
+        for name in names
+    ]
+
+    timings = epcpm.importexport.run_generators(generators=generators, jobs=jobs)
+
+    assert [timing.name for timing in timings] == names
+    assert sorted(ran) == names
+    assert all(timing.seconds >= 0 for timing in timings)
+
+
+def test_run_generators_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+
+    generators = [
+        epcpm.importexport.Generator(name="a", generate=barrier.wait),
+        epcpm.importexport.Generator(name="b", generate=barrier.wait),
+    ]
+
+    epcpm.importexport.run_generators(generators=generators, jobs=2)
+
+
+def test_run_generators_raises():
+    def fail():
+        raise Exception("failed")
+
+    generators = [
+        epcpm.importexport.Generator(name="a", generate=lambda: None),
+        epcpm.importexport.Generator(name="b", generate=fail),
+    ]
+
+    with pytest.raises(Exception, match="failed"):
+        epcpm.importexport.run_generators(generators=generators, jobs=2)
+
+
+def test_run_generators_canceled():
+    ran = []
+    progressed = []
+
+    def generate(name):
+        ran.append(name)
+
+    generators = [
+        epcpm.importexport.Generator(
+            name=name, generate=lambda name=name: generate(name)
+        )
+        for name in ["a", "b", "c"]
+    ]
+
+    with pytest.raises(epcpm.importexport.ExportCanceled):
+        epcpm.importexport.run_generators(
+            generators=generators,
+            progress=lambda done, total, name: progressed.append((done, total, name)),
+            canceled=lambda: len(ran) >= 2,
+        )
+
+    assert ran == ["a", "b"]
+    assert progressed == [(1, 3, "a"), (2, 3, "b")]
+
+
+def write_script(path, body):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"#!/bin/sh\n{body}\n")
+    path.chmod(0o755)
+
+
+def fake_generation_scripts(base_path):
+    scripts = base_path / "venv" / "Scripts"
+    write_script(
+        scripts / "generatestripcollect",
+        'echo strip >> "$0.log"; echo sym > "$3"; echo hierarchy > "$7";'
+        ' mkdir -p "${11}"; echo device > "${11}/device.json"',
+    )
+    write_script(
+        scripts / "sunspecparser",
+        'echo sunspec >> "$0.log"; tables="$(dirname "$1")/python/embeddedlibrary";'
+        ' mkdir -p "$tables"; echo tables > "$tables/tables.py"',
+    )
+
+    (base_path / "interface").mkdir()
+    (base_path / "embedded-library").mkdir()
+    spreadsheet = base_path / "embedded-library" / "MODBUS_SunSpec-EPC.xlsx"
+    spreadsheet.write_bytes(b"a")
+
+    manifest = epcpm.exportmanifest.Manifest(path=base_path / "manifest.json")
+
+    def run():
+        results = epcpm.importexport.run_generation_scripts(
+            base_path,
+            manifest=manifest,
+        )
+        return {result.name: result.returncode for result in results}
+
+    return run
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses shell scripts")
+def test_run_generation_scripts_skips_unchanged(tmp_path):
+    run = fake_generation_scripts(base_path=tmp_path)
+
+    assert run() == {"generatestripcollect": 0, "sunspecparser": 0}
+    assert run() == {"generatestripcollect": None, "sunspecparser": None}
+
+    spreadsheet = tmp_path / "embedded-library" / "MODBUS_SunSpec-EPC.xlsx"
+    spreadsheet.write_bytes(b"b")
+    assert run() == {"generatestripcollect": None, "sunspecparser": 0}
+
+    log = tmp_path / "venv" / "Scripts" / "sunspecparser.log"
+    assert log.read_text() == "sunspec\nsunspec\n"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses shell scripts")
+def test_run_generation_scripts_reruns_for_outputs(tmp_path):
+    run = fake_generation_scripts(base_path=tmp_path)
+    interface = tmp_path / "interface"
+    tables = tmp_path / "embedded-library" / "python" / "embeddedlibrary" / "tables.py"
+
+    assert run() == {"generatestripcollect": 0, "sunspecparser": 0}
+
+    (interface / "EPC_DG_ID247.sym").unlink()
+    assert run() == {"generatestripcollect": 0, "sunspecparser": None}
+
+    (interface / "devices" / "device.json").unlink()
+    assert run() == {"generatestripcollect": 0, "sunspecparser": None}
+
+    tables.write_text("edited by hand")
+    assert run() == {"generatestripcollect": None, "sunspecparser": 0}
+    assert tables.read_text() == "tables\n"
+
+    assert run() == {"generatestripcollect": None, "sunspecparser": None}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses shell scripts")
+def test_run_generation_scripts_reports_all_statuses(tmp_path):
+    scripts = tmp_path / "venv" / "Scripts"
+    write_script(scripts / "generatestripcollect", "echo broken; exit 3")
+    write_script(scripts / "sunspecparser", "exit 0")
+
+    with pytest.raises(epcpm.importexport.GenerationScriptsFailed) as info:
+        epcpm.importexport.run_generation_scripts(tmp_path)
+
+    results = {result.name: result for result in info.value.results}
+
+    assert results["generatestripcollect"].returncode == 3
+    assert results["generatestripcollect"].output == "broken\n"
+    assert results["sunspecparser"].returncode == 0
+
+
+def fake_export_generators(monkeypatch, base_path):
+    ran = []
+
+    def export_generators(project, paths, **kwargs):
+        def generate(path):
+            ran.append(path.name)
+            path.write_text(path.name)
+
+        return [
+            epcpm.importexport.Generator(
+                name=name,
+                generate=lambda path=path: generate(path),
+                outputs=(path,),
+                inputs=("parameters",),
+            )
+            for name, path in (
+                ("a", base_path / "a.txt"),
+                ("b", base_path / "b.txt"),
+            )
+        ]
+
+    monkeypatch.setattr(epcpm.importexport, "export_generators", export_generators)
+
+    return ran
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses shell scripts")
+def test_incremental_export_skips_updating_tables(monkeypatch, tmp_path):
+    fake_generation_scripts(base_path=tmp_path)
+    ran = fake_export_generators(monkeypatch=monkeypatch, base_path=tmp_path)
+
+    def export():
+        project = epcpm.project.loadp(project_path)
+        report = epcpm.importexport.full_export(
+            project=project,
+            paths=None,
+            target_directory=tmp_path,
+            incremental=True,
+        )
+
+        return project, report
+
+    project, report = export()
+    assert ran == ["a.txt", "b.txt"]
+    assert not any(model.stale for model in project.models.values())
+
+    project, report = export()
+    assert ran == ["a.txt", "b.txt"]
+    assert report.up_to_date == ["a", "b"]
+    # nothing to generate so the tables were left alone
+    assert all(model.stale for model in project.models.values())
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses shell scripts")
+def test_cli_build_is_incremental_by_default(monkeypatch, tmp_path):
+    fake_generation_scripts(base_path=tmp_path)
+    ran = fake_export_generators(monkeypatch=monkeypatch, base_path=tmp_path)
+
+    def build(*options):
+        runner = click.testing.CliRunner()
+        result = runner.invoke(
+            epcpm.cli.main.main,
+            [
+                "export",
+                "build",
+                "--project",
+                str(project_path),
+                "--target-path",
+                str(tmp_path),
+                *options,
+            ],
+            catch_exceptions=False,
+        )
+        assert result.exit_code == 0
+
+        return result.output
+
+    build()
+    output = build()
+    assert ran == ["a.txt", "b.txt"]
+    assert "a: up to date" in output
+
+    # the full export rewrites everything even though nothing changed
+    output = build("--full")
+    assert ran == ["a.txt", "b.txt"] * 2
+    assert "up to date" not in output
+
+
+def test_full_import(monkeypatch, tmp_path):
+    sym_path = tmp_path / "parameters.sym"
+    sym_path.write_text(
+        textwrap.dedent(
+            """\
+    FormatVersion=5.0 // Do not edit this line!
+    Title="canmatrix-Export"
+
+    {ENUMS}
+    enum AccessLevel(0="User", 1="Engineering", 2="Factory")
+    enum CmmControlsVariant(0="None", 1="MG3", 2="MG4", 3="DG", 4="HY", 5="DC")
+
+    {SEND}
+
+    [ParameterQuery]
+    ID=1DEFF741h
+    Type=Extended
+    DLC=8
+    Mux=TestMux 0,14 0
+    Var=TestParam unsigned 14,2 /f:0.01  /min:0.01  /max:0.2 /p:2 /d:0.02
+
+    {SENDRECEIVE}
+
+    [ParameterResponse]
+    ID=1DEF41F7h
+    Type=Extended
+    DLC=8
+    Mux=TestMux 0,14 0
+    Var=TestParam unsigned 14,2 /f:0.01  /min:0.01  /max:0.2 /p:2 /d:0.02
+    """
+        )
+    )
+
+    hierarchy_path = tmp_path / "parameters.json"
+    hierarchy_path.write_text(
+        json.dumps(
+            {
+                "children": [
+                    {"name": "Test Group", "children": [["TestMux", "TestParam"]]},
+                ],
+            }
+        )
+    )
+
+    spreadsheet_path = tmp_path / "sunspec.xlsx"
+    openpyxl.Workbook().save(spreadsheet_path)
+
+    # the tables are built from the full product hierarchy
+    monkeypatch.setattr(
+        epcpm.symtoproject,
+        "go_add_tables",
+        lambda parameters_root, can_root: None,
+    )
+
+    paths = epcpm.importexportdialog.ImportPaths(
+        can=sym_path,
+        hierarchy=hierarchy_path,
+        tables_c=None,
+        sunspec_tables_c=None,
+        sunspec_bitfields_c=None,
+        spreadsheet=spreadsheet_path,
+        spreadsheet_user=None,
+        smdx=[],
+        sunspec_c=None,
+        sil_c=None,
+        interface_c=None,
+    )
+
+    project = epcpm.importexport.full_import(paths=paths)
+
+    assert project.models.parameters.columns == epyqlib.pm.parametermodel.columns
+    (parameter,) = project.models.parameters.root.nodes_by_attribute(
+        attribute_value="TestParam",
+        attribute_name="name",
+    )
+    assert project.models.can.nodes_by_parameter_uuid(parameter.uuid)
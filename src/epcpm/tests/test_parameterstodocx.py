@@ -0,0 +1,188 @@
+import itertools
+
+import attr
+import docx
+import docx.enum.text
+import docx.oxml
+import docx.oxml.ns
+import epyqlib.cangenmanual
+import epyqlib.pm.parametermodel
+
+import epcpm.canmodel
+import epcpm.parameterstodocx
+import epcpm.project
+import epcpm.tests.test_sunspectoxlsx
+
+
+def load(path):
+    """Load the SunSpec test project with what the docx export expects, no
+    tables and a CAN signal for every parameter.
+    """
+    path = path / "project" / "project.pmp"
+    epcpm.tests.test_sunspectoxlsx.save_project_with_sunspec(path=path)
+    project = epcpm.project.loadp(path)
+    project.models.ensure_updated()
+
+    parameters_root = project.models.parameters.root
+    tables = parameters_root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epyqlib.pm.parametermodel.Table),
+    )
+    for table in tables:
+        table.tree_parent.remove_child(child=table)
+
+    can_model = project.models.can
+    message = epcpm.canmodel.Message(name="Signals")
+    can_model.root.append_child(message)
+
+    parameters = parameters_root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epyqlib.pm.parametermodel.Parameter),
+    )
+    for i, parameter in enumerate(sorted(parameters, key=lambda node: node.uuid)):
+        if len(can_model.nodes_by_parameter_uuid(parameter.uuid)) == 0:
+            signal = epcpm.canmodel.Signal(
+                name=f"Signal{i}",
+                parameter_uuid=parameter.uuid,
+                factor=(1, 0.1, None)[i % 3],
+            )
+            message.append_child(signal)
+
+    return project
+
+
+def fill_table_by_rows(doc_table, table, headings, rows, max_indent):
+    """Fill the table a row at a time through python-docx, as fill_table()
+    did before it copied sample rows.
+    """
+    table = attr.evolve(
+        table,
+        rows=[row.to_tuple(max_indent=max_indent) for row in rows],
+    )
+    table.fill_docx(doc_table)
+
+    header_rows = len(doc_table.rows) - len(rows)
+
+    epyqlib.cangenmanual.set_repeat_table_header(doc_table.rows[0])
+    epyqlib.cangenmanual.prevent_row_breaks(doc_table)
+
+    for row, doc_row in zip(
+        itertools.chain((headings,), rows),
+        doc_table.rows[header_rows - 1 :],
+    ):
+        base_cell = doc_row.cells[row.indent]
+        base_cell.merge(doc_row.cells[max_indent - 1])
+
+    for row in doc_table.rows:
+        for cell in row.cells:
+            cell.text = cell.text.strip()
+            cell.paragraphs[
+                0
+            ].paragraph_format.line_spacing_rule = docx.enum.text.WD_LINE_SPACING.SINGLE
+
+
+def test_matches_row_by_row(monkeypatch, tmp_path):
+    project = load(tmp_path)
+
+    def gen():
+        builder = epcpm.parameterstodocx.builders.wrap(
+            wrapped=project.models.parameters.root,
+            can_root=project.models.can.root,
+            template=None,
+            access_level=None,
+        )
+
+        return builder.gen().element.xml
+
+    copied = gen()
+    monkeypatch.setattr(epcpm.parameterstodocx, "fill_table", fill_table_by_rows)
+    by_rows = gen()
+
+    assert copied.count("</w:tr>") > 100
+    assert copied == by_rows
+
+
+def test_titled_table_matches_row_by_row():
+    max_indent = 3
+    headings = epcpm.parameterstodocx.Row(name="Name", factor="Factor")
+    rows = [
+        epcpm.parameterstodocx.Row(name=f"Row {i}", indent=i % max_indent, factor=i)
+        for i in range(7)
+    ]
+
+    def fill(fill_table):
+        doc = docx.Document()
+        doc_table = doc.add_table(rows=0, cols=max_indent + 7)
+        table = epyqlib.cangenmanual.Table(
+            title="Title",
+            comment="Comment",
+            headings=headings.to_tuple(max_indent=max_indent),
+            widths=(0.25,) * (max_indent + 6) + (None,),
+        )
+
+        fill_table(
+            doc_table=doc_table,
+            table=table,
+            headings=headings,
+            rows=rows,
+            max_indent=max_indent,
+        )
+
+        return doc.element.xml
+
+    assert fill(epcpm.parameterstodocx.fill_table) == fill(fill_table_by_rows)
+
+
+def test_set_cell_text():
+    tc = docx.oxml.parse_xml(
+        f'<w:tc {docx.oxml.ns.nsdecls("w")}>'
+        "<w:p><w:pPr/><w:r><w:t>a</w:t></w:r><w:r><w:t>b</w:t></w:r></w:p>"
+        "<w:p><w:r><w:t>c</w:t></w:r></w:p>"
+        "</w:tc>"
+    )
+    epcpm.parameterstodocx.set_cell_text(tc=tc, text="new")
+
+    (p,) = tc.p_lst
+    assert p.pPr is not None
+    assert [r.text for r in p.r_lst] == ["new"]
+
+    empty = docx.oxml.parse_xml(f'<w:tc {docx.oxml.ns.nsdecls("w")}><w:p/></w:tc>')
+    epcpm.parameterstodocx.set_cell_text(tc=empty, text="new")
+
+    assert [r.text for p in empty.p_lst for r in p.r_lst] == ["new"]
+
+
+def test_index_matches_model_lookups(tmp_path):
+    project = load(tmp_path)
+    parameters_model = project.models.parameters
+    can_model = project.models.can
+
+    index = epcpm.parameterstodocx.Index.build(
+        parameter_root=parameters_model.root,
+        can_root=can_model.root,
+    )
+
+    parameters = parameters_model.root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epyqlib.pm.parametermodel.Parameter),
+    )
+    assert len(parameters) > 0
+
+    for parameter in parameters:
+        signal = can_model.nodes_by_parameter_uuid(parameter.uuid).pop()
+        assert index.signals[parameter.uuid] is signal
+
+    enumeration_types = (
+        epyqlib.pm.parametermodel.Enumeration,
+        epyqlib.pm.parametermodel.AccessLevels,
+    )
+    enumerations = parameters_model.root.nodes_by_filter(
+        filter=lambda node: isinstance(node, enumeration_types),
+    )
+    assert index.enumeration_names == {
+        enumeration.uuid: enumeration.name for enumeration in enumerations
+    }
+
+    access_levels = parameters_model.root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epyqlib.pm.parametermodel.AccessLevel),
+    )
+    assert len(access_levels) > 0
+    for access_level in access_levels:
+        assert index.access_levels[access_level.uuid] is access_level
@@ -1,12 +1,17 @@
+import functools
+import json
 import textwrap
+import threading
 
 import graham
+import pytest
 
 import epcpm.project
 
 import pathlib
 
 import epyqlib.pm
+import epyqlib.pm.parametermodel
 
 reference_string = textwrap.dedent(
     """\
@@ -95,3 +100,174 @@ def test_model_proper_selection_roots():
     expected = epyqlib.pm.parametermodel.types.list_selection_roots()
 
     assert set(project.models.parameters.list_selection_roots.keys()) == expected
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_load_model_resolves_references(jobs):
+    project = epcpm.project.loadp(
+        pathlib.Path(__file__).parent / "project" / "project.pmp",
+        jobs=jobs,
+    )
+
+    for model in project.models.values():
+        nodes = model.root.nodes_by_filter(filter=lambda node: True)
+
+        assert model.uuid_to_node == {node.uuid: node for node in nodes}
+
+        resolved = 0
+        for node in nodes:
+            for name in epcpm.project.reference_field_names(type(node)):
+                value = getattr(node, name)
+                if value is None:
+                    continue
+
+                assert value is model.node_from_uuid(value.uuid)
+                resolved += 1
+
+        if model is project.models.parameters:
+            assert resolved > 0
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_load_timings(jobs):
+    project = epcpm.project.loadp(
+        pathlib.Path(__file__).parent / "project" / "project.pmp",
+        jobs=jobs,
+    )
+
+    assert set(project.load_timings) == set(project.models)
+
+    for timing in project.load_timings.values():
+        assert timing.decode >= 0
+        assert timing.deserialize >= 0
+
+
+def test_concurrent_load_matches_serial():
+    path = pathlib.Path(__file__).parent / "project" / "project.pmp"
+
+    def dumps(jobs):
+        project = epcpm.project.loadp(path, jobs=jobs)
+        project.models.ensure_updated()
+
+        return {
+            name: graham.dumps(model.root, indent=4).data
+            for name, model in project.models.items()
+        }
+
+    assert dumps(jobs=2) == dumps(jobs=1)
+
+
+def test_iterencode_matches_json_dump():
+    project = epcpm.project.loadp(
+        pathlib.Path(__file__).parent / "project" / "project.pmp",
+    )
+    project.models.ensure_updated()
+
+    for instance in [project, *(model.root for model in project.models.values())]:
+        expected = json.dumps(
+            graham.schema(type(instance)).dump(instance).data,
+            indent=4,
+        )
+
+        assert "".join(epcpm.project.iterencode(instance)) == expected
+
+
+def test_save_matches_format_and_skips_unchanged(tmp_path):
+    source = pathlib.Path(__file__).parent / "project"
+    project = epcpm.project.loadp(source / "project.pmp")
+
+    project.filename = tmp_path / "project.pmp"
+    project.save()
+
+    for path, model in zip(project.paths.values(), project.models.values()):
+        expected = graham.dumps(model.root, indent=4).data + "\n"
+        assert (tmp_path / path).read_text() == expected
+
+    parameters = tmp_path / project.paths.parameters
+    can = tmp_path / project.paths.can
+    mtime = can.stat().st_mtime_ns
+    parameters.write_text("stale")
+
+    project.save()
+
+    assert can.stat().st_mtime_ns == mtime
+    assert parameters.read_text() != "stale"
+
+
+def test_snapshot_is_independent_copy():
+    project = epcpm.project.loadp(
+        pathlib.Path(__file__).parent / "project" / "project.pmp",
+    )
+
+    snapshot = project.snapshot()
+    dumped = {
+        name: graham.dumps(model.root).data for name, model in project.models.items()
+    }
+
+    original_name = project.models.parameters.root.children[0].name
+    project.models.parameters.root.children[0].name += " edited"
+
+    built = []
+    thread = threading.Thread(target=lambda: built.append(snapshot.build()))
+    thread.start()
+    thread.join()
+    (copy,) = built
+
+    for name, model in project.models.items():
+        copied = copy.models[name]
+        assert copied.root is not model.root
+        assert graham.dumps(copied.root).data == dumped[name]
+
+    assert copy.models.parameters.list_selection_roots.keys() == (
+        project.models.parameters.list_selection_roots.keys()
+    )
+
+    assert copy.models.parameters.root.children[0].name == original_name
+
+
+def test_load_defers_updating_nodes():
+    project = epcpm.project.loadp(
+        pathlib.Path(__file__).parent / "project" / "project.pmp",
+    )
+
+    assert all(model.stale for model in project.models.values())
+
+    project.models.can.ensure_updated()
+
+    assert not project.models.can.stale
+    assert not project.models.parameters.stale
+    assert project.models.sunspec.stale
+
+    copy = project.snapshot().build()
+
+    assert not any(model.stale for model in project.models.values())
+    assert not any(model.stale for model in copy.models.values())
+
+
+def test_ensure_updated_for_node_only_updates_its_table():
+    project = epcpm.project.loadp(
+        pathlib.Path(__file__).parent / "project" / "project.pmp",
+    )
+    parameters = project.models.parameters
+
+    (table,) = parameters.root.nodes_by_filter(
+        filter=lambda node: isinstance(node, epyqlib.pm.parametermodel.Table),
+    )
+    other = epyqlib.pm.parametermodel.Table(name="Other Table")
+    parameters.root.append_child(other)
+    parameters.mark_stale()
+
+    updated = []
+    for node in (table, other):
+        node.update = functools.partial(updated.append, node)
+
+    # a node inside the table brings the whole table up to date
+    parameters.ensure_updated(node=table.children[0])
+
+    assert updated == [table]
+    assert parameters.stale_nodes == [other]
+
+    parameters.ensure_updated()
+
+    assert updated == [table, other]
+    assert not parameters.stale
@@ -0,0 +1,75 @@
+import json
+import shutil
+
+import graham
+
+import epcpm.project
+import epcpm.projectcache
+import epcpm.tests.test_exportmanifest
+
+
+here = epcpm.tests.test_exportmanifest.here
+
+
+def dumped(project):
+    return {
+        name: graham.schema(type(model.root)).dump(model.root).data
+        for name, model in project.models.items()
+    }
+
+
+def test_cached_load_matches(tmp_path):
+    directory = tmp_path / "project"
+    shutil.copytree(here / "project", directory)
+    project_path = directory / "project.pmp"
+    cache_path = project_path.with_name(
+        project_path.name + epcpm.projectcache.suffix,
+    )
+
+    uncached = epcpm.project.loadp(project_path)
+    assert not cache_path.exists()
+
+    first = epcpm.project.loadp(project_path, use_cache=True)
+    assert cache_path.exists()
+
+    second = epcpm.project.loadp(project_path, use_cache=True)
+    assert all(timing.decode is None for timing in second.load_timings.values())
+
+    assert dumped(first) == dumped(uncached)
+    assert dumped(second) == dumped(uncached)
+
+
+def test_cache_invalidated_by_source_change(tmp_path):
+    directory = tmp_path / "project"
+    shutil.copytree(here / "project", directory)
+    project_path = directory / "project.pmp"
+
+    epcpm.project.loadp(project_path, use_cache=True)
+
+    project = epcpm.project.loadp(project_path)
+    project.models.parameters.root.children[0].name += " edited"
+    project.save()
+
+    reloaded = epcpm.project.loadp(project_path, use_cache=True)
+    assert all(timing.decode is not None for timing in reloaded.load_timings.values())
+    assert dumped(reloaded) == dumped(project)
+
+
+def test_cache_only_builds_node_types(tmp_path):
+    directory = tmp_path / "project"
+    shutil.copytree(here / "project", directory)
+    project_path = directory / "project.pmp"
+    cache_path = project_path.with_name(
+        project_path.name + epcpm.projectcache.suffix,
+    )
+
+    uncached = epcpm.project.loadp(project_path)
+    epcpm.project.loadp(project_path, use_cache=True)
+
+    content = json.loads(cache_path.read_text())
+    content["records"][-1][0] = "os:getcwd"
+    cache_path.write_text(json.dumps(content))
+
+    reloaded = epcpm.project.loadp(project_path, use_cache=True)
+    assert all(timing.decode is not None for timing in reloaded.load_timings.values())
+    assert dumped(reloaded) == dumped(uncached)
@@ -0,0 +1,158 @@
+import pathlib
+import shutil
+
+import click.testing
+import lxml.etree
+import pytest
+import xmldiff.main
+
+import epcpm.cli.main
+import epcpm.smdx
+
+
+this = pathlib.Path(__file__).resolve()
+here = this.parent
+smdx_path = here / "sunspec"
+
+permissive_schema = """\
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:element name="sunSpecModels">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:any processContents="skip" minOccurs="0" maxOccurs="unbounded"/>
+      </xs:sequence>
+      <xs:anyAttribute processContents="skip"/>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+
+def test_batch_jobs_matches_serial(tmp_path):
+    reference = tmp_path / "reference"
+    subject = tmp_path / "subject"
+    reference.mkdir()
+    subject.mkdir()
+
+    (reference / "smdx.xsd").write_text(permissive_schema)
+
+    for name in ["smdx_00001.xml", "smdx_00017.xml"]:
+        shutil.copy(smdx_path / name, reference / name)
+        shutil.copy(smdx_path / name, subject / name)
+
+    changed = subject / "smdx_00017.xml"
+    changed.write_text(changed.read_text().replace('len="', 'len="1', 1))
+
+    shutil.copy(smdx_path / "smdx_00103.xml", subject / "smdx_00103.xml")
+
+    def run(jobs):
+        runner = click.testing.CliRunner()
+        return runner.invoke(
+            epcpm.cli.main.main,
+            [
+                "validate",
+                "batch",
+                "--reference",
+                str(reference),
+                "--subject",
+                str(subject),
+                "--jobs",
+                str(jobs),
+            ],
+        )
+
+    serial = run(jobs=1)
+    parallel = run(jobs=2)
+
+    assert parallel.exception is None or isinstance(parallel.exception, SystemExit)
+    assert parallel.exit_code == serial.exit_code == 1
+    assert parallel.output == serial.output
+    assert "Cross validating: smdx_00017.xml" in parallel.output
+    assert "Validating: smdx_00103.xml" in parallel.output
+
+
+two_blocks = b"""\
+<sunSpecModels v="1">
+  <model id="1" len="4">
+    <block len="1">
+      <point id="A" offset="0" type="uint16"/>
+    </block>
+    <block len="3" type="repeating">
+      <point id="B" offset="0" type="uint16"/>
+      <point id="C" offset="1" type="enum16"><symbol id="X">1</symbol></point>
+      <point id="D" offset="2" type="uint16"/>
+    </block>
+  </model>
+</sunSpecModels>
+"""
+
+
+def change_second_block(change):
+    tree = lxml.etree.fromstring(two_blocks)
+    change(epcpm.smdx.blocks(tree)[1])
+
+    return tree
+
+
+def insert_point(block):
+    point = lxml.etree.Element("point", id="E", offset="3", type="uint16")
+    block.insert(1, point)
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda block: block[0].set("type", "int16"),
+        lambda block: setattr(block[1][0], "text", "2"),
+        insert_point,
+        lambda block: block.remove(block[2]),
+    ],
+    ids=["attribute", "text", "insert", "delete"],
+)
+def test_diff_differing_blocks_matches_full_diff(change):
+    reference = lxml.etree.fromstring(two_blocks)
+    subject = change_second_block(change)
+
+    changes = epcpm.smdx.diff_differing_blocks(
+        reference=reference,
+        subject=subject,
+    )
+
+    assert len(changes) > 0
+    assert changes == xmldiff.main.diff_trees(reference, subject)
+
+
+def test_diff_differing_blocks_identical(monkeypatch):
+    def diff_trees(*args, **kwargs):
+        raise Exception("xmldiff should not be run for identical trees")
+
+    monkeypatch.setattr(xmldiff.main, "diff_trees", diff_trees)
+
+    reference = lxml.etree.fromstring(two_blocks)
+    # attribute order does not matter canonically
+    subject = lxml.etree.fromstring(
+        two_blocks.replace(
+            b'<block len="3" type="repeating">',
+            b'<block type="repeating" len="3">',
+        )
+    )
+
+    assert epcpm.smdx.diff_differing_blocks(reference, subject) == []
+
+
+def test_diff_differing_blocks_only_diffs_changed_blocks(monkeypatch):
+    diffed = []
+    diff_trees = xmldiff.main.diff_trees
+
+    def spy(left, right, *args, **kwargs):
+        diffed.append(left.tag)
+        return diff_trees(left, right, *args, **kwargs)
+
+    monkeypatch.setattr(xmldiff.main, "diff_trees", spy)
+
+    reference = lxml.etree.fromstring(two_blocks)
+    subject = change_second_block(lambda block: block[0].set("type", "int16"))
+
+    epcpm.smdx.diff_differing_blocks(reference=reference, subject=subject)
+
+    assert diffed == ["block"]
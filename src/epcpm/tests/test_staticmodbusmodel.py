@@ -96,3 +96,41 @@ def test_table_update_unlinked():
     staticmodbus_table.update()
 
     assert count_types(staticmodbus_table.children) == {}
+
+
+def test_table_update_propagates_size():
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+    (staticmodbus_table,) = project.models.staticmodbus.root.nodes_by_attribute(
+        attribute_value="First Table",
+        attribute_name="name",
+    )
+    parameter_model = project.models.parameters
+    parameter_model.node_from_uuid(staticmodbus_table.parameter_table_uuid).update()
+    staticmodbus_table.update()
+
+    structure_changes = []
+    qt_model = project.models.staticmodbus.model
+    qt_model.rowsInserted.connect(lambda *args: structure_changes.append(args))
+    qt_model.rowsRemoved.connect(lambda *args: structure_changes.append(args))
+
+    (reference, *_) = staticmodbus_table.children
+
+    def generated():
+        return [
+            point
+            for block in staticmodbus_table.children
+            for point in block.children
+            if parameter_model.node_from_uuid(point.parameter_uuid).original.uuid
+            == reference.parameter_uuid
+        ]
+
+    original = generated()
+    assert len(original) > 0
+    assert {point.size for point in original} == {0}
+
+    reference.size = 2
+    staticmodbus_table.update()
+
+    assert structure_changes == []
+    assert generated() == original
+    assert {point.size for point in original} == {2}
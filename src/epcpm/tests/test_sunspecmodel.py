@@ -96,3 +96,41 @@ def test_table_update_unlinked():
     sunspec_table.update()
 
     assert count_types(sunspec_table.children) == {}
+
+
+def test_table_update_propagates_mandatory():
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+    (sunspec_table,) = project.models.sunspec.root.nodes_by_attribute(
+        attribute_value="First Table",
+        attribute_name="name",
+    )
+    parameter_model = project.models.parameters
+    parameter_model.node_from_uuid(sunspec_table.parameter_table_uuid).update()
+    sunspec_table.update()
+
+    structure_changes = []
+    qt_model = project.models.sunspec.model
+    qt_model.rowsInserted.connect(lambda *args: structure_changes.append(args))
+    qt_model.rowsRemoved.connect(lambda *args: structure_changes.append(args))
+
+    (reference, *_) = sunspec_table.children
+
+    def generated():
+        return [
+            point
+            for block in sunspec_table.children
+            for point in block.children
+            if parameter_model.node_from_uuid(point.parameter_uuid).original.uuid
+            == reference.parameter_uuid
+        ]
+
+    original = generated()
+    assert len(original) > 0
+    assert {point.mandatory for point in original} == {True}
+
+    reference.mandatory = False
+    sunspec_table.update()
+
+    assert structure_changes == []
+    assert generated() == original
+    assert {point.mandatory for point in original} == {False}
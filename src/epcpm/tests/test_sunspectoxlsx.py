@@ -1,6 +1,9 @@
 import csv
 import pathlib
 
+import attr
+import openpyxl
+
 import epcpm.project
 import epcpm.smdxtosunspec
 import epcpm.sunspectoxlsx
@@ -13,7 +16,10 @@ here = this.parent
 smdx_path = here / "sunspec"
 
 
-def test_x():
+def save_project_with_sunspec(path):
+    """Save the test project, with SunSpec models imported from the SMDX
+    files, to the path and return it.
+    """
     project = epcpm.project.loadp(here / "project" / "project.pmp")
 
     attrs_model = project.models.sunspec
@@ -58,11 +64,20 @@ def test_x():
             if accessor is not None:
                 setattr(point, direction, accessor)
 
-    project.filename = here / "project_with_sunspec" / "project.pmp"
+    project.filename = path
     project.paths["sunspec"] = "sunspec.json"
     project.filename.parent.mkdir(parents=True, exist_ok=True)
     project.save()
 
+    return project
+
+
+def test_x():
+    project = save_project_with_sunspec(
+        path=here / "project_with_sunspec" / "project.pmp",
+    )
+    attrs_model = project.models.sunspec
+
     builder = epcpm.sunspectoxlsx.builders.wrap(
         wrapped=attrs_model.root,
         parameter_uuid_finder=attrs_model.node_from_uuid,
@@ -90,3 +105,76 @@ def test_x():
         for sheet in workbook.worksheets:
             for row in sheet.rows:
                 writer.writerow(cell.value for cell in row)
+
+
+def test_filtered_workbook_from_shared_sheets(tmp_path):
+    project = epcpm.project.loadp(here / "project" / "project.pmp")
+
+    sheets = epcpm.sunspectoxlsx.SharedSheets(
+        sunspec_model=project.models.sunspec,
+        parameters_model=project.models.parameters,
+    )
+    assert sheets.get() is sheets.get()
+
+    full_filter = epcpm.sunspectoxlsx.attr_fill(epcpm.sunspectoxlsx.Fields, True)
+    user_filter = attr.evolve(full_filter, get=False, set=False, item=False)
+
+    workbooks = {}
+    for name, column_filter in (("full", full_filter), ("user", user_filter)):
+        path = tmp_path / f"{name}.xlsx"
+        epcpm.sunspectoxlsx.export(
+            path=path,
+            sunspec_model=project.models.sunspec,
+            parameters_model=project.models.parameters,
+            column_filter=column_filter,
+            sheets=sheets,
+        )
+        workbooks[name] = openpyxl.load_workbook(path)
+
+    full, user = workbooks["full"], workbooks["user"]
+    assert full.sheetnames == user.sheetnames
+
+    kept = len(user_filter.as_filtered_tuple(user_filter))
+    for full_sheet, user_sheet in zip(full.worksheets, user.worksheets):
+        full_rows = [tuple(cell.value for cell in row) for row in full_sheet.rows]
+        user_rows = [tuple(cell.value for cell in row) for row in user_sheet.rows]
+
+        assert [row[:kept] for row in full_rows] == user_rows
+
+
+def test_streamed_export_matches_workbook(tmp_path):
+    path = tmp_path / "project" / "project.pmp"
+    save_project_with_sunspec(path=path)
+    project = epcpm.project.loadp(path)
+    project.models.ensure_updated()
+
+    column_filter = epcpm.sunspectoxlsx.attr_fill(epcpm.sunspectoxlsx.Fields, True)
+
+    path = tmp_path / "streamed.xlsx"
+    epcpm.sunspectoxlsx.export(
+        path=path,
+        sunspec_model=project.models.sunspec,
+        parameters_model=project.models.parameters,
+        column_filter=column_filter,
+    )
+
+    builder = epcpm.sunspectoxlsx.builders.wrap(
+        wrapped=project.models.sunspec.root,
+        parameter_uuid_finder=project.models.sunspec.node_from_uuid,
+        parameter_model=project.models.parameters,
+        column_filter=column_filter,
+    )
+
+    def values(workbook):
+        return {
+            sheet.title: [tuple(cell.value for cell in row) for row in sheet.rows]
+            for sheet in workbook.worksheets
+        }
+
+    # compared as saved since empty cells read back as None either way
+    regular_path = tmp_path / "regular.xlsx"
+    builder.gen().save(regular_path)
+
+    expected = values(openpyxl.load_workbook(regular_path))
+    assert sum(len(rows) for rows in expected.values()) > 100
+    assert values(openpyxl.load_workbook(path)) == expected